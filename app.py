@@ -1,22 +1,54 @@
 import sys
+import os
+import time
 import sqlite3
-import shutil
 import atexit
 from pathlib import Path
-from db import DB_PATH, connect_db
+from db import backup_to, connect_db, init_db
+from core.audit import get_audit_logger
+from core.team_formation import (
+    StalePlanError, load_assignment_state, load_size_state, plan_balanced_assignment, plan_round_robin,
+    plan_diff, apply_assignment
+)
+from core.team_optimizer import COMPETITIONS, load_problem, optimize, to_plan
+from core.attendance import save_session_attendance
+from core.config import load_config, presence_penalty
+from core.scoring import recalc_hidden_scores, team_summary, individual_summary
+from core import normalization
+from core.exports import EXPORT_CACHE, ExportError, default_filename, render_csv, write_text, write_xlsx
+from core.importer import PREVIEW_ROWS, import_candidates, read_sheet
+from core.repositories import candidates as candidates_repo
+from core.repositories import internal_weights as internal_weights_repo
+from core.repositories import settings as settings_repo
+from core.repositories import teams as teams_repo
+from core.sessions import (
+    SessionOverlapError, create_sessions, find_overlaps, normalize_session, sessions_in_range
+)
+from core.attachments import (
+    ATTACH_DIR, add_attachment, import_folder, delete_attachments, collect_garbage, unlink_paths
+)
 from datetime import datetime
 from PySide6.QtWidgets import (
     QApplication, QWidget, QMainWindow, QListWidget, QStackedWidget,
     QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QTextEdit,
     QFormLayout, QTableWidget, QTableWidgetItem, QMessageBox, QInputDialog,
     QDialog, QListWidgetItem, QFileDialog, QCheckBox, QComboBox, QSpinBox,
-    QHeaderView, QDoubleSpinBox
+    QHeaderView, QDoubleSpinBox, QProgressDialog, QCalendarWidget
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, QDate
+from PySide6.QtGui import QFont, QTextCharFormat
 from ui.dashboard import Dashboard
+from ui.audit_viewer import AuditTrailDialog
+from ui.assignment_preview import AssignmentPreviewDialog
+from ui.attendance_grid import AttendanceGridDialog
+from ui.session_generator import SessionGeneratorDialog
+from ui.query_stats import QueryStatsDialog
+from ui.attachment_previews import AttachmentPreviewList
+from ui.task_runner import TaskCancelled, TaskRunner
+from ui.weight_simulator import WeightSimulatorDialog
+from ui.ranking_stability import RankingStabilityDialog
+from ui.status_preview import StatusPreview
 
-ATTACH_DIR = Path("attachments")
 ATTACH_DIR.mkdir(exist_ok=True)
 
 class ContributionDialog(QDialog):
@@ -94,7 +126,8 @@ class ContributionDialog(QDialog):
             """, contributions)
             conn.commit()
             QMessageBox.information(self, "Sucesso", "Contribuições individuais salvas.")
-            audit('member_contribution_save', f'evaluation_id={self.evaluation_id}, count={len(contributions)}')
+            audit('member_contribution_save', f'evaluation_id={self.evaluation_id}, count={len(contributions)}',
+                  entity_type='evaluation', entity_id=self.evaluation_id)
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Erro de Banco de Dados", f"Não foi possível salvar as contribuições: {e}")
@@ -102,237 +135,6 @@ class ContributionDialog(QDialog):
             conn.close()
 
 
-# -------------------------------
-# MIGRAÇÃO DE BANCO (schema v1+)
-# -------------------------------
-def init_db():
-    conn = connect_db()
-    cur = conn.cursor()
-    # user_version indica versão do schema
-    cur.execute("PRAGMA user_version")
-    ver = cur.fetchone()[0] or 0
-
-    # v0 -> v1 (tabelas básicas)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS candidates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            notes TEXT
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS teams (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS team_members (
-            team_id INTEGER,
-            candidate_id INTEGER,
-            PRIMARY KEY(team_id, candidate_id)
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS evaluations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            team_id INTEGER,
-            judge TEXT,
-            immersion INTEGER,
-            development INTEGER,
-            presentation INTEGER,
-            notes TEXT,
-            hidden_score REAL DEFAULT 0
-        )
-    """)
-    cur.execute("PRAGMA user_version = 1")
-
-    # v1 -> v2: competição na equipe + veteranos + sessões + presença
-    if ver < 2:
-        try:
-            cur.execute("ALTER TABLE teams ADD COLUMN competition TEXT DEFAULT 'OBR'")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            cur.execute("ALTER TABLE teams ADD COLUMN is_veteran INTEGER DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS training_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                training_session_id INTEGER,
-                team_id INTEGER,
-                present INTEGER DEFAULT 1,
-                notes TEXT
-            )
-        """)
-        cur.execute("PRAGMA user_version = 2")
-
-    # v2 -> v3: diário e anexos
-    if ver < 3:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS diary_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                team_id INTEGER,
-                title TEXT,
-                content TEXT,
-                created_at TEXT
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS attachments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                diary_entry_id INTEGER,
-                file_path TEXT,
-                original_name TEXT,
-                mime_type TEXT
-            )
-        """)
-        cur.execute("PRAGMA user_version = 3")
-
-    # v3 -> v4: sessão e comentário na avaliação
-    if ver < 4:
-        try:
-            cur.execute("ALTER TABLE evaluations ADD COLUMN training_session_id INTEGER")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            cur.execute("ALTER TABLE evaluations ADD COLUMN comment TEXT")
-        except sqlite3.OperationalError:
-            pass
-        cur.execute("PRAGMA user_version = 4")
-
-    # v4 -> v5: pesos internos configuráveis
-    if ver < 5:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS internal_weights (
-                name TEXT PRIMARY KEY,
-                weight REAL NOT NULL
-            )
-        """)
-        for name, w in [('immersion', 0.3), ('development', 0.5), ('presentation', 0.2)]:
-            cur.execute("INSERT OR IGNORE INTO internal_weights(name,weight) VALUES(?,?)", (name, w))
-        cur.execute("PRAGMA user_version = 5")
-
-    # v5 -> v6: settings (PIN hash)
-    if ver < 6:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        try:
-            import hashlib
-            h = hashlib.sha256(b"1234").hexdigest()
-            cur.execute("INSERT OR IGNORE INTO settings(key,value) VALUES('admin_hash',?)", (h,))
-            cur.execute("INSERT OR IGNORE INTO settings(key,value) VALUES('process_status',?)", ('ABERTO',))
-        except Exception:
-            pass
-        cur.execute("PRAGMA user_version = 6")
-
-    # v6 -> v7: cpf, phone, grade
-    if ver < 7:
-        try:
-            cur.execute("ALTER TABLE candidates ADD COLUMN cpf TEXT")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            cur.execute("ALTER TABLE candidates ADD COLUMN phone TEXT")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            cur.execute("ALTER TABLE candidates ADD COLUMN grade TEXT")
-        except sqlite3.OperationalError:
-            pass
-        cur.execute("PRAGMA user_version = 7")
-
-    # v7 -> v8: member_contribution table
-    if ver < 8:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS member_contribution (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                evaluation_id INTEGER,
-                member_id INTEGER,
-                weight REAL,
-                note TEXT,
-                FOREIGN KEY(evaluation_id) REFERENCES evaluations(id),
-                FOREIGN KEY(member_id) REFERENCES candidates(id)
-            )
-        """)
-        cur.execute("PRAGMA user_version = 8")
-
-    # v8 -> v9: soft delete para avaliações
-    if ver < 9:
-        try:
-            cur.execute("ALTER TABLE evaluations ADD COLUMN is_active INTEGER DEFAULT 1")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            cur.execute("ALTER TABLE evaluations ADD COLUMN deleted_at TEXT")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            cur.execute("ALTER TABLE evaluations ADD COLUMN delete_reason TEXT")
-        except sqlite3.OperationalError:
-            pass
-        cur.execute("PRAGMA user_version = 9")
-
-    # v9 -> v10: Add area column and remove AUTOINCREMENT from candidates
-    if ver < 10:
-        try:
-            # Create new table without AUTOINCREMENT, with only name and area
-            cur.execute("""
-                CREATE TABLE candidates_new (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    area TEXT
-                )
-            """)
-            # Copy existing data (only name and area columns)
-            cur.execute("""
-                INSERT INTO candidates_new (id, name)
-                SELECT id, name FROM candidates
-            """)
-            # Drop old table and rename new one
-            cur.execute("DROP TABLE candidates")
-            cur.execute("ALTER TABLE candidates_new RENAME TO candidates")
-        except sqlite3.OperationalError as e:
-            print(f"Migration v9->v10 error: {e}")
-        cur.execute("PRAGMA user_version = 10")
-
-    # v10 -> v11: ensure candidates table uses AUTOINCREMENT to avoid ID reuse
-    if ver < 11:
-        try:
-            cur.execute("""
-                CREATE TABLE candidates_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    area TEXT
-                )
-            """)
-            cur.execute("""
-                INSERT INTO candidates_new (id, name, area)
-                SELECT id, name, area FROM candidates
-            """)
-            cur.execute("DROP TABLE candidates")
-            cur.execute("ALTER TABLE candidates_new RENAME TO candidates")
-        except sqlite3.OperationalError as e:
-            print(f"Migration v10->v11 error: {e}")
-        cur.execute("PRAGMA user_version = 11")
-
-    conn.commit()
-    conn.close()
-
 # --------------------------------
 # ESTILOS E UTILITÁRIOS
 # --------------------------------
@@ -373,19 +175,15 @@ def now_str():
 # Settings helpers and audit
 def get_setting(key, default=None):
     conn = connect_db()
-    cur = conn.cursor()
     try:
-        cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-        r = cur.fetchone()
-        return r[0] if r else default
+        return settings_repo.get_value(conn, key, default)
     finally:
         conn.close()
 
 def set_setting(key, value):
     conn = connect_db()
-    cur = conn.cursor()
     try:
-        cur.execute("REPLACE INTO settings (key,value) VALUES (?,?)", (key, str(value)))
+        settings_repo.set_value(conn, key, value)
         conn.commit()
     finally:
         conn.close()
@@ -399,18 +197,20 @@ def set_process_status(status: str):
     set_setting('process_status', status)
     audit('process_status_change', f'status={status}')
 
-def audit(action, details=""):
-    ts = datetime.now().isoformat(sep=' ', timespec='seconds')
-    with open('audit.log', 'a', encoding='utf-8') as f:
-        f.write(f"[{ts}] {action} {details}\n")
+def audit(action, details="", **fields):
+    """Registra um evento de auditoria (JSONL, gravado em segundo plano).
+
+    Campos estruturados opcionais: entity_type, entity_id, user, duration_ms.
+    """
+    get_audit_logger().log(action, details, **fields)
 
 # --- HELPERS PARA COMBOBOXES (IDs -> labels) ---
 def fetch_teams():
-    conn = connect_db(); c = conn.cursor()
-    c.execute("SELECT id, name FROM teams ORDER BY name ASC")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    conn = connect_db()
+    try:
+        return teams_repo.list_teams(conn)
+    finally:
+        conn.close()
 
 def fetch_sessions():
     conn = connect_db(); c = conn.cursor()
@@ -434,13 +234,79 @@ def backup_snapshot(prefix="auto"):
     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
     dst = Path(f"{prefix}_backup_selection_{ts}.db")
     try:
-        shutil.copy2(DB_PATH, dst)
+        backup_to(dst)
         with open('backup.log', 'a', encoding='utf-8') as f:
             f.write(f"[{now_str()}] backup -> {dst}\n")
     except Exception as e:
         with open('backup.log', 'a', encoding='utf-8') as f:
             f.write(f"[{now_str()}] backup failed: {e}\n")
 
+# -------------------------------
+# TAREFAS EM SEGUNDO PLANO (ui/task_runner.py)
+# -------------------------------
+def _hidden_scores_task(ctx):
+    ctx.progress(text="Recalculando scores ocultos...")
+    conn = ctx.connect()
+    try:
+        return recalc_hidden_scores(conn)
+    finally:
+        conn.close()
+
+def _with_conn_task(fn, text):
+    def task(ctx, *args):
+        ctx.progress(text=text)
+        conn = ctx.connect()
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.close()
+    return task
+
+_team_summary_task = _with_conn_task(team_summary, "Calculando resumo por equipe...")
+_individual_summary_task = _with_conn_task(individual_summary, "Calculando resumo individual...")
+
+def _render_csv_task(ctx, kind, penalty):
+    ctx.progress(text="Calculando ranking...")
+    conn = ctx.connect()
+    try:
+        return render_csv(conn, kind, penalty, progress=ctx.progress, cache=EXPORT_CACHE)
+    finally:
+        conn.close()
+
+def _write_text_task(ctx, text, fn):
+    ctx.progress(0, len(text), f"Gravando {Path(fn).name}...")
+    try:
+        with open(fn, 'w', newline='', encoding='utf-8') as f:
+            write_text(text, f, progress=ctx.progress)
+    except TaskCancelled:
+        Path(fn).unlink(missing_ok=True)
+        raise
+
+def _write_xlsx_task(ctx, fn, penalty, internal):
+    ctx.progress(text=f"Gravando {Path(fn).name}...")
+    conn = ctx.connect()
+    try:
+        return write_xlsx(conn, fn, penalty, progress=ctx.progress, internal=internal)
+    except TaskCancelled:
+        Path(fn).unlink(missing_ok=True)
+        raise
+    finally:
+        conn.close()
+
+def _optimize_task(ctx, problem, time_budget, restarts):
+    def progress(done, total):
+        ctx.progress(done, total, "Otimizando equipes...")
+    return optimize(problem, time_budget=time_budget, restarts=restarts, progress=progress)
+
+def _backup_task(ctx, dst):
+    ctx.progress(text=f"Copiando banco para {dst.name}...")
+    try:
+        backup_to(dst, progress=lambda _status, remaining, total: ctx.progress(total - remaining, total))
+    except TaskCancelled:
+        dst.unlink(missing_ok=True)
+        raise
+    return dst
+
 # -------------------------------
 # JANELA PRINCIPAL
 # -------------------------------
@@ -478,6 +344,9 @@ class MainWindow(QMainWindow):
         self.stack = QStackedWidget()
         hb.addWidget(self.stack, 4)
 
+        # operações longas do Admin rodam fora da thread da interface
+        self.tasks = TaskRunner(self)
+
         # Páginas
         self.stack.addWidget(self.page_registrations())   # 0
         self.stack.addWidget(self.page_teams())           # 1
@@ -628,19 +497,12 @@ class MainWindow(QMainWindow):
         self.load_candidates()
 
     def load_candidates(self):
-        conn = connect_db()
-        cur = conn.cursor()
-        q = "SELECT id,name,area FROM candidates"
-        params = ()
         term = getattr(self, 'search_input', None)
-        if term and term.text().strip():
-            s = '%' + term.text().strip() + '%'
-            q += " WHERE name LIKE ? OR area LIKE ?"
-            params = (s, s)
-        q += " ORDER BY id DESC"
-        cur.execute(q, params)
-        rows = cur.fetchall()
-        conn.close()
+        conn = connect_db()
+        try:
+            rows = candidates_repo.search(conn, term.text().strip() if term else None)
+        finally:
+            conn.close()
         self.cand_table.setRowCount(len(rows))
         for r, row in enumerate(rows):
             for c, val in enumerate(row):
@@ -684,235 +546,121 @@ class MainWindow(QMainWindow):
         if not fn:
             return
         p = Path(fn)
-        inserted = 0
-        skipped = 0
-        # XLSX
-        if p.suffix.lower() in ('.xlsx', '.xls'):
-            try:
-                from openpyxl import load_workbook
-            except Exception as e:
-                QMessageBox.warning(self, 'Erro', f'openpyxl não disponível: {e}')
-                return
-            wb = load_workbook(fn, read_only=True, data_only=True)
-            ws = wb.active
-            rows = []
-            for row in ws.iter_rows(values_only=True):
-                rows.append(list(row))
-            headers = []
-            data_rows = []
-            if rows:
-                first = rows[0]
-                if any(isinstance(x, str) for x in first):
-                    headers = [str(x).strip() if x is not None else '' for x in first]
-                    data_rows = rows[1:]
-                else:
-                    data_rows = rows
-            preview = [tuple(r) for r in data_rows[:10]]
-            dlg = ImportPreviewDialog(headers, preview, parent=self)
-            if dlg.exec() != QDialog.Accepted:
-                QMessageBox.information(self, 'Importar Excel', 'Importação cancelada')
-                return
-            idx_name, idx_area = dlg.mapping_indices()
-            # Limit to first 51 data rows to avoid importing huge spreadsheets
-            data_rows = data_rows[:51]
-            conn = connect_db(); c = conn.cursor()
-            for r in data_rows:
-                if all(val is None or str(val).strip() == '' for val in r):
-                    skipped += 1
-                    continue
-                def get_idx(r, idx):
-                    try:
-                        v = r[idx]
-                        return str(v).strip() if v is not None else ''
-                    except Exception:
-                        return ''
-                name = get_idx(r, idx_name)
-                area = get_idx(r, idx_area)
-                if not name.strip():
-                    skipped += 1; continue
-                # Always insert without specifying id; DB assigns autoincremented id
-                try:
-                    c.execute("INSERT INTO candidates (name,area) VALUES (?,?)", (name, area))
-                    inserted += 1
-                except Exception:
-                    skipped += 1
-            conn.commit(); conn.close()
-            self.load_candidates()
-            QMessageBox.information(self, 'Importar Excel', f'Concluída: {inserted} inseridos, {skipped} ignorados')
-            audit('import_xlsx', f'file={p.name}, inserted={inserted}, skipped={skipped}')
+        is_xlsx = p.suffix.lower() in ('.xlsx', '.xls')
+        title = 'Importar Excel' if is_xlsx else 'Importar CSV'
+        try:
+            headers, rows = read_sheet(p)
+        except ImportError as e:
+            QMessageBox.warning(self, 'Erro', f'openpyxl não disponível: {e}')
+            return
+        except Exception as e:
+            QMessageBox.warning(self, 'Erro', f'Não foi possível ler o arquivo: {e}')
             return
-        # CSV
-        import csv
+        dlg = ImportPreviewDialog(headers, [tuple(r) for r in rows[:PREVIEW_ROWS]], parent=self)
+        if dlg.exec() != QDialog.Accepted:
+            QMessageBox.information(self, title, 'Importação cancelada')
+            return
+        idx_name, idx_area = dlg.mapping_indices()
+        conn = connect_db()
         try:
-            f = open(fn, newline='', encoding='utf-8')
-        except UnicodeDecodeError:
-            f = open(fn, newline='', encoding='latin-1')
-        with f:
-            reader = csv.DictReader(f)
-            rows = []
-            if reader.fieldnames:
-                for r in reader:
-                    rows.append(r)
-                # Limit to first 51 rows to avoid importing excessive data
-                rows = rows[:51]
-                headers = list(rows[0].keys()) if rows else []
-                preview_rows = [tuple(r.get(h, '') for h in headers) for r in rows[:10]]
-            else:
-                f.seek(0)
-                f2 = csv.reader(f)
-                rows = []
-                for r in f2:
-                    if not r: continue
-                    rows.append({'__raw__': r})
-                headers = []
-                preview_rows = [tuple(r['__raw__']) for r in rows[:10]]
-            dlg = ImportPreviewDialog(headers, preview_rows, parent=self)
-            if dlg.exec() != QDialog.Accepted:
-                QMessageBox.information(self, 'Importar CSV', 'Importação cancelada')
-                return
-            idx_name, idx_area = dlg.mapping_indices()
-            conn = connect_db(); c = conn.cursor()
-            # Ensure we only process the first 51 rows (safety)
-            rows = rows[:51]
-            for r in rows:
-                if '__raw__' in r:
-                    raw = r['__raw__']
-                    if all(val.strip() == '' for val in raw):
-                        skipped += 1
-                        continue
-                    name = raw[idx_name].strip() if len(raw) > idx_name else ''
-                    area = raw[idx_area].strip() if len(raw) > idx_area else ''
-                else:
-                    if all(val.strip() == '' for val in r.values()):
-                        skipped += 1
-                        continue
-                    def get_by_index(d, idx):
-                        try:
-                            key = list(d.keys())[idx]
-                            return str(d.get(key,'')).strip()
-                        except Exception:
-                            return ''
-                    name = get_by_index(r, idx_name)
-                    area = get_by_index(r, idx_area)
-                if not name.strip():
-                    skipped += 1; continue
-                # Always insert without specifying id; DB assigns autoincremented id
-                try:
-                    c.execute("INSERT INTO candidates (name,area) VALUES (?,?)", (name, area))
-                    inserted += 1
-                except Exception:
-                    skipped += 1
-            conn.commit(); conn.close()
-            self.load_candidates()
-            QMessageBox.information(self, 'Importar CSV', f'Concluída: {inserted} inseridos, {skipped} ignorados')
-            audit('import_csv', f'file={Path(fn).name}, inserted={inserted}, skipped={skipped}')
+            inserted, skipped = import_candidates(conn, rows, idx_name, idx_area)
+        finally:
+            conn.close()
+        self.load_candidates()
+        QMessageBox.information(self, title, f'Concluída: {inserted} inseridos, {skipped} ignorados')
+        audit('import_xlsx' if is_xlsx else 'import_csv', f'file={p.name}, inserted={inserted}, skipped={skipped}')
 
     # AUTO-ATRIBUIÇÃO
     def auto_assign_dialog(self):
         dlg = AdvancedAutoAssignDialog(parent=self)
         if dlg.exec() == QDialog.Accepted:
             config = dlg.get_config()
-            self.auto_assign_by_area(config)
+            if config['optimize']:
+                self.auto_assign_optimized(config)
+            else:
+                self.auto_assign_by_area(config)
 
     def auto_assign_by_size(self, size:int):
-        conn = connect_db(); c = conn.cursor()
-        c.execute("SELECT id FROM candidates WHERE id NOT IN (SELECT candidate_id FROM team_members)")
-        unassigned = [r[0] for r in c.fetchall()]
-        if not unassigned:
-            QMessageBox.information(self, 'Auto-atribuir', 'Nenhum candidato sem equipe')
-            conn.close(); return
-        import math
-        needed = math.ceil(len(unassigned) / size)
-        c.execute("SELECT COUNT(*) FROM teams")
-        existing = c.fetchone()[0]
-        created = []
-        for i in range(max(0, needed - existing)):
-            name = f"AutoTeam_{now_str()}_{i}"
-            c.execute("INSERT INTO teams(name,competition,is_veteran) VALUES(?,?,?)", (name, 'OBR', 0))
-            created.append(c.lastrowid)
-        c.execute("SELECT id FROM teams ORDER BY id ASC LIMIT ?", (needed,))
-        team_ids = [r[0] for r in c.fetchall()]
-        for idx, cid in enumerate(unassigned):
-            tid = team_ids[idx % len(team_ids)]
-            c.execute("INSERT OR IGNORE INTO team_members(team_id,candidate_id) VALUES(?,?)", (tid, cid))
-        conn.commit(); conn.close()
-        self.load_teams(); self.load_candidates()
-        QMessageBox.information(self, 'Auto-atribuir', f'Atribuídos {len(unassigned)} candidatos em {len(team_ids)} equipes')
-        audit('auto_assign', f'size={size},assigned={len(unassigned)}')
+        t0 = time.perf_counter()
+        conn = connect_db()
+        try:
+            candidates, teams = load_size_state(conn, size)
+            if not candidates:
+                QMessageBox.information(self, 'Auto-atribuir', 'Nenhum candidato sem equipe')
+                return
+            plan = plan_round_robin(candidates, teams)
+            rows = plan_diff(conn, plan)
+        finally:
+            conn.close()
+        plan_ms = (time.perf_counter() - t0) * 1000
+        self.preview_and_apply_plan(plan, rows, 'auto_assign', f'size={size}', plan_ms)
 
     def auto_assign_by_area(self, config):
         """Auto-assign candidates by area configuration"""
-        conn = connect_db(); c = conn.cursor()
-
-        # Get unassigned candidates
-        c.execute("SELECT id, area FROM candidates WHERE id NOT IN (SELECT candidate_id FROM team_members)")
-        unassigned = c.fetchall()
+        t0 = time.perf_counter()
+        conn = connect_db()
+        try:
+            candidates, teams = load_assignment_state(conn, config['num_teams'])
+            if not candidates:
+                QMessageBox.information(self, 'Auto-atribuir', 'Nenhum candidato sem equipe')
+                return
+            plan = plan_balanced_assignment(candidates, teams, config['areas'], config.get('team_capacity'))
+            rows = plan_diff(conn, plan)
+        finally:
+            conn.close()
+        plan_ms = (time.perf_counter() - t0) * 1000
+        self.preview_and_apply_plan(plan, rows, 'auto_assign_by_area', f'teams={len(plan["teams"])}', plan_ms)
 
-        if not unassigned:
-            QMessageBox.information(self, 'Auto-atribuir', 'Nenhum candidato sem equipe')
+    def auto_assign_optimized(self, config):
+        """Modo otimização: recozimento simulado com reinícios em paralelo, em segundo plano."""
+        t0 = time.perf_counter()
+        comp_cap = config.get('competition_capacity')
+        conn = connect_db()
+        try:
+            problem, teams, skipped = load_problem(conn, config['num_teams'], comp_cap, areas=config['areas'])
+        finally:
             conn.close()
+        if not problem['cand_ids']:
+            QMessageBox.information(self, 'Auto-atribuir', 'Nenhum candidato sem equipe nas áreas selecionadas')
             return
 
-        # Group candidates by area
-        candidates_by_area = {}
-        for cid, area in unassigned:
-            if area not in candidates_by_area:
-                candidates_by_area[area] = []
-            candidates_by_area[area].append(cid)
-
-        # Get or create teams
-        area_config = config['areas']
-        total_teams = config['num_teams']
-
-        c.execute("SELECT COUNT(*) FROM teams")
-        existing_teams = c.fetchone()[0]
-
-        if total_teams > existing_teams:
-            for i in range(total_teams - existing_teams):
-                name = f"AutoTeam_{now_str()}_{i}"
-                c.execute("INSERT INTO teams(name,competition,is_veteran) VALUES(?,?,?)", (name, 'OBR', 0))
-
-        c.execute("SELECT id FROM teams ORDER BY id ASC LIMIT ?", (total_teams,))
-        team_ids = [r[0] for r in c.fetchall()]
-
-        # Distribute candidates to teams
-        team_capacity = {tid: {} for tid in team_ids}
-        for tid in team_ids:
-            for area in area_config:
-                team_capacity[tid][area] = 0
-
-        # Assign candidates round-robin by area
-        for area, candidates in candidates_by_area.items():
-            if area not in area_config:
-                continue
-
-            max_per_team = area_config[area]
-            team_idx = 0
-
-            for cid in candidates:
-                # Try to find a team with space for this area
-                assigned = False
-                for _ in range(len(team_ids)):
-                    tid = team_ids[team_idx % len(team_ids)]
-                    if team_capacity[tid][area] < max_per_team:
-                        c.execute("INSERT OR IGNORE INTO team_members(team_id,candidate_id) VALUES(?,?)", (tid, cid))
-                        team_capacity[tid][area] += 1
-                        assigned = True
-                        team_idx += 1
-                        break
-                    team_idx += 1
-
-                if not assigned:
-                    # Skip if no space available in any team for this area
-                    pass
-
-        conn.commit()
-        conn.close()
+        def optimized(result):
+            conn = connect_db()
+            try:
+                plan = to_plan(problem, result['assign'], teams, skipped)
+                rows = plan_diff(conn, plan)
+            finally:
+                conn.close()
+            plan_ms = (time.perf_counter() - t0) * 1000
+            summary = (f'Custo final: {result["cost"]:.2f} ({len(result["restarts"])} reinícios, '
+                       f'{result["iterations"]} iterações no melhor)')
+            self.preview_and_apply_plan(plan, rows, 'auto_assign_optimized',
+                                        f'teams={len(plan["teams"])},cost={result["cost"]:.2f}', plan_ms, summary)
+
+        self.tasks.run('auto_assign_optimized', _optimize_task, problem, config['time_budget'], config['restarts'],
+                       title='Auto-atribuir (otimização)', on_done=optimized)
+
+    def preview_and_apply_plan(self, plan, rows, action, details, plan_ms, summary=""):
+        """Mostra a prévia do plano e grava tudo numa transação se o usuário aplicar."""
+        dlg = AssignmentPreviewDialog(rows, plan['unplaced'], summary, parent=self)
+        if dlg.exec() != QDialog.Accepted:
+            audit(f'{action}_discarded', f'{details},planned={len(plan["assignments"])}')
+            return
+        t0 = time.perf_counter()
+        conn = connect_db()
+        try:
+            apply_assignment(conn, plan)
+        except StalePlanError as e:
+            QMessageBox.warning(self, 'Auto-atribuir', str(e))
+            return
+        finally:
+            conn.close()
+        elapsed_ms = plan_ms + (time.perf_counter() - t0) * 1000
         self.load_teams()
         self.load_candidates()
-        assigned_count = sum(len(candidates) for candidates in candidates_by_area.values())
-        QMessageBox.information(self, 'Auto-atribuir', f'Atribuídos {assigned_count} candidatos em {total_teams} equipes')
-        audit('auto_assign_by_area', f'teams={total_teams},assigned={assigned_count}')
+        assigned_count = len(plan['assignments'])
+        QMessageBox.information(self, 'Auto-atribuir', f'Atribuídos {assigned_count} candidatos em {len(rows)} equipes')
+        audit(action, f'{details},assigned={assigned_count},unplaced={len(plan["unplaced"])}', duration_ms=elapsed_ms)
 
     # --------------------------
     # PÁGINA: EQUIPES
@@ -1078,15 +826,27 @@ class MainWindow(QMainWindow):
         btn = QPushButton("Criar sessão")
         btn.setObjectName("primary")
         btn.clicked.connect(self.create_session)
+        gen_btn = QPushButton("Gerar sessões recorrentes")
+        gen_btn.clicked.connect(self.open_session_generator)
         v.addLayout(form)
-        v.addWidget(btn)
+        create_row = QHBoxLayout()
+        create_row.addWidget(btn)
+        create_row.addWidget(gen_btn)
+        v.addLayout(create_row)
+        # Calendário: dias com sessão em negrito; clicar filtra a tabela pelo dia
+        self.session_calendar = QCalendarWidget()
+        self.session_calendar.setMaximumHeight(220)
+        self.session_calendar.currentPageChanged.connect(lambda y, m: self.mark_session_days())
+        self.session_calendar.clicked.connect(self.filter_sessions_by_day)
+        self._marked_session_days = []
+        v.addWidget(self.session_calendar)
         self.session_table = QTableWidget(0, 4)
         self.session_table.setHorizontalHeaderLabels(["ID", "Data", "Início", "Fim"])
         v.addWidget(self.session_table)
         btns = QHBoxLayout()
-        refresh = QPushButton("Atualizar")
+        refresh = QPushButton("Atualizar (todas)")
         refresh.setObjectName("primary")
-        refresh.clicked.connect(self.load_sessions)
+        refresh.clicked.connect(lambda: self.load_sessions())
         edit_btn = QPushButton("Editar sessão")
         edit_btn.setObjectName("primary")
         edit_btn.clicked.connect(self.edit_selected_session)
@@ -1102,11 +862,31 @@ class MainWindow(QMainWindow):
 
     def create_session(self):
         conn = connect_db()
-        c = conn.cursor()
-        c.execute("INSERT INTO training_sessions (date,start_time,end_time) VALUES (?,?,?)",
-                  (self.s_date.text().strip(), self.s_start.text().strip(), self.s_end.text().strip()))
-        conn.commit(); conn.close()
+        try:
+            create_sessions(conn, [(self.s_date.text(), self.s_start.text(), self.s_end.text())])
+        except SessionOverlapError as e:
+            other = e.overlaps[0][1]
+            QMessageBox.warning(self, "Conflito de horários", f"Já existe sessão em {other[0]} das {other[1]} às {other[2]}.")
+            return
+        except ValueError as e:
+            QMessageBox.warning(self, "Erro", f"Formato inválido: {e}")
+            return
+        finally:
+            conn.close()
         QMessageBox.information(self, "OK", "Sessão criada")
+        self.refresh_session_views()
+
+    def open_session_generator(self):
+        if get_process_status() == "ENCERRADO":
+            QMessageBox.warning(self, "Ação Bloqueada", "Processo encerrado. Não é possível criar sessões.")
+            return
+        dlg = SessionGeneratorDialog(parent=self)
+        if dlg.exec() == QDialog.Accepted:
+            QMessageBox.information(self, "OK", f"{dlg.created} sessões criadas")
+            audit('session_bulk_create', f'created={dlg.created}')
+            self.refresh_session_views()
+
+    def refresh_session_views(self):
         self.load_sessions()
         try:
             fill_session_combobox(self.eval_session_cb)
@@ -1114,16 +894,43 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
-    def load_sessions(self):
+    def load_sessions(self, date_from=None, date_to=None):
         conn = connect_db()
-        c = conn.cursor()
-        c.execute("SELECT id,date,start_time,end_time FROM training_sessions ORDER BY id DESC")
-        rows = c.fetchall()
-        conn.close()
+        try:
+            if date_from:
+                rows = sessions_in_range(conn, date_from, date_to or date_from)
+            else:
+                rows = conn.execute("SELECT id,date,start_time,end_time FROM training_sessions ORDER BY id DESC").fetchall()
+        finally:
+            conn.close()
         self.session_table.setRowCount(len(rows))
         for r,row in enumerate(rows):
             for cidx,val in enumerate(row):
                 self.session_table.setItem(r,cidx,QTableWidgetItem(str(val)))
+        self.mark_session_days()
+
+    def mark_session_days(self):
+        cal = self.session_calendar
+        for d in self._marked_session_days:
+            cal.setDateTextFormat(d, QTextCharFormat())
+        first = QDate(cal.yearShown(), cal.monthShown(), 1)
+        conn = connect_db()
+        try:
+            rows = sessions_in_range(conn, first.toString("yyyy-MM-dd"),
+                                     first.addMonths(1).addDays(-1).toString("yyyy-MM-dd"))
+        finally:
+            conn.close()
+        bold = QTextCharFormat()
+        bold.setFontWeight(QFont.Bold)
+        self._marked_session_days = []
+        for d in {row[1] for row in rows}:
+            qd = QDate.fromString(d, "yyyy-MM-dd")
+            cal.setDateTextFormat(qd, bold)
+            self._marked_session_days.append(qd)
+
+    def filter_sessions_by_day(self, qdate):
+        day = qdate.toString("yyyy-MM-dd")
+        self.load_sessions(day, day)
 
     def edit_selected_session(self):
         if get_process_status() == "ENCERRADO":
@@ -1160,7 +967,7 @@ class MainWindow(QMainWindow):
         c.execute("DELETE FROM training_sessions WHERE id=?", (session_id,))
         conn.commit()
         conn.close()
-        audit('session_delete', f'session_id={session_id}')
+        audit('session_delete', f'session_id={session_id}', entity_type='training_session', entity_id=session_id)
         self.load_sessions()
         try:
             fill_session_combobox(self.eval_session_cb)
@@ -1200,14 +1007,35 @@ class MainWindow(QMainWindow):
         delete_btn = QPushButton("Remover presença")
         delete_btn.setObjectName("danger")
         delete_btn.clicked.connect(self.delete_selected_attendance)
+        grid_btn = QPushButton("Chamada da sessão (todas as equipes)")
+        grid_btn.clicked.connect(lambda: self.open_attendance_grid('teams'))
+        cand_grid_btn = QPushButton("Chamada individual (candidatos)")
+        cand_grid_btn.clicked.connect(lambda: self.open_attendance_grid('candidates'))
         btns = QHBoxLayout()
         btns.addWidget(refresh)
+        btns.addWidget(grid_btn)
+        btns.addWidget(cand_grid_btn)
         btns.addWidget(edit_btn)
         btns.addWidget(delete_btn)
         v.addLayout(btns)
         self.load_attendance()
         return w
 
+    def open_attendance_grid(self, mode='teams'):
+        if get_process_status() == "ENCERRADO":
+            QMessageBox.warning(self, "Ação Bloqueada", "Processo encerrado. Não é possível registrar presenças.")
+            return
+        sid = self.a_session_cb.currentData()
+        if sid is None:
+            QMessageBox.warning(self, "Erro", "Selecione a sessão")
+            return
+        dlg = AttendanceGridDialog(sid, self.a_session_cb.currentText(), mode=mode, parent=self)
+        if dlg.exec() == QDialog.Accepted and dlg.saved_count:
+            action = 'attendance_bulk_save' if mode == 'teams' else 'candidate_attendance_bulk_save'
+            audit(action, f'session_id={sid}, rows={dlg.saved_count}',
+                  entity_type='training_session', entity_id=sid)
+            self.load_attendance()
+
     def add_attendance(self):
         sid = self.a_session_cb.currentData()
         tid = self.a_team_cb.currentData()
@@ -1217,10 +1045,10 @@ class MainWindow(QMainWindow):
         pres = 1 if self.a_present.currentText() == "Sim" else 0
         notes = self.a_notes.text().strip()
         conn = connect_db()
-        c = conn.cursor()
-        c.execute("INSERT INTO attendance (training_session_id,team_id,present,notes) VALUES (?,?,?,?)",
-                  (sid, tid, pres, notes))
-        conn.commit(); conn.close()
+        try:
+            save_session_attendance(conn, sid, [(tid, pres, notes)])
+        finally:
+            conn.close()
         QMessageBox.information(self, "OK", "Presença registrada")
         self.load_attendance()
 
@@ -1265,7 +1093,7 @@ class MainWindow(QMainWindow):
         c.execute("DELETE FROM attendance WHERE id=?", (attendance_id,))
         conn.commit()
         conn.close()
-        audit('attendance_delete', f'attendance_id={attendance_id}')
+        audit('attendance_delete', f'attendance_id={attendance_id}', entity_type='attendance', entity_id=attendance_id)
         self.load_attendance()
 
     # --------------------------
@@ -1388,9 +1216,13 @@ class MainWindow(QMainWindow):
         self.attach_btn_add  = QPushButton("Adicionar anexo à última entrada criada")
         self.attach_btn_add.setObjectName("primary")
         self.attach_btn_add.clicked.connect(self.add_attachment_last_entry)
+        self.attach_btn_folder = QPushButton("Importar pasta inteira")
+        self.attach_btn_folder.setObjectName("primary")
+        self.attach_btn_folder.clicked.connect(self.import_attachment_folder)
         attach_row.addWidget(QLabel("Entry ID (auto):"))
         attach_row.addWidget(self.attach_entry_id)
         attach_row.addWidget(self.attach_btn_add)
+        attach_row.addWidget(self.attach_btn_folder)
         v.addLayout(attach_row)
         self.diary_table = QTableWidget(0, 4)
         self.diary_table.setHorizontalHeaderLabels(["ID","Equipe","Título","Criado em"])
@@ -1398,6 +1230,9 @@ class MainWindow(QMainWindow):
         self.attach_table = QTableWidget(0, 4)
         self.attach_table.setHorizontalHeaderLabels(["ID","Entry ID","Arquivo","Nome original"])
         v.addWidget(self.attach_table)
+        v.addWidget(QLabel("Imagens da equipe (duplo clique para abrir)"))
+        self.attach_previews = AttachmentPreviewList()
+        v.addWidget(self.attach_previews)
         list_btns = QHBoxLayout()
         btn_load_d = QPushButton("Carregar entradas da equipe")
         btn_load_d.setObjectName("primary")
@@ -1450,7 +1285,11 @@ class MainWindow(QMainWindow):
         if not entry_id_text:
             QMessageBox.warning(self, "Erro", "Crie uma entrada primeiro")
             return
-        entry_id = int(entry_id_text)
+        try:
+            entry_id = int(entry_id_text)
+        except ValueError:
+            QMessageBox.warning(self, "Erro", "ID da entrada inválido")
+            return
         fn, _ = QFileDialog.getOpenFileName(self, "Escolher arquivo")
         if not fn:
             return
@@ -1458,16 +1297,99 @@ class MainWindow(QMainWindow):
         if not src.exists():
             QMessageBox.warning(self, "Erro", "Arquivo inexistente")
             return
-        dst = ATTACH_DIR / f"{entry_id}_{src.name}"
-        shutil.copy2(src, dst)
         conn = connect_db()
-        c = conn.cursor()
-        c.execute("INSERT INTO attachments (diary_entry_id,file_path,original_name,mime_type) VALUES (?,?,?,?)",
-                  (entry_id, str(dst), src.name, ""))
-        conn.commit(); conn.close()
+        try:
+            attach_id = add_attachment(conn, entry_id, src)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            QMessageBox.critical(self, "Erro", f"Não foi possível adicionar o anexo: {e}")
+            return
+        finally:
+            conn.close()
+        audit('attachment_add', f'entry_id={entry_id}, file={src.name}', entity_type='attachment', entity_id=attach_id)
         QMessageBox.information(self, "OK", "Anexo adicionado")
         self.load_attachments_by_team()
 
+    def import_attachment_folder(self):
+        # Entrada alvo: selecionada na tabela, senão a última criada, senão cria uma nova
+        entry_id = None
+        if self.diary_table.currentRow() >= 0:
+            item = self.diary_table.item(self.diary_table.currentRow(), 0)
+            entry_id = int(item.text()) if item else None
+        entry_id_text = self.attach_entry_id.text().strip()
+        if entry_id is None and entry_id_text:
+            try:
+                entry_id = int(entry_id_text)
+            except ValueError:
+                QMessageBox.warning(self, "Erro", "ID da entrada inválido")
+                return
+        folder = QFileDialog.getExistingDirectory(self, "Escolher pasta de anexos")
+        if not folder:
+            return
+        folder = Path(folder)
+        created_entry = entry_id is None
+        if created_entry:
+            team_id = self.d_team_cb.currentData()
+            if team_id is None:
+                QMessageBox.warning(self, "Erro", "Selecione uma equipe ou uma entrada do diário")
+                return
+            conn = connect_db()
+            c = conn.cursor()
+            c.execute("INSERT INTO diary_entries (team_id,title,content,created_at) VALUES (?,?,?,?)",
+                      (team_id, f"Registros: {folder.name}", f"Anexos importados da pasta {folder.name}", now_str()))
+            entry_id = c.lastrowid
+            conn.commit(); conn.close()
+            self.attach_entry_id.setText(str(entry_id))
+
+        progress_dlg = QProgressDialog("Importando anexos...", "Cancelar", 0, 0, self)
+        progress_dlg.setWindowTitle("Importar pasta")
+        progress_dlg.setWindowModality(Qt.WindowModal)
+        progress_dlg.setMinimumDuration(300)
+
+        def on_progress(done, total):
+            progress_dlg.setMaximum(total)
+            progress_dlg.setValue(done)
+            return not progress_dlg.wasCanceled()
+
+        t0 = time.perf_counter()
+        result = None
+        conn = connect_db()
+        try:
+            result = import_folder(conn, entry_id, folder, progress=on_progress)
+            if result["cancelled"]:
+                collect_garbage(conn)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha na importação: {e}")
+        finally:
+            progress_dlg.close()
+            conn.close()
+        if created_entry and (result is None or result["cancelled"] or not result["imported"]):
+            # a entrada "Registros: <pasta>" só existia para receber os anexos
+            conn = connect_db()
+            conn.execute("DELETE FROM diary_entries WHERE id=? AND NOT EXISTS "
+                         "(SELECT 1 FROM attachments WHERE diary_entry_id=?)", (entry_id, entry_id))
+            conn.commit(); conn.close()
+            self.attach_entry_id.clear()
+            self.load_diary_entries()
+        if result is None:
+            return
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if result["cancelled"]:
+            QMessageBox.information(self, "Importar pasta", "Importação cancelada. Nenhum anexo foi criado.")
+            return
+        if not result["total"]:
+            QMessageBox.information(self, "Importar pasta", f"Nenhum arquivo encontrado em {folder.name}.")
+            return
+        msg = f"{result['imported']} de {result['total']} arquivos anexados à entrada {entry_id}."
+        if result["failed"]:
+            msg += f"\n{len(result['failed'])} falharam:\n" + "\n".join(result["failed"][:10])
+        QMessageBox.information(self, "Importar pasta", msg)
+        audit('attachment_import_folder', f'entry_id={entry_id}, folder={folder.name}, imported={result["imported"]}',
+              entity_type='diary_entry', entity_id=entry_id, duration_ms=elapsed_ms)
+        self.load_diary_entries()
+        self.load_attachments_by_team()
+
     def load_diary_entries(self):
         team_id = self.d_team_cb.currentData()
         if team_id is None:
@@ -1501,6 +1423,7 @@ class MainWindow(QMainWindow):
         for r,row in enumerate(rows):
             for cidx,val in enumerate(row):
                 self.attach_table.setItem(r,cidx,QTableWidgetItem(str(val)))
+        self.attach_previews.load_team(team_id)
 
     def edit_selected_diary_entry(self):
         if get_process_status() == "ENCERRADO":
@@ -1526,18 +1449,13 @@ class MainWindow(QMainWindow):
             return
         conn = connect_db()
         c = conn.cursor()
-        c.execute("SELECT file_path FROM attachments WHERE diary_entry_id=?", (entry_id,))
-        attachments = [r[0] for r in c.fetchall()]
-        c.execute("DELETE FROM attachments WHERE diary_entry_id=?", (entry_id,))
+        legacy_files = delete_attachments(conn, entry_id=entry_id)
         c.execute("DELETE FROM diary_entries WHERE id=?", (entry_id,))
         conn.commit()
+        collect_garbage(conn)
         conn.close()
-        for path in attachments:
-            try:
-                Path(path).unlink(missing_ok=True)
-            except Exception:
-                pass
-        audit('diary_entry_delete', f'entry_id={entry_id}')
+        unlink_paths(legacy_files)
+        audit('diary_entry_delete', f'entry_id={entry_id}', entity_type='diary_entry', entity_id=entry_id)
         self.load_diary_entries()
         self.load_attachments_by_team()
 
@@ -1560,14 +1478,12 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ação", "Anexo não encontrado.")
             return
         attach_id, file_path = row
-        c.execute("DELETE FROM attachments WHERE id=?", (attach_id,))
+        legacy_files = delete_attachments(conn, [attach_id])
         conn.commit()
+        collect_garbage(conn)
         conn.close()
-        try:
-            Path(file_path).unlink(missing_ok=True)
-        except Exception:
-            pass
-        audit('attachment_delete', f'attachment_id={attach_id}')
+        unlink_paths(legacy_files)
+        audit('attachment_delete', f'attachment_id={attach_id}', entity_type='attachment', entity_id=attach_id)
         self.load_attachments_by_team()
 
     # --------------------------
@@ -1659,29 +1575,51 @@ class MainWindow(QMainWindow):
         final_result_btn = QPushButton("Gerar Resultado Final")
         final_result_btn.setObjectName("primary")
         final_result_btn.clicked.connect(self.export_final_result)
+        final_xlsx_btn = QPushButton("Resultado Final (Excel)")
+        final_xlsx_btn.setObjectName("primary")
+        final_xlsx_btn.setToolTip("Aba com nome, equipe e status (comunicável); opcionalmente a aba oculta do "
+                                  "ranking interno (só banca).")
+        final_xlsx_btn.clicked.connect(self.export_final_result_xlsx)
         pin_btn = QPushButton("Trocar PIN")
         pin_btn.setObjectName("danger")
         pin_btn.clicked.connect(self.change_admin_pin)
         backup_btn = QPushButton("Backup DB")
         backup_btn.setObjectName("danger")
         backup_btn.clicked.connect(self.backup_db)
+        audit_btn = QPushButton("Trilha de auditoria")
+        audit_btn.setObjectName("primary")
+        audit_btn.clicked.connect(self.open_audit_trail)
+        queries_btn = QPushButton("Consultas SQL")
+        queries_btn.setObjectName("primary")
+        queries_btn.clicked.connect(lambda: QueryStatsDialog(self).exec())
         # ops.addWidget(view_btn)
         ops.addWidget(calc_btn); ops.addWidget(dump_btn); ops.addWidget(final_result_btn)
-        ops.addWidget(pin_btn); ops.addWidget(backup_btn)
+        ops.addWidget(final_xlsx_btn)
+        ops.addWidget(audit_btn); ops.addWidget(queries_btn); ops.addWidget(pin_btn); ops.addWidget(backup_btn)
         v.addLayout(ops)
         # Pesos internos
         wgt_box = QFormLayout()
         self.w_imm = QLineEdit("0.3"); self.w_dev = QLineEdit("0.5"); self.w_pres = QLineEdit("0.2")
+        self.chk_judge_norm = QCheckBox("Normalizar notas por banca (rigor de cada avaliador)")
+        self.chk_judge_norm.setToolTip(
+            f"Cada critério vira z-score dentro da banca, na escala de todas as bancas. Bancas com menos de "
+            f"{normalization.min_judge_evals()} avaliações ativas ficam com as notas brutas.")
         save_w = QPushButton("Salvar pesos internos")
         save_w.setObjectName("primary")
         if get_process_status() == "ENCERRADO":
             save_w.setDisabled(True)
             save_w.setToolTip("Processo encerrado. Alterações não são mais permitidas.")
         save_w.clicked.connect(self.save_internal_weights)
+        sim_w = QPushButton("Simular pesos...")
+        sim_w.setToolTip("Compara as faixas do resultado final sob vários pesos, sem gravar nada.")
+        sim_w.clicked.connect(self.open_weight_simulator)
         wgt_box.addRow("Peso Imersão:", self.w_imm)
         wgt_box.addRow("Peso Desenvolvimento:", self.w_dev)
         wgt_box.addRow("Peso Apresentação:", self.w_pres)
-        wgt_box.addRow(save_w)
+        wgt_box.addRow(self.chk_judge_norm)
+        wgt_row = QHBoxLayout()
+        wgt_row.addWidget(save_w); wgt_row.addWidget(sim_w)
+        wgt_box.addRow(wgt_row)
         v.addLayout(wgt_box)
 
         # Controle de Estado do Processo Seletivo
@@ -1706,14 +1644,18 @@ class MainWindow(QMainWindow):
         self.admin_evals_table.cellDoubleClicked.connect(self._admin_eval_cell_dbl)
         v.addWidget(self.admin_evals_table)
         # Resumo por equipe (ranking interno)
-        self.chk_penalty = QCheckBox("Aplicar penalidade por presença (< 75% => x0.9)")
+        threshold, factor = presence_penalty()
+        self.chk_penalty = QCheckBox(f"Aplicar penalidade por presença (< {threshold:.0%} => x{factor:g})")
         self.chk_penalty.setChecked(True)
+        self.status_preview = StatusPreview(self.chk_penalty.isChecked())
+        self.chk_penalty.toggled.connect(self.status_preview.set_apply_penalty)
         btn_summary = QPushButton("Recalcular Resumo por equipe")
         btn_summary.setObjectName("primary")
         btn_summary.clicked.connect(self.recalc_team_summary)
         self.summary_table = QTableWidget(0, 5)
         self.summary_table.setHorizontalHeaderLabels(["Equipe ID", "Nome", "AVG hidden", "Presença (%)", "Score Final", "AVG Imersão", "AVG Apresentação"])
         v.addWidget(self.chk_penalty)
+        v.addWidget(self.status_preview)
         v.addWidget(btn_summary)
         v.addWidget(self.summary_table)
         
@@ -1722,9 +1664,15 @@ class MainWindow(QMainWindow):
         btn_ind_summary = QPushButton("Recalcular Resumo Individual")
         btn_ind_summary.setObjectName("primary")
         btn_ind_summary.clicked.connect(self.recalc_individual_summary)
-        self.individual_summary_table = QTableWidget(0, 5)
-        self.individual_summary_table.setHorizontalHeaderLabels(["Candidato ID", "Nome", "Equipe Atual", "Score Ponderado", "Avaliações"])
-        v.addWidget(btn_ind_summary)
+        btn_stability = QPushButton("Estabilidade do ranking...")
+        btn_stability.setToolTip("Bootstrap das avaliações ativas por banca ou sessão (uso interno).")
+        btn_stability.clicked.connect(
+            lambda: RankingStabilityDialog(self.tasks, self.chk_penalty.isChecked(), self).exec())
+        self.individual_summary_table = QTableWidget(0, 6)
+        self.individual_summary_table.setHorizontalHeaderLabels(["Candidato ID", "Nome", "Equipe Atual", "Score Ponderado", "Avaliações", "Presença (%)"])
+        ind_row = QHBoxLayout()
+        ind_row.addWidget(btn_ind_summary); ind_row.addWidget(btn_stability)
+        v.addLayout(ind_row)
         v.addWidget(self.individual_summary_table)
 
         # Carrega pesos atuais e avaliações
@@ -1733,15 +1681,16 @@ class MainWindow(QMainWindow):
         return w
 
     def load_weights_into_form(self):
-        conn = connect_db(); c = conn.cursor()
-        def get(name, default):
-            c.execute("SELECT weight FROM internal_weights WHERE name=?", (name,))
-            r = c.fetchone()
-            return str(r[0]) if r else str(default)
-        self.w_imm.setText(get('immersion', 0.3))
-        self.w_dev.setText(get('development', 0.5))
-        self.w_pres.setText(get('presentation', 0.2))
-        conn.close()
+        conn = connect_db()
+        try:
+            weights = internal_weights_repo.get_weights(conn, load_config()['default_weights'])
+            mode = normalization.get_mode(conn)
+        finally:
+            conn.close()
+        self.w_imm.setText(str(weights['immersion']))
+        self.w_dev.setText(str(weights['development']))
+        self.w_pres.setText(str(weights['presentation']))
+        self.chk_judge_norm.setChecked(mode == 'judge')
 
     def save_internal_weights(self):
         try:
@@ -1751,12 +1700,32 @@ class MainWindow(QMainWindow):
         except Exception:
             QMessageBox.warning(self, "Erro", "Pesos devem ser números (float)")
             return
-        conn = connect_db(); c = conn.cursor()
-        for name, w in [('immersion', wimm), ('development', wdev), ('presentation', wpres)]:
-            c.execute("INSERT INTO internal_weights(name,weight) VALUES(?,?) ON CONFLICT(name) DO UPDATE SET weight=excluded.weight", (name, w))
-        conn.commit(); conn.close()
+        mode = 'judge' if self.chk_judge_norm.isChecked() else 'none'
+        conn = connect_db()
+        try:
+            internal_weights_repo.save_weights(conn, {'immersion': wimm, 'development': wdev, 'presentation': wpres})
+            normalization.set_mode(conn, mode)
+            conn.commit()
+        finally:
+            conn.close()
         QMessageBox.information(self, "OK", "Pesos atualizados")
-        audit('save_internal_weights', f"immersion={wimm},development={wdev},presentation={wpres}")
+        audit('save_internal_weights', f"immersion={wimm},development={wdev},presentation={wpres},normalization={mode}")
+
+    def open_weight_simulator(self):
+        # parte dos pesos do formulário (mesmo ainda não salvos)
+        try:
+            current = {'immersion': float(self.w_imm.text()), 'development': float(self.w_dev.text()),
+                       'presentation': float(self.w_pres.text())}
+        except ValueError:
+            QMessageBox.warning(self, "Erro", "Pesos devem ser números (float)")
+            return
+        dlg = WeightSimulatorDialog(self.tasks, current, self.chk_penalty.isChecked(), self,
+                                    normalization_mode='judge' if self.chk_judge_norm.isChecked() else 'none')
+        if dlg.exec() == QDialog.Accepted and dlg.chosen_weights:
+            w = dlg.chosen_weights
+            self.w_imm.setText(str(w['immersion']))
+            self.w_dev.setText(str(w['development']))
+            self.w_pres.setText(str(w['presentation']))
 
     def change_process_status(self):
         import hashlib
@@ -1920,7 +1889,7 @@ class MainWindow(QMainWindow):
         conn.commit()
         conn.close()
         
-        audit(audit_action, audit_details)
+        audit(audit_action, audit_details, entity_type='evaluation', entity_id=eval_id)
         QMessageBox.information(self, "Sucesso", f"Avaliação {eval_id} foi {'desativada' if is_currently_active else 'reativada'}.")
         self.load_admin_evaluations()
 
@@ -1959,7 +1928,8 @@ class MainWindow(QMainWindow):
         conn.commit()
         conn.close()
 
-        audit('evaluation_logical_delete', f"evaluation_id={eval_id}, reason='{reason}'")
+        audit('evaluation_logical_delete', f"evaluation_id={eval_id}, reason='{reason}'",
+              entity_type='evaluation', entity_id=eval_id)
         QMessageBox.information(self, "Sucesso", f"Avaliação {eval_id} foi excluída logicamente.")
         self.load_admin_evaluations()
 
@@ -1987,30 +1957,39 @@ class MainWindow(QMainWindow):
 
     def backup_db(self):
         dst = Path(f"backup_selection_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
-        shutil.copy2(DB_PATH, dst)
-        QMessageBox.information(self, 'OK', f'Backup criado: {dst.name}')
-        audit('backup_db', str(dst))
+
+        def done(path):
+            QMessageBox.information(self, 'OK', f'Backup criado: {path.name}')
+            audit('backup_db', str(path))
+        # fila de gravação: a cópia não concorre com recálculos em andamento
+        self.tasks.run('backup_db', _backup_task, dst, title="Backup DB", writes=True, on_done=done)
+
+    def closeEvent(self, event):
+        # tarefas em andamento são canceladas (transações fazem rollback) antes do backup de saída
+        self.tasks.cancel_all()
+        self.tasks.wait_for_idle(5000)
+        super().closeEvent(event)
+
+    def open_audit_trail(self):
+        entity_id = None
+        if self.admin_evals_table.currentRow() >= 0:
+            item = self.admin_evals_table.item(self.admin_evals_table.currentRow(), 0)
+            entity_id = item.text() if item else None
+        dlg = AuditTrailDialog(self, entity_type='evaluation' if entity_id else None, entity_id=entity_id)
+        dlg.exec()
 
     def show_admin_evaluations(self):
         self.load_admin_evaluations()
 
     def calculate_hidden_scores(self):
         # Score oculto ponderado pelos pesos internos
-        conn = connect_db(); c = conn.cursor()
-        weights = {}
-        for name in ('immersion','development','presentation'):
-            c.execute("SELECT weight FROM internal_weights WHERE name=?", (name,))
-            r = c.fetchone(); weights[name] = float(r[0] if r else 1.0)
-        c.execute("SELECT id,immersion,development,presentation FROM evaluations WHERE is_active = 1")
-        rows = c.fetchall()
-        for eid, imm, dev, pres in rows:
-            imm = imm or 0; dev = dev or 0; pres = pres or 0
-            hs = imm*weights['immersion'] + dev*weights['development'] + pres*weights['presentation']
-            c.execute("UPDATE evaluations SET hidden_score=? WHERE id=?", (hs, eid))
-        conn.commit(); conn.close()
-        QMessageBox.information(self, "OK", "Scores ocultos recalculados para avaliações ativas.")
-        self.load_admin_evaluations()
-        audit('calculate_hidden_scores', 'recalculated using internal weights for active evaluations')
+        def done(_n):
+            QMessageBox.information(self, "OK", "Scores ocultos recalculados para avaliações ativas.")
+            self.load_admin_evaluations()
+            audit('calculate_hidden_scores', 'recalculated using internal weights for active evaluations',
+                  duration_ms=handle.elapsed_ms)
+        handle = self.tasks.run('hidden_scores', _hidden_scores_task, title="Calcular scores ocultos",
+                                writes=True, on_done=done)
 
     def _admin_eval_cell_dbl(self, row, col):
         # permitir editar hidden_score no duplo clique
@@ -2033,252 +2012,86 @@ class MainWindow(QMainWindow):
                     c = conn.cursor()
                     c.execute("UPDATE evaluations SET hidden_score=? WHERE id=?", (val, eval_id))
                     conn.commit(); conn.close()
-                    audit('manual_score_edit', f'eval_id={eval_id}, new_score={val}, reason="{reason}"')
+                    audit('manual_score_edit', f'eval_id={eval_id}, new_score={val}, reason="{reason}"',
+                          entity_type='evaluation', entity_id=eval_id)
                     self.load_admin_evaluations()
                 else:
                     QMessageBox.warning(self, "Cancelado", "Edição cancelada (motivo não fornecido).")
 
 
     def export_evaluations(self):
-        # Configuração do ranking
-        APPROVED_COUNT = 5
-        WAITLIST_COUNT = 5
-
-        conn = connect_db()
-        c = conn.cursor()
-
-        try:
-            # 1. Obter score base de cada avaliação (hidden_score)
-            c.execute("SELECT id, hidden_score FROM evaluations WHERE is_active = 1")
-            eval_scores = {eid: score for eid, score in c.fetchall()}
-            if not eval_scores:
-                QMessageBox.warning(self, "Exportar", "Nenhuma avaliação ativa encontrada para exportar.")
-                return
-
-            # 2. Obter contribuições individuais (pesos)
-            c.execute("SELECT evaluation_id, member_id, weight FROM member_contribution")
-            contributions = c.fetchall()
-
-            # 3. Calcular score ponderado total por membro
-            member_scores = {}
-            for eval_id, member_id, weight in contributions:
-                if member_id not in member_scores:
-                    member_scores[member_id] = {'total_score': 0.0, 'eval_count': 0}
-                
-                team_score = eval_scores.get(eval_id, 0.0)
-                member_scores[member_id]['total_score'] += team_score * (weight or 1.0)
-                member_scores[member_id]['eval_count'] += 1
-            
-            if not member_scores:
-                QMessageBox.warning(self, "Exportar", "Nenhuma contribuição individual encontrada para gerar o ranking.")
-                return
-
-            # 4. Obter dados dos candidatos (nome) e equipes
-            c.execute("SELECT id, name FROM candidates")
-            candidate_data = {cid: name for cid, name in c.fetchall()}
-            
-            # Subquery para pegar a equipe mais recente de um membro (ou uma qualquer)
-            c.execute("""
-                SELECT tm.candidate_id, t.name 
-                FROM team_members tm 
-                JOIN teams t ON tm.team_id = t.id
-                GROUP BY tm.candidate_id
-                HAVING tm.team_id = MAX(tm.team_id)
-            """)
-            member_teams = {cid: tname for cid, tname in c.fetchall()}
-
-        finally:
-            conn.close()
-
-        # 5. Montar lista final para exportação
-        summary_data = []
-        for mid, data in member_scores.items():
-            if data['eval_count'] > 0:
-                summary_data.append({
-                    'id': mid,
-                    'name': candidate_data.get(mid, f'Candidato ID {mid}'),
-                    'team': member_teams.get(mid, 'Sem equipe'),
-                    'final_score': data['total_score']
-                })
-        
-        # 6. Ordenar por score para gerar o ranking
-        summary_data.sort(key=lambda x: x['final_score'], reverse=True)
-
-        # 7. Escolher local para salvar
-        default_filename = f"ranking_interno_{datetime.now().strftime('%Y%m%d')}.csv"
-        fn, _ = QFileDialog.getSaveFileName(self, "Exportar Ranking Interno", default_filename, "CSV Files (*.csv)")
-
-        if not fn:
-            QMessageBox.information(self, "Exportar", "Exportação cancelada.")
-            return
-
-        # 8. Escrever o arquivo CSV
-        try:
-            import csv
-            with open(fn, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Cabeçalho
-                writer.writerow(['Posição no ranking', 'Nome do aluno', 'Equipe', 'Score final', 'Status final'])
-                
-                # Dados
-                for idx, item in enumerate(summary_data):
-                    rank = idx + 1
-                    status = ''
-                    if rank <= APPROVED_COUNT:
-                        status = 'Aprovado'
-                    elif rank <= APPROVED_COUNT + WAITLIST_COUNT:
-                        status = 'Lista de espera'
-                    else:
-                        status = 'Não aprovado'
-                    
-                    writer.writerow([
-                        rank,
-                        item['name'],
-                        item['team'],
-                        f"{item['final_score']:.3f}",
-                        status
-                    ])
-            
-            QMessageBox.information(self, "Sucesso", f"Ranking interno exportado para\n{fn}")
-            audit('export_ranking', f'file={Path(fn).name}, members={len(summary_data)}')
-        except Exception as e:
-            QMessageBox.critical(self, "Erro na Exportação", f"Não foi possível salvar o arquivo:\n{e}")
+        self._export_ranking_csv('ranking', "Exportar Ranking Interno", 'export_ranking',
+                                 "Ranking interno exportado para")
 
     def export_final_result(self):
-        APPROVED_COUNT = 5 # Definido no README como exemplo
-        WAITLIST_COUNT = 5 # Definido no README como exemplo
+        self._export_ranking_csv('final', "Gerar Resultado Final", 'export_final_result',
+                                 "Resultado final exportado para")
 
-        conn = connect_db()
-        c = conn.cursor()
-
-        try:
-            # 1. Obter score base de cada avaliação (hidden_score)
-            c.execute("SELECT id, hidden_score FROM evaluations WHERE is_active = 1")
-            eval_scores = {eid: score for eid, score in c.fetchall()}
-            if not eval_scores:
-                QMessageBox.warning(self, "Gerar Resultado Final", "Nenhuma avaliação ativa encontrada para calcular o resultado.")
-                return
-
-            # 2. Obter contribuições individuais (pesos)
-            c.execute("SELECT evaluation_id, member_id, weight FROM member_contribution")
-            contributions = c.fetchall()
+    def export_final_result_xlsx(self):
+        title = "Gerar Resultado Final (Excel)"
+        fn, _ = QFileDialog.getSaveFileName(self, title, default_filename('final', '.xlsx'), "Excel (*.xlsx)")
+        if not fn:
+            QMessageBox.information(self, title, "Exportação cancelada.")
+            return
+        internal = QMessageBox.question(
+            self, title, "Incluir a aba oculta do ranking interno (posição e score, só para a banca)?\n"
+            "Escolha 'Não' para o arquivo que será divulgado.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes
+
+        def on_error(e):
+            if isinstance(e, ExportError):
+                QMessageBox.warning(self, title, str(e))
+            elif isinstance(e, ImportError):
+                QMessageBox.warning(self, title, f"openpyxl não disponível: {e}")
+            else:
+                QMessageBox.critical(self, "Erro na Exportação", f"Não foi possível gerar o Excel:\n{e}")
+
+        def written(n):
+            note = ("\n\nO arquivo contém a aba oculta do ranking interno (banca); não o divulgue."
+                    if internal else "")
+            QMessageBox.information(self, "Sucesso", f"Resultado final exportado para\n{fn}{note}")
+            audit('export_final_result', f'file={Path(fn).name}, members={n}, internal={int(internal)}')
+
+        penalty = self.chk_penalty.isChecked()
+        self.tasks.run(('export_xlsx', fn), _write_xlsx_task, fn, penalty, internal, title=title,
+                       on_done=written, on_error=on_error)
+
+    def _export_ranking_csv(self, kind, title, action, done_text):
+        # 1) CSV em segundo plano (ou do cache, se nada mudou); 2) arquivo escolhido aqui;
+        # 3) gravação em segundo plano
+        def on_error(e):
+            if isinstance(e, ExportError):
+                QMessageBox.warning(self, title, str(e))
+            else:
+                QMessageBox.critical(self, "Erro na Exportação", f"Não foi possível gerar o ranking:\n{e}")
 
-            # 3. Calcular score ponderado total por membro
-            member_scores = {}
-            for eval_id, member_id, weight in contributions:
-                if member_id not in member_scores:
-                    member_scores[member_id] = {'total_score': 0.0, 'eval_count': 0}
-                
-                team_score = eval_scores.get(eval_id, 0.0)
-                member_scores[member_id]['total_score'] += team_score * (weight or 1.0)
-                member_scores[member_id]['eval_count'] += 1
-            
-            if not member_scores:
-                QMessageBox.warning(self, "Gerar Resultado Final", "Nenhuma contribuição individual encontrada para gerar o resultado final.")
+        def got_csv(result):
+            text, n, cached = result
+            fn, _ = QFileDialog.getSaveFileName(self, title, default_filename(kind), "CSV Files (*.csv)")
+            if not fn:
+                QMessageBox.information(self, title, "Exportação cancelada.")
                 return
+            self.tasks.run(('export_csv', fn), _write_text_task, text, fn, title=title,
+                           on_done=lambda _: written(fn, n, cached),
+                           on_error=lambda e: QMessageBox.critical(
+                               self, "Erro na Exportação", f"Não foi possível salvar o arquivo:\n{e}"))
 
-            # 4. Obter dados dos candidatos (nome) e equipes
-            c.execute("SELECT id, name FROM candidates")
-            candidate_data = {cid: name for cid, name in c.fetchall()}
-            
-            # Subquery para pegar a equipe mais recente de um membro (ou uma qualquer)
-            c.execute("""
-                SELECT tm.candidate_id, t.name 
-                FROM team_members tm 
-                JOIN teams t ON tm.team_id = t.id
-                GROUP BY tm.candidate_id
-                HAVING tm.team_id = MAX(tm.team_id)
-            """)
-            member_teams = {cid: tname for cid, tname in c.fetchall()}
-
-        finally:
-            conn.close()
-
-        # 5. Montar lista final para exportação
-        summary_data = []
-        for mid, data in member_scores.items():
-            if data['eval_count'] > 0:
-                summary_data.append({
-                    'id': mid,
-                    'name': candidate_data.get(mid, f'Candidato ID {mid}'),
-                    'team': member_teams.get(mid, 'Sem equipe'),
-                    'final_score': data['total_score']
-                })
-        
-        # 6. Ordenar por score para gerar o ranking interno e definir status
-        summary_data.sort(key=lambda x: x['final_score'], reverse=True)
-
-        # 7. Escolher local para salvar
-        default_filename = f"resultado_final_oficial_{datetime.now().strftime('%Y%m%d')}.csv"
-        fn, _ = QFileDialog.getSaveFileName(self, "Gerar Resultado Final", default_filename, "CSV Files (*.csv)")
+        def written(fn, n, cached):
+            QMessageBox.information(self, "Sucesso", f"{done_text}\n{fn}")
+            audit(action, f'file={Path(fn).name}, members={n}, cached={int(cached)}')
 
-        if not fn:
-            QMessageBox.information(self, "Gerar Resultado Final", "Geração de resultado final cancelada.")
-            return
-
-        # 8. Escrever o arquivo CSV
-        try:
-            import csv
-            with open(fn, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Cabeçalho
-                writer.writerow(['Nome do aluno', 'Equipe', 'Score final interno', 'Status final'])
-                
-                # Dados
-                for idx, item in enumerate(summary_data):
-                    rank = idx + 1
-                    status = ''
-                    if rank <= APPROVED_COUNT:
-                        status = 'Aprovado'
-                    elif rank <= APPROVED_COUNT + WAITLIST_COUNT:
-                        status = 'Lista de espera'
-                    else:
-                        status = 'Não aprovado'
-                    
-                    writer.writerow([
-                        item['name'],
-                        item['team'],
-                        f"{item['final_score']:.3f}",
-                        status
-                    ])
-            
-            QMessageBox.information(self, "Sucesso", f"Resultado final exportado para\n{fn}")
-            audit('export_final_result', f'file={Path(fn).name}, members={len(summary_data)}')
-        except Exception as e:
-            QMessageBox.critical(self, "Erro na Geração", f"Não foi possível salvar o arquivo:\n{e}")
+        penalty = self.chk_penalty.isChecked()
+        self.tasks.run(('export_render', kind, penalty), _render_csv_task, kind, penalty, title=title,
+                       on_done=got_csv, on_error=on_error)
 
 
     # Resumo por equipe (ranking interno com penalidade opcional)
     def recalc_team_summary(self):
-        conn = connect_db(); c = conn.cursor()
-        c.execute("""
-            SELECT t.id, t.name, COALESCE(AVG(e.hidden_score), 0.0) AS avg_hidden,
-                   COALESCE(AVG(e.immersion), 0.0) AS avg_immersion,
-                   COALESCE(AVG(e.presentation), 0.0) AS avg_presentation
-            FROM teams t
-            LEFT JOIN evaluations e ON e.team_id = t.id AND e.is_active = 1
-            GROUP BY t.id, t.name
-        """)
-        rows = c.fetchall()
-        c.execute("""
-            SELECT team_id, AVG(present) AS pres_ratio
-            FROM attendance
-            GROUP BY team_id
-        """)
-        pres_map = {tid: (ratio or 0.0) for tid, ratio in c.fetchall()}
-        conn.close()
-        apply_penalty = self.chk_penalty.isChecked()
-        out = []
-        for tid, tname, avg_hidden, avg_immersion, avg_presentation in rows:
-            pres_ratio = pres_map.get(tid, 0.0)
-            final = avg_hidden
-            if apply_penalty and pres_ratio < 0.75:
-                final *= 0.9
-            out.append((tid, tname, avg_hidden, pres_ratio*100.0, final, avg_immersion, avg_presentation))
-        # Sort by Score Final desc, then avg_immersion desc, then avg_presentation desc for tie-breaking
-        out.sort(key=lambda x: (-x[4], -x[5], -x[6]))
+        penalty = self.chk_penalty.isChecked()
+        self.tasks.run(('team_summary', penalty), _team_summary_task, penalty, title="Resumo por equipe",
+                       on_done=self._show_team_summary)
+
+    def _show_team_summary(self, out):
         self.summary_table.setRowCount(len(out))
         for r, (tid, tname, avg_h, pres_pct, final, avg_imm, avg_pres) in enumerate(out):
             self.summary_table.setItem(r, 0, QTableWidgetItem(str(tid)))
@@ -2290,58 +2103,25 @@ class MainWindow(QMainWindow):
             self.summary_table.setItem(r, 6, QTableWidgetItem(f"{avg_pres:.3f}"))
 
     def recalc_individual_summary(self):
-        conn = connect_db(); c = conn.cursor()
-        
-        # 1. Obter score de cada avaliação
-        c.execute("SELECT id, hidden_score FROM evaluations WHERE is_active = 1")
-        eval_scores = {eid: score for eid, score in c.fetchall()}
-
-        # 2. Obter contribuições individuais
-        c.execute("SELECT evaluation_id, member_id, weight FROM member_contribution")
-        contributions = c.fetchall()
-
-        # 3. Calcular score ponderado por membro
-        member_scores = {}
-        for eval_id, member_id, weight in contributions:
-            if member_id not in member_scores:
-                member_scores[member_id] = {'total_score': 0.0, 'eval_count': 0}
-            
-            team_score = eval_scores.get(eval_id, 0.0)
-            member_scores[member_id]['total_score'] += team_score * (weight or 1.0)
-            member_scores[member_id]['eval_count'] += 1
-
-        # 4. Obter dados dos candidatos (nome, equipe atual)
-        c.execute("SELECT id, name FROM candidates")
-        candidate_data = {cid: name for cid, name in c.fetchall()}
-        c.execute("SELECT tm.candidate_id, t.name FROM team_members tm JOIN teams t ON tm.team_id = t.id")
-        # Pega a primeira equipe que encontrar para cada membro, para simplificar
-        member_teams = {cid: tname for cid, tname in c.fetchall()}
-
-        conn.close()
-
-        # 5. Montar tabela de resultados
-        summary_data = []
-        for mid, data in member_scores.items():
-            summary_data.append({
-                'id': mid,
-                'name': candidate_data.get(mid, 'N/A'),
-                'team': member_teams.get(mid, 'Sem equipe'),
-                'score': data['total_score'],
-                'evals': data['eval_count']
-            })
-        
-        # Ordenar por score
-        summary_data.sort(key=lambda x: x['score'], reverse=True)
+        penalty = self.chk_penalty.isChecked()
+        handle = self.tasks.run(('individual_summary', penalty), _individual_summary_task, penalty,
+                                title="Resumo individual",
+                                on_done=lambda data: self._show_individual_summary(data, handle))
 
+    def _show_individual_summary(self, summary_data, handle):
+        t0 = time.perf_counter()
         self.individual_summary_table.setRowCount(len(summary_data))
         for r, item in enumerate(summary_data):
             self.individual_summary_table.setItem(r, 0, QTableWidgetItem(str(item['id'])))
-            self.individual_summary_table.setItem(r, 1, QTableWidgetItem(item['name']))
+            self.individual_summary_table.setItem(r, 1, QTableWidgetItem(item['name'] or 'N/A'))
             self.individual_summary_table.setItem(r, 2, QTableWidgetItem(item['team']))
             self.individual_summary_table.setItem(r, 3, QTableWidgetItem(f"{item['score']:.3f}"))
             self.individual_summary_table.setItem(r, 4, QTableWidgetItem(str(item['evals'])))
-        
-        audit('recalc_individual_summary', f'Calculated for {len(summary_data)} members')
+            pres = item['presence']
+            self.individual_summary_table.setItem(r, 5, QTableWidgetItem("-" if pres is None else f"{pres*100:.1f}"))
+
+        audit('recalc_individual_summary', f'Calculated for {len(summary_data)} members',
+              duration_ms=handle.elapsed_ms + (time.perf_counter() - t0) * 1000)
 
     def save_contributions(self):
         conn = connect_db()
@@ -2360,7 +2140,8 @@ class MainWindow(QMainWindow):
                 """, (self.evaluation_id, member_id, weight, note))
             conn.commit()
             QMessageBox.information(self, "Sucesso", "Contribuições individuais salvas/atualizadas.")
-            audit('member_contribution_save', f'evaluation_id={self.evaluation_id}, count={self.members_table.rowCount()}')
+            audit('member_contribution_save', f'evaluation_id={self.evaluation_id}, count={self.members_table.rowCount()}',
+                  entity_type='evaluation', entity_id=self.evaluation_id)
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Erro de Banco de Dados", f"Não foi possível salvar as contribuições: {e}")
@@ -2436,7 +2217,7 @@ class EditEvaluationDialog(QDialog):
             f"old_scores=({old_data[0]},{old_data[1]},{old_data[2]}), "
             f"new_scores=({new_imm},{new_dev},{new_pres})"
         )
-        audit('evaluation_edit', details)
+        audit('evaluation_edit', details, entity_type='evaluation', entity_id=self.evaluation_id)
 
         QMessageBox.information(self, "Sucesso", "Avaliação atualizada.")
         self.accept()
@@ -2551,7 +2332,7 @@ class CandidateDialog(QDialog):
         try:
             c.execute("DELETE FROM team_members WHERE team_id=? AND candidate_id=?", (team_id, self.cid))
             conn.commit()
-            audit('team_member_remove', f'team={team_id}, candidate={self.cid}')
+            audit('team_member_remove', f'team={team_id}, candidate={self.cid}', entity_type='team', entity_id=team_id)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Não foi possível remover: {e}")
         finally:
@@ -2575,7 +2356,7 @@ class CandidateDialog(QDialog):
         try:
             c.execute("INSERT INTO team_members (team_id, candidate_id) VALUES (?, ?)", (team_id, self.cid))
             conn.commit()
-            audit('team_member_add', f'team={team_id}, candidate={self.cid}')
+            audit('team_member_add', f'team={team_id}, candidate={self.cid}', entity_type='team', entity_id=team_id)
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Erro", "Este candidato já está na equipe.")
         except Exception as e:
@@ -2640,7 +2421,7 @@ class TeamEditDialog(QDialog):
         )
         conn.commit()
         conn.close()
-        audit('team_update', f'team_id={self.team_id}')
+        audit('team_update', f'team_id={self.team_id}', entity_type='team', entity_id=self.team_id)
         QMessageBox.information(self, "Sucesso", "Equipe atualizada.")
         self.accept()
 
@@ -2690,21 +2471,25 @@ class SessionEditDialog(QDialog):
             QMessageBox.warning(self, "Erro", "Data e horários são obrigatórios.")
             return
         try:
-            datetime.strptime(date, "%Y-%m-%d")
-            datetime.strptime(start, "%H:%M")
-            datetime.strptime(end, "%H:%M")
+            date, start, end = normalize_session(date, start, end)
         except ValueError:
             QMessageBox.warning(self, "Erro", "Formato inválido. Use YYYY-MM-DD e HH:MM.")
             return
         conn = connect_db()
         c = conn.cursor()
+        overlaps = find_overlaps(conn, [(date, start, end)], exclude_id=self.session_id)
+        if overlaps:
+            conn.close()
+            other = overlaps[0][1]
+            QMessageBox.warning(self, "Conflito de horários", f"Já existe sessão em {other[0]} das {other[1]} às {other[2]}.")
+            return
         c.execute(
             "UPDATE training_sessions SET date=?, start_time=?, end_time=? WHERE id=?",
             (date, start, end, self.session_id),
         )
         conn.commit()
         conn.close()
-        audit('session_update', f'session_id={self.session_id}')
+        audit('session_update', f'session_id={self.session_id}', entity_type='training_session', entity_id=self.session_id)
         QMessageBox.information(self, "Sucesso", "Sessão atualizada.")
         self.accept()
 
@@ -2771,13 +2556,18 @@ class AttendanceEditDialog(QDialog):
             return
         conn = connect_db()
         c = conn.cursor()
-        c.execute(
-            "UPDATE attendance SET training_session_id=?, team_id=?, present=?, notes=? WHERE id=?",
-            (sid, tid, present, notes, self.attendance_id),
-        )
-        conn.commit()
-        conn.close()
-        audit('attendance_update', f'attendance_id={self.attendance_id}')
+        try:
+            c.execute(
+                "UPDATE attendance SET training_session_id=?, team_id=?, present=?, notes=? WHERE id=?",
+                (sid, tid, present, notes, self.attendance_id),
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            QMessageBox.warning(self, "Erro", "Já existe presença desta equipe nesta sessão.")
+            return
+        finally:
+            conn.close()
+        audit('attendance_update', f'attendance_id={self.attendance_id}', entity_type='attendance', entity_id=self.attendance_id)
         QMessageBox.information(self, "Sucesso", "Presença atualizada.")
         self.accept()
 
@@ -2837,7 +2627,7 @@ class DiaryEntryEditDialog(QDialog):
         )
         conn.commit()
         conn.close()
-        audit('diary_entry_update', f'entry_id={self.entry_id}')
+        audit('diary_entry_update', f'entry_id={self.entry_id}', entity_type='diary_entry', entity_id=self.entry_id)
         QMessageBox.information(self, "Sucesso", "Entrada atualizada.")
         self.accept()
 
@@ -2881,11 +2671,40 @@ class AdvancedAutoAssignDialog(QDialog):
         self.num_teams_spinbox.setRange(1, 50)
         self.num_teams_spinbox.setValue(3)
         team_form.addRow("Número de equipes:", self.num_teams_spinbox)
+        self.capacity_spinbox = QSpinBox()
+        self.capacity_spinbox.setRange(0, 50)
+        self.capacity_spinbox.setValue(0)
+        self.capacity_spinbox.setSpecialValueText("Soma das cotas")
+        team_form.addRow("Máx. membros por equipe:", self.capacity_spinbox)
         layout.addLayout(team_form)
 
         # Section 3: Info
         layout.addWidget(QLabel("Exemplo: Se escolher 2 pessoas de Pesquisa, cada equipe terá 2 pessoas dessa área."))
 
+        # Section 4: Optimization mode
+        layout.addWidget(QLabel("3. Modo otimização (equilibra área, série, tamanho e competição):"))
+        opt_form = QFormLayout()
+        self.optimize_chk = QCheckBox("Usar modo otimização (cotas viram alvo por equipe)")
+        self.time_budget_spinbox = QDoubleSpinBox()
+        self.time_budget_spinbox.setRange(0.5, 120.0)
+        self.time_budget_spinbox.setValue(3.0)
+        self.time_budget_spinbox.setSuffix(" s")
+        self.restarts_spinbox = QSpinBox()
+        self.restarts_spinbox.setRange(1, 64)
+        self.restarts_spinbox.setValue(os.cpu_count() or 1)
+        opt_form.addRow(self.optimize_chk)
+        opt_form.addRow("Tempo por reinício:", self.time_budget_spinbox)
+        opt_form.addRow("Reinícios (em paralelo):", self.restarts_spinbox)
+        self.comp_capacity_spinboxes = {}
+        for comp in COMPETITIONS:
+            spinbox = QSpinBox()
+            spinbox.setRange(0, 50)
+            spinbox.setValue(0)
+            spinbox.setSpecialValueText("Máx. por equipe")
+            self.comp_capacity_spinboxes[comp] = spinbox
+            opt_form.addRow(f"Tamanho das equipes {comp}:", spinbox)
+        layout.addLayout(opt_form)
+
         layout.addStretch()
 
         # Buttons
@@ -2908,9 +2727,20 @@ class AdvancedAutoAssignDialog(QDialog):
             if qty > 0:
                 areas[area] = qty
 
+        team_capacity = self.capacity_spinbox.value() or None
+        competition_capacity = {comp: spinbox.value() or team_capacity
+                                for comp, spinbox in self.comp_capacity_spinboxes.items()}
+        if not all(competition_capacity.values()):
+            competition_capacity = None
+
         return {
             'areas': areas,
-            'num_teams': self.num_teams_spinbox.value()
+            'num_teams': self.num_teams_spinbox.value(),
+            'team_capacity': team_capacity,
+            'competition_capacity': competition_capacity,
+            'optimize': self.optimize_chk.isChecked(),
+            'time_budget': self.time_budget_spinbox.value(),
+            'restarts': self.restarts_spinbox.value()
         }
 
 class ImportPreviewDialog(QDialog):
@@ -3041,7 +2871,7 @@ class TeamMemberDialog(QDialog):
         try:
             c.execute("DELETE FROM team_members WHERE team_id=? AND candidate_id=?", (self.team_id, candidate_id))
             conn.commit()
-            audit('team_member_remove', f'team={self.team_id}, candidate={candidate_id}')
+            audit('team_member_remove', f'team={self.team_id}, candidate={candidate_id}', entity_type='team', entity_id=self.team_id)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Não foi possível remover: {e}")
         finally:
@@ -3060,7 +2890,7 @@ class TeamMemberDialog(QDialog):
         try:
             c.execute("INSERT INTO team_members (team_id, candidate_id) VALUES (?, ?)", (self.team_id, candidate_id))
             conn.commit()
-            audit('team_member_add', f'team={self.team_id}, candidate={candidate_id}')
+            audit('team_member_add', f'team={self.team_id}, candidate={candidate_id}', entity_type='team', entity_id=self.team_id)
         except sqlite3.IntegrityError:
             QMessageBox.warning(self, "Erro", "Este candidato já está na equipe.")
         except Exception as e:
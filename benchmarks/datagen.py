@@ -0,0 +1,138 @@
+"""Gerador de dados sintéticos para benchmarks.
+
+Preenche candidates, teams, team_members, training_sessions, attendance,
+evaluations e member_contribution com volume realista e semente fixa: a
+mesma semente e escala sempre geram o mesmo banco.
+
+    python benchmarks/datagen.py saida.db [--candidates 10000] [--seed 0]
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+
+AREAS = ["Mecânica", "Programação", "Eletrônica", "Gestão", "Marketing"]
+AREA_WEIGHTS = [3, 4, 2, 1, 1]
+COMPETITIONS = ["OBR", "TBR", "CCBB"]
+JUDGES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio"]
+FIRST_NAMES = ["Ana", "João", "Maria", "Pedro", "Lucas", "Julia", "Gabriel", "Beatriz", "Rafael", "Larissa",
+               "Mateus", "Camila", "Felipe", "Isabela", "Gustavo", "Mariana", "Thiago", "Letícia"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Almeida", "Ferreira",
+              "Rodrigues", "Gomes", "Martins", "Barbosa", "Ribeiro", "Carvalho", "Rocha"]
+SLOTS = [("07:00", "12:20"), ("13:30", "17:00")]
+
+TEAM_SIZE = 5
+SESSIONS = 20
+EVALS_PER_TEAM = 3
+UNASSIGNED_SHARE = 0.1
+ABSENCE_RATE = 0.15
+
+
+def candidate_rows(n, seed=0):
+    """[(nome, área)] determinísticos para n candidatos."""
+    rng = random.Random(seed)
+    return [(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i + 1}", rng.choices(AREAS, AREA_WEIGHTS)[0])
+            for i in range(n)]
+
+
+def write_candidates_csv(path, n, seed=0):
+    """Planilha de inscrição (Nome, Área) no formato aceito pela importação."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(["Nome", "Área"])
+        w.writerows(candidate_rows(n, seed))
+    return Path(path)
+
+
+def generate(conn, n_candidates, seed=0, sessions=SESSIONS, evals_per_team=EVALS_PER_TEAM):
+    """Preenche um banco já migrado (``init_db``) e devolve a contagem de linhas por tabela.
+
+    ~90% dos candidatos ficam em equipes de até ``TEAM_SIZE``; cada equipe tem
+    presença em todas as sessões e ``evals_per_team`` avaliações, com uma
+    contribuição individual por membro em cada avaliação.
+    """
+    rng = random.Random(seed)
+    c = conn.cursor()
+    c.execute("BEGIN")
+    c.executemany("INSERT INTO candidates (id, name, area) VALUES (?,?,?)",
+                  ((i + 1, name, area) for i, (name, area) in enumerate(candidate_rows(n_candidates, seed))))
+
+    assigned = int(n_candidates * (1 - UNASSIGNED_SHARE))
+    n_teams = max(1, -(-assigned // TEAM_SIZE))
+    c.executemany("INSERT INTO teams (id, name, competition, is_veteran) VALUES (?,?,?,?)",
+                  ((t + 1, f"Equipe {t + 1}", rng.choice(COMPETITIONS), int(rng.random() < 0.2))
+                   for t in range(n_teams)))
+    members = {}
+    for cid in range(1, assigned + 1):
+        members.setdefault((cid - 1) % n_teams + 1, []).append(cid)
+    c.executemany("INSERT INTO team_members (team_id, candidate_id) VALUES (?,?)",
+                  ((tid, cid) for tid, cids in members.items() for cid in cids))
+
+    start = date(2026, 3, 7)
+    session_rows = [(s + 1, (start + timedelta(weeks=s // len(SLOTS))).isoformat(), *SLOTS[s % len(SLOTS)])
+                    for s in range(sessions)]
+    c.executemany("INSERT INTO training_sessions (id, date, start_time, end_time) VALUES (?,?,?,?)", session_rows)
+    c.executemany("INSERT INTO attendance (training_session_id, team_id, present) VALUES (?,?,?)",
+                  ((sid, tid, int(rng.random() >= ABSENCE_RATE))
+                   for sid, *_ in session_rows for tid in range(1, n_teams + 1)))
+
+    evals = []
+    contributions = []
+    eid = 0
+    for tid in range(1, n_teams + 1):
+        for _ in range(evals_per_team):
+            eid += 1
+            evals.append((eid, tid, rng.choice(JUDGES), rng.randint(1, 10), rng.randint(1, 10), rng.randint(1, 10),
+                          rng.randint(1, sessions)))
+            contributions.extend((eid, cid, round(rng.uniform(0.5, 1.5), 2)) for cid in members.get(tid, ()))
+    c.executemany("INSERT INTO evaluations (id, team_id, judge, immersion, development, presentation, "
+                  "training_session_id) VALUES (?,?,?,?,?,?,?)", evals)
+    c.executemany("INSERT INTO member_contribution (evaluation_id, member_id, weight) VALUES (?,?,?)",
+                  contributions)
+    conn.commit()
+    return {
+        'candidates': n_candidates, 'teams': n_teams, 'team_members': assigned,
+        'training_sessions': sessions, 'attendance': sessions * n_teams,
+        'evaluations': len(evals), 'member_contribution': len(contributions),
+    }
+
+
+def build_database(path, n_candidates, seed=0, **kwargs):
+    """Cria ``path`` do zero (migrações + dados) e devolve a contagem de linhas."""
+    path = Path(path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    previous = db.DB_PATH
+    db.DB_PATH = path
+    try:
+        db.init_db()
+        conn = db.connect_db()
+        try:
+            return generate(conn, n_candidates, seed, **kwargs)
+        finally:
+            conn.close()
+    finally:
+        db.DB_PATH = previous
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("path")
+    ap.add_argument("--candidates", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--sessions", type=int, default=SESSIONS)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    counts = build_database(args.path, args.candidates, args.seed, sessions=args.sessions)
+    print(", ".join(f"{k}={v}" for k, v in counts.items()), f"({time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Benchmark ponta a ponta dos caminhos quentes do app, sem janela (offscreen).
+
+Para cada escala gera um banco sintético (``datagen``) e mede init_db (banco
+novo e já migrado), importação de planilha, load_candidates,
+calculate_hidden_scores, os dois resumos, as duas exportações e as consultas
+do dashboard. Cada etapa é medida pela MainWindow (com os diálogos modais
+respondidos automaticamente) e, com prefixo ``service.``, direto nos serviços
+sem Qt. Os arquivos vão para um diretório de trabalho temporário.
+
+    python benchmarks/e2e_bench.py [--scales 100,1000,10000,100000] [--repeat 3]
+                                   [--json out.json] [--baseline anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REGRESSION_THRESHOLD = 1.2
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def silence_dialogs(app_module, open_path, save_dir):
+    """Responde QMessageBox/QFileDialog/ImportPreviewDialog sem interação."""
+    from PySide6.QtWidgets import QDialog, QMessageBox
+
+    class _MessageBox:
+        Yes = QMessageBox.Yes
+        No = QMessageBox.No
+        Ok = QMessageBox.Ok
+
+        @staticmethod
+        def information(*args, **kwargs):
+            return QMessageBox.Ok
+
+        warning = critical = information
+
+        @staticmethod
+        def question(*args, **kwargs):
+            return QMessageBox.Yes
+
+    class _FileDialog:
+        @staticmethod
+        def getOpenFileName(*args, **kwargs):
+            return str(open_path), ""
+
+        @staticmethod
+        def getSaveFileName(parent, caption, default_name="", *args, **kwargs):
+            return str(Path(save_dir) / Path(default_name).name), ""
+
+    import ui.task_runner
+    app_module.QMessageBox = ui.task_runner.QMessageBox = _MessageBox
+    app_module.QFileDialog = _FileDialog
+    app_module.ImportPreviewDialog.exec = lambda self: QDialog.Accepted
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return {'min_ms': round(min(runs), 3), 'median_ms': round(statistics.median(runs), 3),
+            'runs_ms': [round(r, 3) for r in runs]}
+
+
+def with_conn(db_module, fn, *args):
+    def run():
+        conn = db_module.connect_db()
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.close()
+    return run
+
+
+def bench_scale(n, seed, repeat, workdir):
+    import db
+    import app
+    from benchmarks import datagen
+    from core import exports, importer, scoring
+    from ui import dashboard_repository
+
+    scale_dir = Path(workdir) / f"n{n}"
+    scale_dir.mkdir(parents=True, exist_ok=True)
+    db_path = scale_dir / "selection.db"
+    csv_path = datagen.write_candidates_csv(scale_dir / "inscricoes.csv", n, seed)
+    silence_dialogs(app, csv_path, scale_dir)
+
+    timings = {}
+    t0 = time.perf_counter()
+    counts = datagen.build_database(db_path, n, seed)
+    generate_ms = (time.perf_counter() - t0) * 1000
+    db.DB_PATH = db_path
+
+    fresh_path = scale_dir / "fresh.db"
+
+    def init_fresh():
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{fresh_path}{suffix}").unlink(missing_ok=True)
+        db.DB_PATH = fresh_path
+        try:
+            db.init_db()
+        finally:
+            db.DB_PATH = db_path
+
+    timings['init_db_fresh'] = timed(init_fresh, repeat)
+    timings['init_db_migrated'] = timed(db.init_db, repeat)
+
+    win = app.MainWindow()
+    timings['import_candidates_csv'] = timed(win.import_candidates_csv, repeat)
+    timings['load_candidates'] = timed(win.load_candidates, repeat)
+    # estas rodam em segundo plano (ui/task_runner.py): mede até o resultado chegar
+    for name in ('calculate_hidden_scores', 'recalc_team_summary', 'recalc_individual_summary',
+                 'export_evaluations', 'export_final_result'):
+        step = getattr(win, name)
+        timings[name] = timed(lambda: (step(), win.tasks.wait_for_idle()), repeat)
+    for name in ('get_dashboard_cards', 'get_stage_averages', 'get_presence_vs_score', 'get_team_averages'):
+        timings[f'dashboard.{name}'] = timed(getattr(dashboard_repository, name), repeat)
+    win.close()
+    win.deleteLater()
+
+    # mesmas etapas direto nos serviços, sem Qt
+    _headers, sheet_rows = importer.read_sheet(csv_path)
+    timings['service.read_sheet'] = timed(lambda: importer.read_sheet(csv_path), repeat)
+    timings['service.recalc_hidden_scores'] = timed(with_conn(db, scoring.recalc_hidden_scores), repeat)
+    timings['service.team_summary'] = timed(with_conn(db, scoring.team_summary, True), repeat)
+    timings['service.individual_summary'] = timed(with_conn(db, scoring.individual_summary, True), repeat)
+    for kind in exports.EXPORTS:
+        timings[f'service.export_{kind}'] = timed(
+            with_conn(db, exports.export_csv, kind, scale_dir / f"service_{kind}.csv", True), repeat)
+    # por último: a importação da planilha inteira multiplica o nº de candidatos
+    timings['service.import_candidates'] = timed(
+        with_conn(db, importer.import_candidates, sheet_rows, 0, 1, None), repeat)
+    return {'candidates': n, 'rows': counts, 'generate_ms': round(generate_ms, 3), 'timings': timings}
+
+
+def compare(results, baseline_path):
+    """Imprime as etapas mais lentas que o baseline além do limite."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+    base = {(r['candidates'], step): t['median_ms'] for r in baseline['results'] for step, t in r['timings'].items()}
+    regressions = 0
+    for r in results:
+        for step, t in r['timings'].items():
+            before = base.get((r['candidates'], step))
+            if before and t['median_ms'] > before * REGRESSION_THRESHOLD:
+                regressions += 1
+                print(f"REGRESSÃO n={r['candidates']} {step}: {before:.1f} -> {t['median_ms']:.1f} ms "
+                      f"({t['median_ms'] / before:.2f}x)")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", default="100,1000,10000,100000")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--workdir", default=None, help="diretório dos bancos/arquivos (padrão: temporário)")
+    ap.add_argument("--json", default=None)
+    ap.add_argument("--baseline", default=None, help="JSON anterior para apontar regressões")
+    args = ap.parse_args()
+    json_path = Path(args.json).resolve() if args.json else None
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="selection_bench_")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    # anexos, auditoria e log de consultas lentas usam caminhos relativos
+    os.chdir(workdir)
+
+    from PySide6.QtWidgets import QApplication
+    from core.query_profiler import PROFILING_ENABLED
+    qapp = QApplication.instance() or QApplication([])  # noqa: F841
+
+    results = []
+    for n in (int(s) for s in args.scales.split(",")):
+        r = bench_scale(n, args.seed, args.repeat, workdir)
+        results.append(r)
+        print(f"n={n}")
+        for step, t in r['timings'].items():
+            print(f"  {step:<36} {t['median_ms']:>10.1f} ms")
+
+    out = {
+        'meta': {
+            'benchmark': 'e2e', 'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(), 'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(), 'seed': args.seed, 'repeat': args.repeat,
+            'query_profiling': PROFILING_ENABLED,
+        },
+        'results': results,
+    }
+    if json_path:
+        json_path.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding='utf-8')
+    if baseline_path and compare(results, baseline_path):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Latência da interface sem display (QT_QPA_PLATFORM=offscreen).
+
+Para cada escala gera um banco sintético (``datagen``), constrói a MainWindow
+e mede, por página, o tempo de construção, a troca de página (com eventos de
+pintura processados) e o pico de memória Python (tracemalloc) da construção;
+depois mede os refreshes (load_candidates, load_teams, load_admin_evaluations,
+Dashboard.update_data) e a abertura dos diálogos mais usados.
+
+tracemalloc só enxerga alocações feitas pelo Python; a memória dos widgets Qt
+aparece apenas no pico de RSS do processo, registrado por escala. Tempo e
+memória são medidos em passadas separadas para o rastreamento não distorcer
+os tempos.
+
+    python benchmarks/ui_bench.py [--scales 100,1000,10000] [--repeat 3] [--json out.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.e2e_bench import compare, git_commit, silence_dialogs, timed  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PAGES = [
+    ('registrations', 'page_registrations'), ('teams', 'page_teams'), ('sessions', 'page_sessions'),
+    ('attendance', 'page_attendance'), ('evaluations', 'page_evaluations'), ('diary', 'page_diary'),
+    ('about', 'page_about'), ('dashboard', 'page_dashboard'), ('admin', 'page_admin'),
+]
+DASHBOARD_INDEX = 7
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def traced_peak(fn):
+    """Pico de memória Python (MB) durante uma execução de ``fn``."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 3)
+
+
+def measure(fn, repeat, cleanup=None):
+    """Tempos de ``repeat`` execuções + pico de memória de uma execução extra."""
+    def run():
+        out = fn()
+        if cleanup:
+            cleanup(out)
+    result = timed(run, repeat)
+    result['peak_mb'] = traced_peak(run)
+    return result
+
+
+def bench_scale(n, seed, repeat, workdir, qapp):
+    import db
+    import app
+    from benchmarks import datagen
+
+    scale_dir = Path(workdir) / f"ui_n{n}"
+    scale_dir.mkdir(parents=True, exist_ok=True)
+    db_path = scale_dir / "selection.db"
+    counts = datagen.build_database(db_path, n, seed)
+    db.DB_PATH = db_path
+    silence_dialogs(app, scale_dir / "inscricoes.csv", scale_dir)
+
+    def discard(widget):
+        widget.deleteLater()
+        qapp.processEvents()
+
+    def close_window(win):
+        win.close()
+        discard(win)
+
+    main_window = {'construction': measure(app.MainWindow, repeat, cleanup=close_window)}
+    t0 = time.perf_counter()
+    win = app.MainWindow()
+    win.show()
+    qapp.processEvents()
+    main_window['first_show_ms'] = round((time.perf_counter() - t0) * 1000, 3)
+
+    pages = {}
+    for index, (name, method) in enumerate(PAGES):
+        # reconstruir a página rebinda os atributos da janela; a página antiga continua no stack
+        pages[name] = {'construction': measure(getattr(win, method), repeat, cleanup=discard)}
+
+        def switch(i=index):
+            win.stack.setCurrentIndex(0 if i else 1)
+            qapp.processEvents()
+            t = time.perf_counter()
+            win.stack.setCurrentIndex(i)
+            qapp.processEvents()
+            return (time.perf_counter() - t) * 1000
+        runs = [switch() for _ in range(repeat)]
+        pages[name]['switch_ms'] = round(min(runs), 3)
+
+    dashboard = win.stack.widget(DASHBOARD_INDEX)
+    refresh = {
+        'load_candidates': measure(win.load_candidates, repeat),
+        'load_teams': measure(win.load_teams, repeat),
+        'load_admin_evaluations': measure(win.load_admin_evaluations, repeat),
+        'Dashboard.update_data': measure(dashboard.update_data, repeat),
+    }
+
+    dialogs = {
+        'CandidateDialog': measure(lambda: app.CandidateDialog(1, parent=win), repeat, cleanup=discard),
+        'TeamMemberDialog': measure(lambda: app.TeamMemberDialog(1, parent=win), repeat, cleanup=discard),
+        'EditEvaluationDialog': measure(lambda: app.EditEvaluationDialog(1, parent=win), repeat, cleanup=discard),
+        'AttendanceGridDialog': measure(lambda: app.AttendanceGridDialog(1, parent=win), repeat, cleanup=discard),
+        'AdvancedAutoAssignDialog': measure(lambda: app.AdvancedAutoAssignDialog(parent=win), repeat,
+                                            cleanup=discard),
+    }
+    close_window(win)
+    return {'candidates': n, 'rows': counts, 'main_window': main_window, 'pages': pages,
+            'refresh': refresh, 'dialogs': dialogs, 'peak_rss_mb': peak_rss_mb()}
+
+
+def flat_timings(r):
+    """{etapa: tempos} no formato do e2e_bench, para o --baseline."""
+    out = {'MainWindow': r['main_window']['construction']}
+    out.update((f"page.{k}", v['construction']) for k, v in r['pages'].items())
+    out.update((f"refresh.{k}", v) for k, v in r['refresh'].items())
+    out.update((f"dialog.{k}", v) for k, v in r['dialogs'].items())
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", default="100,1000,10000")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--workdir", default=None, help="diretório dos bancos (padrão: temporário)")
+    ap.add_argument("--no-theme", action="store_true", help="não aplicar theme.qss")
+    ap.add_argument("--json", default=None)
+    ap.add_argument("--baseline", default=None, help="JSON anterior para apontar regressões")
+    args = ap.parse_args()
+    json_path = Path(args.json).resolve() if args.json else None
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="selection_ui_bench_")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+
+    from PySide6.QtWidgets import QApplication
+    qapp = QApplication.instance() or QApplication([])
+    if not args.no_theme:
+        qapp.setStyleSheet((ROOT / "theme.qss").read_text(encoding="utf-8"))
+
+    results = []
+    for n in (int(s) for s in args.scales.split(",")):
+        r = bench_scale(n, args.seed, args.repeat, workdir, qapp)
+        r['timings'] = flat_timings(r)
+        results.append(r)
+        print(f"n={n}  (pico RSS {r['peak_rss_mb']} MB)")
+        for step, t in r['timings'].items():
+            print(f"  {step:<34} {t['median_ms']:>10.1f} ms  {t['peak_mb']:>8.2f} MB")
+
+    out = {
+        'meta': {
+            'benchmark': 'ui', 'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(), 'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(), 'qpa': os.environ.get("QT_QPA_PLATFORM"),
+            'theme': not args.no_theme, 'seed': args.seed, 'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if json_path:
+        json_path.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding='utf-8')
+    if baseline_path and compare(results, baseline_path):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Linha de comando para o processamento em lote, sem interface gráfica.
+
+Usa o mesmo banco do app (SELECTION_DB_PATH) e os mesmos serviços de core/;
+não importa PySide6.
+
+    python cli.py import inscricoes.xlsx [--name-col Nome] [--area-col Área] [--limit N]
+    python cli.py recalc
+    python cli.py summary {teams,individual} [--penalty] [-o arquivo.csv]
+    python cli.py export {ranking,final,xlsx} [--penalty] [--internal] [-o arquivo]
+    python cli.py stability {judge,session} [--reps N] [--seed S] [--penalty] [-o arquivo.csv]
+
+Sem ``-o`` (ou com ``-o -``) o CSV sai na saída padrão; mensagens vão para a
+saída de erro. ``export xlsx`` gera o Excel final com o resultado comunicável;
+com ``--internal`` o ranking interno vai junto numa aba oculta (só banca).
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from core.audit import get_audit_logger
+from db import connect_db, init_db
+
+TEAM_SUMMARY_HEADER = ["Equipe ID", "Nome", "AVG hidden", "Presença (%)", "Score Final", "AVG Imersão",
+                       "AVG Apresentação"]
+INDIVIDUAL_SUMMARY_HEADER = ["Candidato ID", "Nome", "Equipe Atual", "Score Ponderado", "Avaliações",
+                             "Presença (%)"]
+STABILITY_HEADER = ["Candidato ID", "Nome", "Equipe", "Faixa atual", "% Aprovado", "% Lista de espera",
+                    "% Não aprovado", "Posição média"]
+NAME_HEADERS = ('nome', 'name', 'nome completo')
+AREA_HEADERS = ('área', 'area')
+
+
+def _info(msg):
+    print(msg, file=sys.stderr)
+
+
+def _audit(action, details, **fields):
+    get_audit_logger().log(action, details, source='cli', **fields)
+
+
+def _output(path):
+    """Arquivo de saída (CSV, UTF-8) ou a saída padrão para ``None``/``-``."""
+    if path in (None, '-'):
+        return nullcontext(sys.stdout)
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def _positive_int(text):
+    """Tipo do argparse para inteiros >= 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"inteiro inválido: {text!r}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"deve ser ao menos 1 (recebido {value})")
+    return value
+
+
+def _column(headers, spec, known, fallback):
+    """Índice da coluna: número (1 = primeira), nome do cabeçalho ou o primeiro conhecido."""
+    lowered = [h.strip().lower() for h in headers]
+    if spec is None:
+        for name in known:
+            if name in lowered:
+                return lowered.index(name)
+        return fallback
+    if spec.isdigit():
+        return int(spec) - 1
+    try:
+        return lowered.index(spec.strip().lower())
+    except ValueError:
+        raise SystemExit(f"coluna '{spec}' não encontrada; cabeçalhos: {', '.join(headers) or '(nenhum)'}")
+
+
+def cmd_import(args, conn):
+    from core.importer import import_candidates, read_sheet
+    from core.repositories import settings
+
+    if settings.get_value(conn, 'process_status', 'ABERTO') == 'ENCERRADO':
+        raise SystemExit("processo seletivo ENCERRADO: inscrições bloqueadas")
+    headers, rows = read_sheet(args.file)
+    idx_name = _column(headers, args.name_col, NAME_HEADERS, 0)
+    idx_area = _column(headers, args.area_col, AREA_HEADERS, 1)
+    inserted, skipped = import_candidates(conn, rows, idx_name, idx_area, limit=args.limit)
+    _info(f"{inserted} inseridos, {skipped} ignorados")
+    _audit('import_csv' if Path(args.file).suffix.lower() == '.csv' else 'import_xlsx',
+           f'file={Path(args.file).name}, inserted={inserted}, skipped={skipped}')
+
+
+def cmd_recalc(args, conn):
+    from core.scoring import recalc_hidden_scores
+
+    t0 = time.perf_counter()
+    n = recalc_hidden_scores(conn)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    _info(f"scores ocultos recalculados: {n} avaliações ativas")
+    _audit('calculate_hidden_scores', 'recalculated using internal weights for active evaluations',
+           duration_ms=elapsed_ms)
+
+
+def cmd_summary(args, conn):
+    from core.scoring import individual_summary, team_summary
+
+    with _output(args.output) as f:
+        w = csv.writer(f)
+        if args.kind == 'teams':
+            rows = team_summary(conn, args.penalty)
+            w.writerow(TEAM_SUMMARY_HEADER)
+            w.writerows([tid, name, f"{avg_h:.3f}", f"{pres:.1f}", f"{final:.3f}", f"{imm:.3f}", f"{apr:.3f}"]
+                         for tid, name, avg_h, pres, final, imm, apr in rows)
+        else:
+            rows = individual_summary(conn, args.penalty)
+            w.writerow(INDIVIDUAL_SUMMARY_HEADER)
+            w.writerows([r['id'], r['name'] or 'N/A', r['team'], f"{r['score']:.3f}", r['evals'],
+                         "-" if r['presence'] is None else f"{r['presence'] * 100:.1f}"] for r in rows)
+    _info(f"{len(rows)} linhas")
+
+
+def cmd_export(args, conn):
+    from core.exports import ExportError, default_filename, ranking_rows, write_csv, write_xlsx
+
+    output = args.output
+    if output is not None and output != '-' and Path(output).is_dir():
+        output = (Path(output) / default_filename('final', '.xlsx') if args.kind == 'xlsx'
+                  else Path(output) / default_filename(args.kind))
+    target = 'stdout' if output in (None, '-') else Path(output).name
+    try:
+        if args.kind == 'xlsx':
+            n = write_xlsx(conn, sys.stdout.buffer if output in (None, '-') else output, args.penalty,
+                           internal=args.internal)
+        else:
+            rows = ranking_rows(conn, args.penalty)
+            with _output(output) as f:
+                n = write_csv(rows, f, args.kind)
+    except ExportError as e:
+        raise SystemExit(str(e))
+    _info(f"{n} membros exportados para {target}")
+    _audit('export_ranking' if args.kind == 'ranking' else 'export_final_result',
+           f'file={target}, members={n}')
+
+
+def cmd_stability(args, conn):
+    from core.ranking_stability import bootstrap, load_problem
+    from core.policy import BANDS
+
+    problem = load_problem(conn, args.kind, args.penalty)
+    t0 = time.perf_counter()
+    result = bootstrap(problem, args.reps, seed=args.seed)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    order = sorted(range(len(problem['ids'])), key=lambda i: result['mean_rank'][i])
+    with _output(args.output) as f:
+        w = csv.writer(f)
+        w.writerow(STABILITY_HEADER)
+        for i in order:
+            w.writerow([problem['ids'][i], problem['names'][i], problem['teams'][i], BANDS[result['observed'][i]]]
+                       + [f"{x * 100:.1f}" for x in result['freq'][i]] + [f"{result['mean_rank'][i]:.1f}"])
+    _info(f"{result['reps']} réplicas, {len(problem['groups'])} grupos, {elapsed_ms / 1000:.1f}s")
+    _audit('ranking_stability', f"by={args.kind}, reps={result['reps']}, seed={args.seed}", duration_ms=elapsed_ms)
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="cli.py", description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="importar candidatos de CSV/XLSX")
+    p.add_argument("file")
+    p.add_argument("--name-col", help="coluna do nome (cabeçalho ou número, 1 = primeira)")
+    p.add_argument("--area-col", help="coluna da área (cabeçalho ou número, 1 = primeira)")
+    p.add_argument("--limit", type=int, default=None, help="importar só as primeiras N linhas")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("recalc", help="recalcular os scores ocultos das avaliações ativas")
+    p.set_defaults(func=cmd_recalc)
+
+    for name, kinds, func, help_text in (
+        ("summary", ('teams', 'individual'), cmd_summary, "resumo por equipe ou individual"),
+        ("export", ('ranking', 'final', 'xlsx'), cmd_export, "ranking interno ou resultado final (CSV ou Excel)"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("kind", choices=kinds)
+        p.add_argument("--penalty", action="store_true", help="aplicar a penalidade por presença")
+        p.add_argument("-o", "--output", help="arquivo ou diretório de saída (padrão: saída padrão)")
+        if name == "export":
+            p.add_argument("--internal", action="store_true",
+                           help="xlsx: incluir a aba oculta do ranking interno (só banca)")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("stability", help="bootstrap do ranking reamostrando bancas ou sessões")
+    p.add_argument("kind", choices=('judge', 'session'))
+    p.add_argument("--reps", type=_positive_int, default=2000, help="número de réplicas (padrão: 2000)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--penalty", action="store_true", help="aplicar a penalidade por presença")
+    p.add_argument("-o", "--output", help="arquivo de saída (padrão: saída padrão)")
+    p.set_defaults(func=cmd_stability)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    init_db()
+    conn = connect_db()
+    try:
+        args.func(args, conn)
+    except BrokenPipeError:
+        # saída ligada a um comando que fechou o pipe (ex.: head)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        conn.close()
+        get_audit_logger().flush()
+
+
+if __name__ == "__main__":
+    main()
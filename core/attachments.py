@@ -0,0 +1,254 @@
+"""Armazenamento de anexos endereçado por conteúdo (SHA-256).
+
+Cada conteúdo distinto é gravado uma única vez em ``attachments/sha256/ab/<hash>``.
+A tabela ``attachment_blobs`` guarda o contador de referências, mantido por
+triggers sobre ``attachments``; blobs sem referência são removidos por
+``collect_garbage``.
+"""
+import hashlib
+import mimetypes
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+ATTACH_DIR = Path("attachments")
+BLOB_DIR = ATTACH_DIR / "sha256"
+TMP_DIR = ATTACH_DIR / "tmp"
+THUMB_DIR = ATTACH_DIR / "thumbs"  # miniaturas <hash>_<tamanho>.png (ui/attachment_previews.py)
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_path(content_hash: str) -> Path:
+    return BLOB_DIR / content_hash[:2] / content_hash
+
+
+# (deslocamento, assinatura, mime) — cobre o que costuma ir para o diário
+_MAGIC = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x1aE\xdf\xa3", "video/webm"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"ID3", "audio/mpeg"),
+]
+
+
+def guess_mime_type(name) -> str:
+    return mimetypes.guess_type(str(name))[0] or "application/octet-stream"
+
+
+def sniff_mime_type(path) -> str:
+    """Detecta o tipo pelos primeiros bytes; cai para a extensão quando ambíguo."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+    except OSError:
+        return guess_mime_type(path)
+    for offset, magic, mime in _MAGIC:
+        if head[offset:offset + len(magic)] == magic:
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "audio/wav"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in (b"heic", b"heix", b"mif1"):
+            return "image/heic"
+        if brand.startswith(b"qt"):
+            return "video/quicktime"
+        return "video/mp4"
+    # zip (docx/xlsx/pptx) e texto: a extensão diz mais que a assinatura
+    return guess_mime_type(path)
+
+
+def hash_file(src) -> tuple:
+    """Retorna (sha256 hex, tamanho) lendo o arquivo em blocos."""
+    h = hashlib.sha256()
+    size = 0
+    with open(src, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size
+
+
+def _copy_hashing(src, dst) -> tuple:
+    """Copia src -> dst calculando o SHA-256 na mesma passada."""
+    h = hashlib.sha256()
+    size = 0
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        while chunk := fin.read(CHUNK_SIZE):
+            h.update(chunk)
+            fout.write(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size
+
+
+def store_blob(src, known_sizes=None) -> tuple:
+    """Grava o conteúdo de ``src`` no repositório, se ainda não existir.
+
+    Se nenhum blob tiver o mesmo tamanho o arquivo é novo com certeza, então
+    copia e calcula o hash numa única leitura. Caso contrário calcula o hash
+    antes e só copia se o conteúdo for inédito.
+    Retorna (hash, caminho, tamanho).
+    """
+    src = Path(src)
+    size = src.stat().st_size
+    if known_sizes is not None and size in known_sizes:
+        content_hash, size = hash_file(src)
+        dst = blob_path(content_hash)
+        if dst.exists():
+            return content_hash, dst, size
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = TMP_DIR / uuid.uuid4().hex
+    try:
+        content_hash, size = _copy_hashing(src, tmp)
+        dst = blob_path(content_hash)
+        if dst.exists():
+            tmp.unlink()
+        else:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return content_hash, dst, size
+
+
+def blob_sizes(conn) -> set:
+    return {r[0] for r in conn.execute("SELECT DISTINCT size_bytes FROM attachment_blobs")}
+
+
+def register_blob(conn, content_hash, path, size, mime_type):
+    conn.execute("""
+        INSERT OR IGNORE INTO attachment_blobs (hash, file_path, size_bytes, mime_type, ref_count)
+        VALUES (?,?,?,?,0)
+    """, (content_hash, str(path), size, mime_type))
+
+
+def add_attachment(conn, entry_id, src, mime_type=None) -> int:
+    """Armazena o arquivo e cria a linha em attachments (sem commit)."""
+    src = Path(src)
+    mime_type = mime_type or sniff_mime_type(src)
+    content_hash, dst, size = store_blob(src, blob_sizes(conn))
+    register_blob(conn, content_hash, dst, size, mime_type)
+    cur = conn.execute("""
+        INSERT INTO attachments (diary_entry_id, file_path, original_name, mime_type, content_hash, size_bytes)
+        VALUES (?,?,?,?,?,?)
+    """, (entry_id, str(dst), src.name, mime_type, content_hash, size))
+    return cur.lastrowid
+
+
+def import_folder(conn, entry_id, folder, recursive=False, max_workers=None, progress=None) -> dict:
+    """Importa todos os arquivos de uma pasta para uma entrada do diário.
+
+    Hash e cópia rodam em paralelo (hashlib e I/O liberam o GIL); as linhas
+    são inseridas numa única transação no final. ``progress(feitos, total)``
+    é chamado na thread de quem chamou; se retornar False a importação é
+    cancelada sem criar nenhum anexo.
+    """
+    folder = Path(folder)
+    pattern = "**/*" if recursive else "*"
+    files = sorted(p for p in folder.glob(pattern)
+                   if p.is_file() and not p.name.startswith('.'))
+    total = len(files)
+    result = {"total": total, "imported": 0, "failed": [], "cancelled": False}
+    if not files:
+        return result
+    known_sizes = blob_sizes(conn)
+
+    def work(path):
+        mime = sniff_mime_type(path)
+        content_hash, dst, size = store_blob(path, known_sizes)
+        return path, content_hash, dst, size, mime
+
+    workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work, p) for p in files]
+        for done, fut in enumerate(as_completed(futures), 1):
+            if progress is not None and progress(done, total) is False:
+                result["cancelled"] = True
+                for f in futures:
+                    f.cancel()
+                break
+    stored = []
+    for fut in futures:
+        if fut.cancelled():
+            continue
+        try:
+            stored.append(fut.result())
+        except OSError as e:
+            result["failed"].append(str(e))
+
+    try:
+        conn.executemany("""
+            INSERT OR IGNORE INTO attachment_blobs (hash, file_path, size_bytes, mime_type, ref_count)
+            VALUES (?,?,?,?,0)
+        """, [(h, str(dst), size, mime) for _p, h, dst, size, mime in stored])
+        if result["cancelled"]:
+            # blobs já copiados ficam sem referência e saem no próximo collect_garbage
+            conn.commit()
+            return result
+        conn.executemany("""
+            INSERT INTO attachments (diary_entry_id, file_path, original_name, mime_type, content_hash, size_bytes)
+            VALUES (?,?,?,?,?,?)
+        """, [(entry_id, str(dst), p.name, mime, h, size) for p, h, dst, size, mime in stored])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    result["imported"] = len(stored)
+    return result
+
+
+def delete_attachments(conn, attachment_ids=None, entry_id=None) -> list:
+    """Remove linhas de attachments (sem commit).
+
+    Blobs endereçados por conteúdo são liberados pelo contador de referências;
+    retorna os caminhos de anexos antigos (sem hash) para remoção direta.
+    """
+    if entry_id is not None:
+        where, params = "diary_entry_id=?", (entry_id,)
+    else:
+        ids = list(attachment_ids or [])
+        if not ids:
+            return []
+        where, params = f"id IN ({','.join('?' * len(ids))})", tuple(ids)
+    legacy = [r[0] for r in conn.execute(
+        f"SELECT file_path FROM attachments WHERE {where} AND content_hash IS NULL", params)]
+    conn.execute(f"DELETE FROM attachments WHERE {where}", params)
+    return legacy
+
+
+def collect_garbage(conn) -> int:
+    """Apaga blobs sem referências e as miniaturas deles. Faz commit antes de remover os arquivos."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        orphans = conn.execute(
+            "SELECT hash, file_path FROM attachment_blobs WHERE ref_count <= 0").fetchall()
+        conn.executemany("DELETE FROM attachment_blobs WHERE hash=? AND ref_count <= 0",
+                         [(h,) for h, _ in orphans])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    for content_hash, path in orphans:
+        Path(path).unlink(missing_ok=True)
+        for thumb in THUMB_DIR.glob(f"{content_hash}_*"):
+            thumb.unlink(missing_ok=True)
+    return len(orphans)
+
+
+def unlink_paths(paths):
+    for path in paths:
+        try:
+            Path(path).unlink(missing_ok=True)
+        except Exception:
+            pass
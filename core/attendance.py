@@ -0,0 +1,147 @@
+"""Chamada por sessão de treino: leitura da grade e gravação em lote.
+
+A presença individual fica em ``candidate_attendance`` (uma linha por sessão e
+candidato, indexada para consultas) e, de forma compacta, em
+``candidate_presence``: dois bitsets por candidato em que o bit ``id da
+sessão`` marca se houve registro (``recorded``) e se esteve presente
+(``attended``). As taxas de presença de todos os candidatos saem de uma única
+passada vetorizada sobre esses bitsets.
+"""
+import numpy as np
+
+
+def load_session_attendance(conn, session_id):
+    """Todas as equipes com a presença já registrada na sessão (ou None).
+
+    Retorna [(team_id, nome, presente|None, notas)] ordenado por nome.
+    """
+    return conn.execute("""
+        SELECT t.id, t.name, a.present, COALESCE(a.notes, '')
+        FROM teams t
+        LEFT JOIN attendance a ON a.team_id = t.id AND a.training_session_id = ?
+        ORDER BY t.name COLLATE NOCASE, t.id
+    """, (session_id,)).fetchall()
+
+
+def save_session_attendance(conn, session_id, rows):
+    """Grava [(team_id, presente, notas)] numa única transação (upsert)."""
+    rows = list(rows)
+    try:
+        conn.executemany("""
+            INSERT INTO attendance (training_session_id, team_id, present, notes)
+            VALUES (?,?,?,?)
+            ON CONFLICT(training_session_id, team_id)
+            DO UPDATE SET present = excluded.present, notes = excluded.notes
+        """, [(session_id, tid, 1 if present else 0, notes) for tid, present, notes in rows])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def load_session_candidate_attendance(conn, session_id):
+    """Todos os candidatos (com a equipe atual no rótulo) e a presença na sessão.
+
+    Retorna [(candidate_id, rótulo, presente|None, notas)] ordenado por nome.
+    """
+    return conn.execute("""
+        SELECT ca.id, ca.name || COALESCE(' (' || t.name || ')', ''), a.present, COALESCE(a.notes, '')
+        FROM candidates ca
+        LEFT JOIN candidate_attendance a ON a.candidate_id = ca.id AND a.training_session_id = ?
+        LEFT JOIN (SELECT candidate_id, MAX(team_id) AS team_id FROM team_members GROUP BY candidate_id) tm
+               ON tm.candidate_id = ca.id
+        LEFT JOIN teams t ON t.id = tm.team_id
+        ORDER BY ca.name COLLATE NOCASE, ca.id
+    """, (session_id,)).fetchall()
+
+
+def _set_bit(buf, idx, value):
+    byte, bit = divmod(idx, 8)
+    if byte >= len(buf):
+        buf.extend(b"\x00" * (byte + 1 - len(buf)))
+    if value:
+        buf[byte] |= 1 << bit
+    else:
+        buf[byte] &= ~(1 << bit) & 0xFF
+
+
+def _popcount(buf):
+    return int.from_bytes(buf, "little").bit_count()
+
+
+def save_session_candidate_attendance(conn, session_id, rows):
+    """Grava [(candidate_id, presente, notas)] e atualiza os bitsets na mesma transação."""
+    rows = [(cid, 1 if present else 0, notes) for cid, present, notes in rows]
+    try:
+        conn.executemany("""
+            INSERT INTO candidate_attendance (training_session_id, candidate_id, present, notes)
+            VALUES (?,?,?,?)
+            ON CONFLICT(training_session_id, candidate_id)
+            DO UPDATE SET present = excluded.present, notes = excluded.notes
+        """, [(session_id, cid, present, notes) for cid, present, notes in rows])
+        ids = [cid for cid, _p, _n in rows]
+        current = {}
+        for i in range(0, len(ids), 900):
+            chunk = ids[i:i + 900]
+            current.update((cid, (bytearray(att), bytearray(rec))) for cid, att, rec in conn.execute(
+                f"SELECT candidate_id, attended, recorded FROM candidate_presence "
+                f"WHERE candidate_id IN ({','.join('?' * len(chunk))})", chunk))
+        updates = []
+        for cid, present, _notes in rows:
+            att, rec = current.get(cid, (bytearray(), bytearray()))
+            _set_bit(rec, session_id, True)
+            _set_bit(att, session_id, present)
+            updates.append((cid, bytes(att), bytes(rec), _popcount(att), _popcount(rec)))
+        conn.executemany("""
+            INSERT INTO candidate_presence (candidate_id, attended, recorded, present_count, recorded_count)
+            VALUES (?,?,?,?,?)
+            ON CONFLICT(candidate_id) DO UPDATE SET
+                attended = excluded.attended, recorded = excluded.recorded,
+                present_count = excluded.present_count, recorded_count = excluded.recorded_count
+        """, updates)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def presence_ratios(conn, session_ids=None):
+    """Taxa de presença individual de todos os candidatos com algum registro.
+
+    ``session_ids`` restringe o cálculo a um conjunto de sessões (ex.: as
+    últimas N). Retorna {candidate_id: presentes / registradas}.
+    """
+    rows = conn.execute("SELECT candidate_id, attended, recorded FROM candidate_presence").fetchall()
+    if not rows:
+        return {}
+    width = max(max(len(att), len(rec)) for _cid, att, rec in rows)
+    if width == 0:
+        return {}
+    ids = np.fromiter((cid for cid, _a, _r in rows), dtype=np.int64, count=len(rows))
+    att = np.frombuffer(b"".join(bytes(a).ljust(width, b"\x00") for _c, a, _r in rows), dtype=np.uint8)
+    rec = np.frombuffer(b"".join(bytes(r).ljust(width, b"\x00") for _c, _a, r in rows), dtype=np.uint8)
+    att = att.reshape(len(rows), width)
+    rec = rec.reshape(len(rows), width)
+    if session_ids is not None:
+        mask = bytearray(width)
+        for sid in session_ids:
+            if sid // 8 < width:
+                _set_bit(mask, sid, True)
+        mask = np.frombuffer(bytes(mask), dtype=np.uint8)
+        att = att & mask
+        rec = rec & mask
+    present = np.unpackbits(att, axis=1).sum(axis=1)
+    recorded = np.unpackbits(rec, axis=1).sum(axis=1)
+    has = recorded > 0
+    ratios = present[has] / recorded[has]
+    return dict(zip(ids[has].tolist(), ratios.tolist()))
+
+
+def team_presence_ratios(conn):
+    """{team_id: presentes / registros}, lido do agregado team_presence."""
+    return dict(conn.execute("""
+        SELECT team_id, CAST(present_count AS REAL) / total_count
+        FROM team_presence WHERE total_count > 0
+    """).fetchall())
@@ -0,0 +1,252 @@
+"""Log de auditoria estruturado (JSONL) com buffer em fila e rotação por tamanho.
+
+Quem chama só enfileira o registro; uma thread em segundo plano mantém o
+arquivo aberto, grava em lotes e faz flush periódico e na saída do processo.
+Cada lote também é espelhado na tabela indexada ``audit_events``.
+"""
+import atexit
+import getpass
+import json
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from db import connect_db
+
+AUDIT_PATH = Path(os.getenv("SELECTION_AUDIT_PATH", "audit.jsonl"))
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+FLUSH_INTERVAL = 1.0
+BATCH_SIZE = 500
+
+_STOP = object()
+
+
+def _default_user():
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "desconhecido"
+
+
+class AuditLogger:
+    def __init__(self, path=AUDIT_PATH, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, mirror_db=True):
+        self.path = Path(path)
+        self.mirror_db = mirror_db
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.user = _default_user()
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    # -------- API pública --------
+    def log(self, action, details="", entity_type=None, entity_id=None,
+            user=None, duration_ms=None, **extra):
+        """Enfileira um registro; nunca bloqueia em I/O."""
+        if self._closed:
+            return
+        record = {
+            "ts": datetime.now().isoformat(sep=' ', timespec='milliseconds'),
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "user": user or self.user,
+            "duration_ms": round(duration_ms, 3) if duration_ms is not None else None,
+            "details": details,
+        }
+        if extra:
+            record["extra"] = extra
+        self._ensure_thread()
+        self._queue.put(record)
+
+    def flush(self, timeout=5.0):
+        """Espera até que tudo o que já foi enfileirado esteja no disco."""
+        if self._thread is None or not self._thread.is_alive():
+            self._drain_sync()
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5.0)
+        self._drain_sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # -------- thread de escrita --------
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            batch, waiters, stop = [], [], False
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+    def _drain_sync(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                batch.append(item)
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write(data)
+                self._file.flush()
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except OSError:
+                # Auditoria não pode derrubar a aplicação
+                pass
+        if self.mirror_db:
+            self._write_db(batch)
+
+    def _write_db(self, batch):
+        rows = [
+            (r["ts"], r["action"], r["entity_type"],
+             str(r["entity_id"]) if r["entity_id"] is not None else None,
+             r["user"], r["duration_ms"], r["details"],
+             json.dumps(r["extra"], ensure_ascii=False, default=str) if "extra" in r else None)
+            for r in batch
+        ]
+        try:
+            conn = connect_db()
+        except sqlite3.Error:
+            return
+        try:
+            conn.executemany("""
+                INSERT INTO audit_events (ts, action, entity_type, entity_id, user, duration_ms, details, extra)
+                VALUES (?,?,?,?,?,?,?,?)
+            """, rows)
+            conn.commit()
+        except sqlite3.Error:
+            # Tabela ausente (banco antigo) ou banco bloqueado: o JSONL continua valendo
+            pass
+        finally:
+            conn.close()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_audit_logger() -> AuditLogger:
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = AuditLogger()
+    return _logger
+
+
+# -------------------------------
+# CONSULTA DA TRILHA (audit_events)
+# -------------------------------
+def list_audit_actions():
+    conn = connect_db()
+    try:
+        return [r[0] for r in conn.execute("SELECT DISTINCT action FROM audit_events ORDER BY action")]
+    finally:
+        conn.close()
+
+
+def query_audit_events(action=None, entity_type=None, entity_id=None, text=None,
+                       date_from=None, date_to=None, before_id=None, limit=100):
+    """Página de eventos, do mais recente para o mais antigo.
+
+    Paginação por chave (``before_id``) para que cada página use os índices
+    ``(action, id)`` / ``(entity_type, entity_id, id)`` sem OFFSET.
+    """
+    where, params = [], []
+    if action:
+        where.append("action = ?"); params.append(action)
+    if entity_type:
+        where.append("entity_type = ?"); params.append(entity_type)
+    if entity_id not in (None, ""):
+        where.append("entity_id = ?"); params.append(str(entity_id))
+    if date_from:
+        where.append("ts >= ?"); params.append(date_from)
+    if date_to:
+        where.append("ts < ?"); params.append(date_to)
+    if text:
+        where.append("details LIKE ?"); params.append(f"%{text}%")
+    if before_id is not None:
+        where.append("id < ?"); params.append(before_id)
+    q = "SELECT id, ts, action, entity_type, entity_id, user, duration_ms, details FROM audit_events"
+    if where:
+        q += " WHERE " + " AND ".join(where)
+    q += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    conn = connect_db()
+    try:
+        return conn.execute(q, params).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,100 @@
+"""Faixas do resultado final mantidas de forma incremental.
+
+``BandRanking`` guarda todos os membros numa lista ordenada pela mesma chave do
+ranking (score arredondado decrescente, depois member_id) e a mantém com
+``bisect``. A cada ``refresh`` só os membros marcados em ``ranking_dirty``
+desde a leitura anterior (triggers de avaliações, contribuições, presença e
+equipes) voltam a ser pontuados pela política e são reposicionados. As faixas
+dependem só das primeiras approved + waitlist posições, então as mudanças de
+faixa saem da comparação desse prefixo antes e depois.
+
+O score é o da política (hidden_score x peso da contribuição): um recálculo
+dos scores ocultos marca os membros das avaliações alteradas. Penalidade, peso
+padrão da contribuição ou tamanho das faixas diferentes refazem tudo.
+"""
+from bisect import bisect_left, insort
+
+from core.policy import NOT_APPROVED, ScoringPolicy
+from core.repositories import ranking_dirty
+
+# acima desta fração de membros alterados, refazer a lista sai mais barato
+REBUILD_FRACTION = 0.25
+
+
+class BandRanking:
+    def __init__(self, apply_penalty=False):
+        self.apply_penalty = apply_penalty
+        self.policy = None
+        self.seq = 0
+        self.rows = {}    # member_id -> (member_id, nome, equipe, score, nº, presença)
+        self._keys = {}   # member_id -> chave de ordenação
+        self._order = []  # chaves, da posição 1 em diante
+
+    def __len__(self):
+        return len(self._order)
+
+    def refresh(self, conn):
+        """Aplica o que mudou no banco desde a última chamada (a primeira carrega tudo).
+
+        Retorna {member_id: (faixa antiga, faixa nova)} de quem mudou de faixa;
+        quem está fora do ranking conta como 'Não aprovado'.
+        """
+        # seq antes dos dados: o que for gravado no meio é relido na próxima vez
+        seq = ranking_dirty.latest_seq(conn)
+        policy = ScoringPolicy.load(conn)
+        before = self.bands()
+        if self.policy is None or self.policy.signature() != policy.signature():
+            self.policy = policy
+            self._rebuild(conn)
+        else:
+            changed = set(ranking_dirty.changed_since(conn, self.seq))
+            self.policy = policy
+            if len(changed) > REBUILD_FRACTION * len(self._order):
+                self._rebuild(conn)
+            elif changed:
+                self._update(conn, changed)
+        self.seq = seq
+        after = self.bands()
+        return {mid: (before.get(mid, NOT_APPROVED), after.get(mid, NOT_APPROVED))
+                for mid in before.keys() | after.keys()
+                if before.get(mid, NOT_APPROVED) != after.get(mid, NOT_APPROVED)}
+
+    def _rebuild(self, conn):
+        sql, params = self.policy.compile_scores(self.apply_penalty)
+        self.rows, self._keys = {}, {}
+        for row in conn.execute(sql, params):
+            self.rows[row[0]] = row[:6]
+            self._keys[row[0]] = (-row[6], row[0])
+        self._order = sorted(self._keys.values())
+
+    def _update(self, conn, members):
+        sql, params = self.policy.compile_scores(self.apply_penalty, members)
+        fresh = {row[0]: row for row in conn.execute(sql, params)}
+        for mid in members:
+            old = self._keys.pop(mid, None)
+            if old is not None:
+                del self._order[bisect_left(self._order, old)]
+                del self.rows[mid]
+            row = fresh.get(mid)
+            if row is not None:
+                self.rows[mid] = row[:6]
+                self._keys[mid] = (-row[6], mid)
+                insort(self._order, self._keys[mid])
+
+    def position(self, member_id):
+        """Posição (1 em diante) do membro, ou None se ele não está no ranking."""
+        key = self._keys.get(member_id)
+        return None if key is None else bisect_left(self._order, key) + 1
+
+    def bands(self):
+        """{member_id: faixa} de quem está em 'Aprovado' ou 'Lista de espera'."""
+        if self.policy is None:
+            return {}
+        k = self.policy.approved_count + self.policy.waitlist_count
+        return {key[1]: self.policy.band(i + 1) for i, key in enumerate(self._order[:k])}
+
+    def top(self, limit=None):
+        """Linhas como as de ``ScoringPolicy.rank``: (posição, member_id, nome, equipe,
+        score, nº, presença, faixa), das ``limit`` primeiras posições (todas, se None)."""
+        return [(i + 1, *self.rows[key[1]], self.policy.band(i + 1))
+                for i, key in enumerate(self._order[:limit])]
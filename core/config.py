@@ -0,0 +1,44 @@
+"""Leitura do config.toml. Chaves ausentes (ou arquivo ausente) usam os padrões."""
+import os
+import tomllib
+from functools import lru_cache
+from pathlib import Path
+
+CONFIG_PATH = Path(os.getenv("SELECTION_CONFIG_PATH", "config.toml"))
+
+DEFAULTS = {
+    'approved_count': 5,
+    'waitlist_count': 5,
+    'presence': {'penalty_threshold': 0.75, 'penalty_factor': 0.9},
+    'ui': {'restricted_tabs_when_closed': True, 'default_locked_redirect_index': 6},
+    'default_weights': {'immersion': 0.3, 'development': 0.5, 'presentation': 0.2},
+    'profiling': {'enabled': True, 'slow_query_ms': 100.0},
+    'normalization': {'min_judge_evals': 5},
+    'scoring': {'default_contribution_weight': 1.0},
+}
+
+
+def _merge(base, override):
+    out = dict(base)
+    for key, val in override.items():
+        if isinstance(val, dict) and isinstance(out.get(key), dict):
+            out[key] = _merge(out[key], val)
+        else:
+            out[key] = val
+    return out
+
+
+@lru_cache(maxsize=1)
+def load_config():
+    try:
+        with open(CONFIG_PATH, 'rb') as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        data = {}
+    return _merge(DEFAULTS, data)
+
+
+def presence_penalty():
+    """(limite, fator) da penalidade por presença, de [presence]."""
+    p = load_config()['presence']
+    return float(p['penalty_threshold']), float(p['penalty_factor'])
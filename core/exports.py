@@ -0,0 +1,212 @@
+"""Exportação do ranking interno e do resultado final (CSV e XLSX).
+
+``export_csv`` aceita um caminho ou um arquivo já aberto (ex.: ``sys.stdout``)
+e escreve linha a linha. Com um ``ExportCache``, o CSV gerado fica guardado
+com a versão dos dados (``content_version``) e um novo pedido com a mesma
+versão só copia o texto pronto. ``write_xlsx`` gera o Excel final direto do
+cursor da política (openpyxl é importado só ali).
+"""
+import csv
+import io
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+from core.policy import BANDS, ScoringPolicy
+from core.repositories import evaluations, member_contribution, ranking_dirty
+from core.scoring import individual_summary
+
+PROGRESS_EVERY = 1000
+WRITE_CHUNK = 1 << 16  # caracteres por escrita ao copiar um CSV pronto
+
+
+class ExportError(ValueError):
+    """Não há dados para exportar."""
+
+
+def ranking_rows(conn, apply_penalty=False):
+    """Ranking por membro (ver ``scoring.individual_summary``) para exportação."""
+    if not evaluations.active_count(conn):
+        raise ExportError("Nenhuma avaliação ativa encontrada.")
+    rows = individual_summary(conn, apply_penalty)
+    if not rows:
+        raise ExportError("Nenhuma contribuição individual encontrada para gerar o ranking.")
+    for item in rows:
+        if item['name'] is None:
+            item['name'] = f"Candidato ID {item['id']}"
+    return rows
+
+
+def _internal_ranking(rank, item, status):
+    return [rank, item['name'], item['team'], f"{item['score']:.3f}", status]
+
+
+def _final_result(rank, item, status):
+    return [item['name'], item['team'], f"{item['score']:.3f}", status]
+
+
+# tipo -> (cabeçalho, linha, prefixo do nome padrão)
+EXPORTS = {
+    'ranking': (['Posição no ranking', 'Nome do aluno', 'Equipe', 'Score final', 'Status final'],
+                _internal_ranking, 'ranking_interno'),
+    'final': (['Nome do aluno', 'Equipe', 'Score final interno', 'Status final'],
+              _final_result, 'resultado_final_oficial'),
+}
+
+
+# abas do Excel final: o que pode ser comunicado e o ranking, só da banca
+XLSX_SHEETS = (
+    ('Resultado final', ['Nome do aluno', 'Equipe', 'Status final']),
+    ('Ranking interno (banca)', ['Posição no ranking', 'Nome do aluno', 'Equipe', 'Score final', 'Status final']),
+)
+
+
+def default_filename(kind, suffix='.csv'):
+    return f"{EXPORTS[kind][2]}_{datetime.now().strftime('%Y%m%d')}{suffix}"
+
+
+def write_csv(rows, f, kind, progress=None):
+    """Escreve ``rows`` (de ``ranking_rows``) no formato ``kind``; retorna o nº de linhas.
+
+    ``progress(feitas, total)`` é chamado a cada ``PROGRESS_EVERY`` linhas.
+    """
+    header, make_row, _prefix = EXPORTS[kind]
+    writer = csv.writer(f)
+    writer.writerow(header)
+    for rank, item in enumerate(rows, start=1):
+        writer.writerow(make_row(rank, item, BANDS[item['band']]))
+        if progress is not None and rank % PROGRESS_EVERY == 0:
+            progress(rank, len(rows))
+    return len(rows)
+
+
+def content_version(conn, apply_penalty=False):
+    """Versão de tudo de que uma exportação depende: o arquivo do banco, o seq de
+    ``ranking_dirty`` (triggers de avaliações, contribuições, presença, equipes e
+    nomes), o nº de avaliações ativas e a política de pontuação.
+
+    ``PRAGMA data_version`` não serve aqui: só vale dentro de uma mesma conexão.
+    """
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return (path, ranking_dirty.latest_seq(conn), evaluations.active_count(conn), bool(apply_penalty),
+            ScoringPolicy.load(conn).signature())
+
+
+class ExportCache:
+    """Último CSV de cada tipo e penalidade, com a versão dos dados de que saiu.
+
+    Uma gravação que mexe no ranking muda ``content_version`` e a entrada antiga
+    deixa de valer; guardar a nova a substitui.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    # uma entrada por (tipo, penalidade); version[3] é a penalidade
+    def get(self, kind, version):
+        """(texto, nº de linhas) se houver CSV desta versão, senão None."""
+        with self._lock:
+            entry = self._entries.get((kind, version[3]))
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1], entry[2]
+
+    def put(self, kind, version, text, count):
+        with self._lock:
+            self._entries[(kind, version[3])] = (version, text, count)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+EXPORT_CACHE = ExportCache()
+
+
+def render_csv(conn, kind, apply_penalty=False, progress=None, cache=None):
+    """(texto do CSV, nº de linhas, True se veio do cache).
+
+    A versão é lida antes do ranking: uma gravação no meio só pode deixar o
+    texto guardado mais novo que a versão, nunca mais velho.
+    """
+    if cache is not None:
+        version = content_version(conn, apply_penalty)
+        hit = cache.get(kind, version)
+        if hit is not None:
+            return hit[0], hit[1], True
+    buf = io.StringIO(newline='')
+    count = write_csv(ranking_rows(conn, apply_penalty), buf, kind, progress)
+    text = buf.getvalue()
+    if cache is not None:
+        cache.put(kind, version, text, count)
+    return text, count, False
+
+
+def write_text(text, f, progress=None):
+    """Copia um CSV pronto para ``f`` em blocos; ``progress(feitos, total)`` em caracteres."""
+    for start in range(0, len(text), WRITE_CHUNK):
+        f.write(text[start:start + WRITE_CHUNK])
+        if progress is not None:
+            progress(min(start + WRITE_CHUNK, len(text)), len(text))
+
+
+def export_csv(conn, kind, dest, apply_penalty=False, progress=None, cache=None):
+    """Calcula o ranking (ou o pega de ``cache``) e grava em ``dest`` (caminho ou arquivo aberto)."""
+    if cache is None:
+        rows = ranking_rows(conn, apply_penalty)
+    else:
+        text, count, _cached = render_csv(conn, kind, apply_penalty, progress, cache)
+    if hasattr(dest, 'write'):
+        ctx = nullcontext(dest)
+    else:
+        ctx = open(dest, 'w', newline='', encoding='utf-8')
+    with ctx as f:
+        if cache is None:
+            return write_csv(rows, f, kind, progress)
+        write_text(text, f)
+        return count
+
+
+def write_xlsx(conn, dest, apply_penalty=False, progress=None, internal=False):
+    """Excel final em ``dest`` (caminho ou arquivo binário); retorna o nº de linhas.
+
+    Por padrão só a aba comunicável (``XLSX_SHEETS[0]``). Com ``internal`` a aba
+    do ranking interno vai junto, oculta, para uso da banca; as duas são
+    preenchidas juntas, em ordem de posição, a partir de um único cursor de
+    ``ScoringPolicy.compile``. O workbook é write_only: cada linha vai para o
+    arquivo temporário da aba assim que é lida, então a memória não cresce com
+    o nº de candidatos. ``progress(feitas, total)`` é chamado a cada
+    ``PROGRESS_EVERY`` linhas.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    if not evaluations.active_count(conn):
+        raise ExportError("Nenhuma avaliação ativa encontrada.")
+    total = member_contribution.member_count(conn)
+    if not total:
+        raise ExportError("Nenhuma contribuição individual encontrada para gerar o ranking.")
+    sql, params = ScoringPolicy.load(conn).compile(apply_penalty)
+    wb = Workbook(write_only=True)
+    public = wb.create_sheet(XLSX_SHEETS[0][0])
+    public.append(XLSX_SHEETS[0][1])
+    banca = None
+    if internal:
+        banca = wb.create_sheet(XLSX_SHEETS[1][0])
+        banca.sheet_state = 'hidden'
+        banca.append(XLSX_SHEETS[1][1])
+    count = 0
+    for rank, mid, name, team, score, _n, _presence, band in conn.execute(sql, params):
+        name = name if name is not None else f"Candidato ID {mid}"
+        team = team or 'Sem equipe'
+        public.append([name, team, BANDS[band]])
+        if banca is not None:
+            score_cell = WriteOnlyCell(banca, value=score)
+            score_cell.number_format = '0.000'
+            banca.append([rank, name, team, score_cell, BANDS[band]])
+        count = rank
+        if progress is not None and rank % PROGRESS_EVERY == 0:
+            progress(rank, total)
+    wb.save(dest)
+    return count
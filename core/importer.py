@@ -0,0 +1,67 @@
+"""Importação de candidatos a partir de planilhas CSV/XLSX."""
+import csv
+from pathlib import Path
+
+from core.repositories import candidates
+
+# a importação pela interface pega só o começo da planilha
+MAX_IMPORT_ROWS = 51
+PREVIEW_ROWS = 10
+
+
+def read_sheet(path):
+    """(cabeçalhos, linhas) de um CSV ou XLSX; linhas são listas de valores.
+
+    No CSV a primeira linha é sempre o cabeçalho; no XLSX só quando tem algum
+    texto. CSV que não for UTF-8 é lido como latin-1.
+    """
+    path = Path(path)
+    if path.suffix.lower() in ('.xlsx', '.xls'):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = [list(r) for r in wb.active.iter_rows(values_only=True)]
+        finally:
+            wb.close()
+        if rows and any(isinstance(x, str) for x in rows[0]):
+            return [str(x).strip() if x is not None else '' for x in rows[0]], rows[1:]
+        return [], rows
+    try:
+        text = path.read_text(encoding='utf-8-sig')
+    except UnicodeDecodeError:
+        text = path.read_text(encoding='latin-1')
+    rows = [r for r in csv.reader(text.splitlines()) if r]
+    if not rows:
+        return [], []
+    return [h.strip() for h in rows[0]], rows[1:]
+
+
+def _cell(row, idx):
+    if idx >= len(row) or row[idx] is None:
+        return ''
+    return str(row[idx]).strip()
+
+
+def import_candidates(conn, rows, idx_name, idx_area, limit=MAX_IMPORT_ROWS):
+    """Insere candidatos das colunas escolhidas numa única transação.
+
+    Linhas vazias ou sem nome são ignoradas. Retorna (inseridos, ignorados).
+    """
+    if limit is not None:
+        rows = rows[:limit]
+    values = []
+    skipped = 0
+    for r in rows:
+        name = _cell(r, idx_name)
+        if not name:
+            skipped += 1
+            continue
+        values.append((name, _cell(r, idx_area)))
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        candidates.insert_many(conn, values)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(values), skipped
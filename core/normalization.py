@@ -0,0 +1,135 @@
+"""Normalização das notas por banca (rigor de cada avaliador).
+
+No modo 'judge' cada critério vira um z-score dentro da banca, levado de volta
+à escala das notas pela média e pelo desvio de todas as bancas juntas:
+
+    x' = média_geral + desvio_geral x (x - média_banca) / desvio_banca
+
+Para a banca isso é afim (a·x + b), então o hidden_score normalizado continua
+um UPDATE por banca. As estatísticas vêm de ``judge_stats``, que os triggers
+mantêm a cada avaliação gravada (Welford); nada relê as avaliações. A
+referência geral usada no último recálculo fica guardada: enquanto ela não
+mudar além de ``REFERENCE_TOLERANCE`` desvios, o recálculo só atualiza as
+bancas alteradas (``dirty``). Bancas com menos de
+[normalization] min_judge_evals avaliações ativas ficam com as notas brutas.
+"""
+import json
+import math
+
+from core.config import load_config
+from core.repositories import evaluations, judge_stats, settings
+from core.repositories.internal_weights import WEIGHT_NAMES
+
+MODES = ('none', 'judge')
+MODE_KEY = 'score_normalization'
+REFERENCE_KEY = 'judge_norm_reference'
+REFERENCE_TOLERANCE = 0.01
+CRITERIA = ('imm', 'dev', 'pres')  # colunas de judge_stats, na ordem de WEIGHT_NAMES
+
+
+def get_mode(conn):
+    mode = settings.get_value(conn, MODE_KEY, 'none')
+    return mode if mode in MODES else 'none'
+
+
+def set_mode(conn, mode):
+    if mode not in MODES:
+        raise ValueError(f"modo de normalização inválido: {mode}")
+    settings.set_value(conn, MODE_KEY, mode)
+
+
+def min_judge_evals():
+    return int(load_config()['normalization']['min_judge_evals'])
+
+
+def pooled(stats):
+    """(médias, desvios) de todas as bancas juntas, combinando os agregados (Chan)."""
+    total = sum(s['n'] for s in stats)
+    if not total:
+        return [0.0] * 3, [0.0] * 3
+    means, sds = [], []
+    for c in CRITERIA:
+        mean = sum(s['n'] * s[f'{c}_mean'] for s in stats) / total
+        m2 = sum(s[f'{c}_m2'] + s['n'] * (s[f'{c}_mean'] - mean) ** 2 for s in stats)
+        means.append(mean)
+        sds.append(math.sqrt(max(m2, 0.0) / total))
+    return means, sds
+
+
+def judge_affine(stat, ref_mean, ref_sd, min_evals):
+    """(a, b) por critério que levam as notas da banca para a escala de referência."""
+    if stat['n'] < min_evals:
+        return [1.0] * 3, [0.0] * 3
+    a, b = [], []
+    for c, g_mean, g_sd in zip(CRITERIA, ref_mean, ref_sd):
+        sd = math.sqrt(stat[f'{c}_m2'] / stat['n'])
+        scale = g_sd / sd if sd > 0 else 0.0
+        a.append(scale)
+        b.append(g_mean - scale * stat[f'{c}_mean'])
+    return a, b
+
+
+def weighted_transforms(stats, weights, ref_mean, ref_sd, min_evals):
+    """[(banca, a·w por critério, Σ b·w)] para ``evaluations.apply_judge_transforms``."""
+    w = [float(weights[name]) for name in WEIGHT_NAMES]
+    out = []
+    for stat in stats:
+        a, b = judge_affine(stat, ref_mean, ref_sd, min_evals)
+        out.append((stat['judge'], tuple(ai * wi for ai, wi in zip(a, w)), sum(bi * wi for bi, wi in zip(b, w))))
+    return out
+
+
+def _drifted(ref, mean, sd):
+    tol = [REFERENCE_TOLERANCE * max(s, 1e-9) for s in ref['sd']]
+    return any(abs(m - om) > t or abs(s - osd) > t
+               for m, s, om, osd, t in zip(mean, sd, ref['mean'], ref['sd'], tol))
+
+
+def load_reference(conn):
+    raw = settings.get_value(conn, REFERENCE_KEY, '')
+    return json.loads(raw) if raw else None
+
+
+def clear_reference(conn):
+    """Chamado no recálculo bruto: o próximo recálculo normalizado será completo."""
+    settings.set_value(conn, REFERENCE_KEY, '')
+
+
+def reference(conn, stats, weights, min_evals):
+    """(médias, desvios, stale): a referência guardada enquanto valer, senão a atual com stale=True."""
+    mean, sd = pooled(stats)
+    ref = load_reference(conn)
+    w = [float(weights[name]) for name in WEIGHT_NAMES]
+    if (ref is None or ref['weights'] != w or ref['min_judge_evals'] != min_evals
+            or _drifted(ref, mean, sd)):
+        return mean, sd, True
+    return ref['mean'], ref['sd'], False
+
+
+def current_transforms(conn, weights, min_evals):
+    """Transformações por banca que o próximo recálculo usaria (ver ``weighted_transforms``)."""
+    stats = judge_stats.all_stats(conn)
+    mean, sd, _stale = reference(conn, stats, weights, min_evals)
+    return weighted_transforms(stats, weights, mean, sd, min_evals)
+
+
+def recalc_normalized(conn, weights):
+    """hidden_score normalizado por banca; só as bancas alteradas, se a referência não mudou.
+
+    Um hidden_score editado à mão marca a banca como alterada (gatilho
+    trg_evaluations_judge_hidden_update), então a edição é sempre
+    sobrescrita, como no recálculo bruto. Roda dentro da transação de quem
+    chama. Retorna quantas avaliações mudaram.
+    """
+    stats = judge_stats.all_stats(conn)
+    min_evals = min_judge_evals()
+    mean, sd, full = reference(conn, stats, weights, min_evals)
+    if full:
+        settings.set_value(conn, REFERENCE_KEY, json.dumps({
+            'weights': [float(weights[name]) for name in WEIGHT_NAMES], 'min_judge_evals': min_evals,
+            'mean': mean, 'sd': sd}))
+    else:
+        stats = [s for s in stats if s['dirty']]
+    n = evaluations.apply_judge_transforms(conn, weighted_transforms(stats, weights, mean, sd, min_evals))
+    judge_stats.clear_dirty(conn, None if full else [s['judge'] for s in stats])
+    return n
@@ -0,0 +1,178 @@
+"""Política de pontuação: a regra inteira do score individual num só lugar.
+
+Reúne pesos dos critérios (internal_weights) e modo de normalização por banca,
+que o recálculo (``scoring.recalc_hidden_scores``) aplica ao gravar o
+hidden_score de cada avaliação, e o que vem depois dele: multiplicador de
+contribuição (peso do membro na avaliação; vazio ou 0 usa [scoring]
+default_contribution_weight), penalidade por presença ([presence]) e tamanho
+das faixas (approved_count / waitlist_count). ``ScoringPolicy.load`` lê tudo
+uma vez do config.toml e do banco; ``compile`` gera uma única consulta
+parametrizada que calcula, dentro do SQLite e numa passada, score, posição e
+faixa de cada membro a partir do hidden_score das avaliações ativas (inclusive
+as edições manuais); ``compile_scores`` dá só os scores, de todos ou de alguns
+membros, e ``compile_group_totals`` as mesmas somas separadas por banca ou sessão.
+"""
+import json
+
+from core import normalization
+from core.config import load_config, presence_penalty
+from core.repositories import internal_weights
+
+BANDS = ('Aprovado', 'Lista de espera', 'Não aprovado')
+APPROVED, WAITLIST, NOT_APPROVED = range(3)
+# casas decimais antes de ordenar: somas em outra ordem não desempatam diferente
+SCORE_DECIMALS = 9
+# agrupamentos de ``compile_group_totals`` (reamostragem do bootstrap)
+GROUP_COLUMNS = {
+    'judge': "COALESCE(NULLIF(TRIM(e.judge), ''), '(sem banca)')",
+    'session': "COALESCE(e.training_session_id, 0)",
+}
+
+
+def band_sizes():
+    """(aprovados, lista de espera) do config.toml."""
+    cfg = load_config()
+    return int(cfg['approved_count']), int(cfg['waitlist_count'])
+
+
+class ScoringPolicy:
+    def __init__(self, weights, penalty_threshold, penalty_factor, default_contribution_weight, approved_count,
+                 waitlist_count, normalization_mode='none'):
+        # usados pelo recálculo do hidden_score
+        self.weights = weights
+        self.normalization_mode = normalization_mode
+        # usados pela consulta do ranking
+        self.penalty_threshold = penalty_threshold
+        self.penalty_factor = penalty_factor
+        self.default_contribution_weight = default_contribution_weight
+        self.approved_count = approved_count
+        self.waitlist_count = waitlist_count
+
+    @classmethod
+    def load(cls, conn):
+        cfg = load_config()
+        weights = internal_weights.get_weights(conn, cfg['default_weights'])
+        threshold, factor = presence_penalty()
+        approved, waitlist = band_sizes()
+        return cls(weights, threshold, factor, float(cfg['scoring']['default_contribution_weight']),
+                   approved, waitlist, normalization.get_mode(conn))
+
+    def presence_factor(self, ratio):
+        """Multiplicador pela presença: 1.0 sem registro ou com presença no limite ou acima dele."""
+        if ratio is not None and ratio < self.penalty_threshold:
+            return self.penalty_factor
+        return 1.0
+
+    def band(self, rank):
+        if rank <= self.approved_count:
+            return APPROVED
+        if rank <= self.approved_count + self.waitlist_count:
+            return WAITLIST
+        return NOT_APPROVED
+
+    def _contribution(self):
+        """(expressão, parâmetros) da parte de uma contribuição no score, sobre ``mc`` e ``e``."""
+        return ("COALESCE(e.hidden_score, 0.0) * COALESCE(NULLIF(mc.weight, 0), ?)",
+                [self.default_contribution_weight])
+
+    def _scored(self, apply_penalty, member_ids):
+        """CTEs até ``scored`` (um membro por linha, sem posição) e seus parâmetros."""
+        ctes = []
+        contribution, params = self._contribution()
+        member_filter = team_filter = ""
+        if member_ids is not None:
+            ids = json.dumps(sorted(set(member_ids)))
+            member_filter = "WHERE mc.member_id IN (SELECT value FROM json_each(?))"
+            team_filter = "WHERE candidate_id IN (SELECT value FROM json_each(?))"
+            params.append(ids)
+        ctes.append(f"""
+            totals AS (
+                SELECT mc.member_id, SUM({contribution}) AS total, COUNT(*) AS n
+                FROM member_contribution mc
+                LEFT JOIN evaluations e ON e.id = mc.evaluation_id AND e.is_active = 1
+                {member_filter}
+                GROUP BY mc.member_id
+            )""")
+        ctes.append(f"""
+            latest AS (
+                SELECT candidate_id, MAX(team_id) AS team_id FROM team_members {team_filter} GROUP BY candidate_id
+            )""")
+        if member_ids is not None:
+            params.append(ids)
+        params += [1 if apply_penalty else 0, self.penalty_threshold, self.penalty_factor]
+        ctes.append("""
+            scored AS (
+                SELECT tot.member_id, c.name, t.name AS team, tot.n,
+                       CAST(p.present_count AS REAL) / NULLIF(p.recorded_count, 0) AS presence,
+                       tot.total * CASE WHEN ? AND CAST(p.present_count AS REAL) / NULLIF(p.recorded_count, 0) < ?
+                                        THEN ? ELSE 1.0 END AS score
+                FROM totals tot
+                LEFT JOIN candidates c ON c.id = tot.member_id
+                LEFT JOIN latest l ON l.candidate_id = tot.member_id
+                LEFT JOIN teams t ON t.id = l.team_id
+                LEFT JOIN candidate_presence p ON p.candidate_id = tot.member_id
+            )""")
+        return ctes, params
+
+    def compile(self, apply_penalty=False):
+        """(sql, parâmetros) -> linhas (posição, member_id, nome|None, equipe|None, score,
+        nº de contribuições, presença|None, faixa), da posição 1 em diante.
+
+        Cada contribuição soma hidden_score x peso da contribuição; contribuições
+        de avaliações inativas contam no total de avaliações com score 0; a equipe
+        é a de maior id. Empates ficam na ordem do member_id.
+        """
+        ctes, params = self._scored(apply_penalty, None)
+        ctes.append(f"""
+            ranked AS (
+                SELECT *, ROW_NUMBER() OVER (ORDER BY ROUND(score, {SCORE_DECIMALS}) DESC, member_id) AS rank
+                FROM scored
+            )""")
+        params += [self.approved_count, self.approved_count + self.waitlist_count]
+        sql = ("WITH " + ",".join(ctes) + f"""
+            SELECT rank, member_id, name, team, score, n, presence,
+                   CASE WHEN rank <= ? THEN {APPROVED} WHEN rank <= ? THEN {WAITLIST} ELSE {NOT_APPROVED} END
+            FROM ranked
+            ORDER BY rank
+        """)
+        return sql, params
+
+    def compile_scores(self, apply_penalty=False, member_ids=None):
+        """Como ``compile``, sem posição nem faixa: linhas (member_id, nome|None,
+        equipe|None, score, nº de contribuições, presença|None, score arredondado como
+        na ordenação) em ordem de member_id, só dos ``member_ids`` pedidos (todos, se
+        None). Membros sem contribuição não voltam.
+        """
+        ctes, params = self._scored(apply_penalty, member_ids)
+        sql = ("WITH " + ",".join(ctes) + f"""
+            SELECT member_id, name, team, score, n, presence, ROUND(score, {SCORE_DECIMALS})
+            FROM scored ORDER BY member_id
+        """)
+        return sql, params
+
+    def compile_group_totals(self, by, apply_penalty=False):
+        """(sql, parâmetros) -> linhas (member_id, grupo, soma) das avaliações ativas, por
+        banca ou sessão (``GROUP_COLUMNS``), com o mesmo termo por contribuição e a mesma
+        penalidade de ``compile``: somando os grupos de um membro sai o score dele."""
+        contribution, params = self._contribution()
+        params += [1 if apply_penalty else 0, self.penalty_threshold, self.penalty_factor]
+        sql = f"""
+            SELECT mc.member_id, {GROUP_COLUMNS[by]} AS grp,
+                   SUM({contribution})
+                     * CASE WHEN ? AND CAST(p.present_count AS REAL) / NULLIF(p.recorded_count, 0) < ?
+                            THEN ? ELSE 1.0 END
+            FROM member_contribution mc
+            JOIN evaluations e ON e.id = mc.evaluation_id AND e.is_active = 1
+            LEFT JOIN candidate_presence p ON p.candidate_id = mc.member_id
+            GROUP BY mc.member_id, grp
+        """
+        return sql, params
+
+    def signature(self):
+        """Tupla que muda sempre que muda algum parâmetro de que ``compile`` depende."""
+        return (self.penalty_threshold, self.penalty_factor, self.default_contribution_weight,
+                self.approved_count, self.waitlist_count)
+
+    def rank(self, conn, apply_penalty=False):
+        sql, params = self.compile(apply_penalty)
+        return conn.execute(sql, params).fetchall()
@@ -0,0 +1,219 @@
+"""Instrumentação das consultas SQLite.
+
+``connect_db`` cria conexões ``ProfiledConnection`` cujos cursores medem cada
+instrução: tempo de execução somado ao tempo de leitura das linhas, número de
+linhas e a função que fez a chamada. As medidas são agregadas em memória por
+"forma" da SQL (literais e listas IN trocados por ?) e instruções acima do
+limite vão para ``slow_queries.jsonl``.
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from core.config import load_config
+
+ITER_BLOCK = 512
+SLOW_LOG_PATH = Path(os.getenv("SELECTION_SLOW_QUERY_LOG", "slow_queries.jsonl"))
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_SKIP_FILES = (__file__, sqlite3.__file__)
+
+
+@lru_cache(maxsize=2048)
+def sql_shape(sql):
+    """Normaliza a SQL para agrupar execuções da mesma consulta."""
+    shape = _STRING_RE.sub("?", sql)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _SPACE_RE.sub(" ", shape).strip()
+    return _IN_LIST_RE.sub("(?...)", shape)
+
+
+@lru_cache(maxsize=256)
+def _module_name(filename):
+    return Path(filename).stem
+
+
+def _caller():
+    f = sys._getframe(3)
+    while f is not None and f.f_code.co_filename in _SKIP_FILES:
+        f = f.f_back
+    if f is None:
+        return "?"
+    return f"{_module_name(f.f_code.co_filename)}.{f.f_code.co_name}:{f.f_lineno}"
+
+
+class QueryProfiler:
+    """Agregado por forma de SQL: chamadas, tempo total/máximo, linhas e chamadores."""
+
+    def __init__(self, slow_ms=100.0, slow_log_path=SLOW_LOG_PATH):
+        self.slow_ms = slow_ms
+        self.slow_log_path = Path(slow_log_path)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, sql, elapsed_ms, rows, caller):
+        shape = sql_shape(sql)
+        with self._lock:
+            st = self._stats.get(shape)
+            if st is None:
+                st = self._stats[shape] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'callers': {}}
+            st['calls'] += 1
+            st['total_ms'] += elapsed_ms
+            st['rows'] += max(rows, 0)
+            if elapsed_ms > st['max_ms']:
+                st['max_ms'] = elapsed_ms
+            st['callers'][caller] = st['callers'].get(caller, 0) + 1
+        if elapsed_ms >= self.slow_ms:
+            self._log_slow(sql, shape, elapsed_ms, rows, caller)
+
+    def _log_slow(self, sql, shape, elapsed_ms, rows, caller):
+        rec = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'ms': round(elapsed_ms, 3),
+               'rows': rows, 'caller': caller, 'shape': shape, 'sql': _SPACE_RE.sub(" ", sql).strip()}
+        try:
+            with self._lock, open(self.slow_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def top(self, n=50, key='total_ms'):
+        """[(forma, stats)] ordenado pela chave pedida, maiores primeiro."""
+        with self._lock:
+            items = [(shape, dict(st, callers=dict(st['callers']))) for shape, st in self._stats.items()]
+        items.sort(key=lambda x: x[1][key], reverse=True)
+        return items[:n]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def recent_slow(self, n=100):
+        try:
+            lines = self.slow_log_path.read_text(encoding='utf-8').splitlines()[-n:]
+        except OSError:
+            return []
+        out = []
+        for line in reversed(lines):
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+        return out
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor que mede a instrução corrente até a última linha ser lida."""
+
+    _pending = None  # [sql, ms acumulados, linhas, chamador]
+
+    def _start(self, method, sql, *args):
+        self._finish()
+        caller = _caller()
+        t0 = time.perf_counter()
+        try:
+            method(self, sql, *args)
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            if self.description is None:
+                # DML/DDL: terminou aqui
+                _profiler.record(sql, elapsed, self.rowcount, caller)
+            else:
+                self._pending = [sql, elapsed, 0, caller]
+        return self
+
+    def _finish(self):
+        p = self._pending
+        if p is not None:
+            self._pending = None
+            _profiler.record(p[0], p[1], p[2], p[3])
+
+    def execute(self, sql, parameters=()):
+        return self._start(sqlite3.Cursor.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._start(sqlite3.Cursor.executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._start(sqlite3.Cursor.executescript, sql_script)
+
+    def _timed_fetch(self, method, *args):
+        t0 = time.perf_counter()
+        result = method(self, *args)
+        p = self._pending
+        if p is not None:
+            p[1] += (time.perf_counter() - t0) * 1000
+        return result
+
+    def fetchone(self):
+        row = self._timed_fetch(sqlite3.Cursor.fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[2] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed_fetch(sqlite3.Cursor.fetchmany, size or self.arraysize)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+            if len(rows) < (size or self.arraysize):
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(sqlite3.Cursor.fetchall)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+            self._finish()
+        return rows
+
+    def __iter__(self):
+        # lê em blocos para medir sem custo por linha
+        while True:
+            rows = self.fetchmany(ITER_BLOCK)
+            yield from rows
+            if len(rows) < ITER_BLOCK:
+                return
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _build_profiler():
+    cfg = load_config()['profiling']
+    return QueryProfiler(slow_ms=float(cfg['slow_query_ms'])), bool(cfg['enabled'])
+
+
+_profiler, PROFILING_ENABLED = _build_profiler()
+
+
+def get_query_profiler() -> QueryProfiler:
+    return _profiler
@@ -0,0 +1,114 @@
+"""Estabilidade do ranking interno por bootstrap das avaliações ativas.
+
+As avaliações são agrupadas por banca (ou por sessão) e cada réplica sorteia,
+com reposição, tantos grupos quanto existem. O score de um membro é linear nas
+avaliações, então basta a matriz membros x grupos com a soma de cada grupo:
+uma réplica é o vetor de contagens de cada grupo no sorteio e B réplicas viram
+um produto de matrizes (membros x B). As réplicas são divididas em blocos entre
+processos; cada bloco devolve só as contagens por faixa, não as réplicas.
+
+Uso interno da banca: nada é gravado no banco.
+"""
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from core.policy import BANDS, ScoringPolicy, band_sizes
+from core.weight_simulator import rank_bands
+
+GROUPINGS = {'judge': 'banca', 'session': 'sessão'}
+CHUNK_REPS = 250
+
+
+def load_problem(conn, by='judge', apply_penalty=False):
+    """Matriz membros x grupos e os dados de exibição, na ordem de member_id.
+
+    As somas saem de ``ScoringPolicy.compile_group_totals``: somando os grupos
+    de um membro dá o score do ranking. Membros só com avaliações inativas
+    entram com score 0, como no ranking.
+    """
+    policy = ScoringPolicy.load(conn)
+    sql, params = policy.compile_scores(apply_penalty)
+    members = conn.execute(sql, params).fetchall()
+    ids = [mid for mid, *_rest in members]
+    row = {mid: i for i, mid in enumerate(ids)}
+    sql, params = policy.compile_group_totals(by, apply_penalty)
+    cells = conn.execute(sql, params).fetchall()
+    groups = sorted({g for _mid, g, _total in cells}, key=str)
+    col = {g: j for j, g in enumerate(groups)}
+    sums = np.zeros((len(ids), len(groups)), dtype=np.float64)
+    for mid, g, total in cells:
+        sums[row[mid], col[g]] = total
+    return {
+        'by': by,
+        'ids': ids,
+        'names': [name if name is not None else f"Candidato ID {mid}" for mid, name, *_rest in members],
+        'teams': [team or 'Sem equipe' for _mid, _name, team, *_rest in members],
+        'groups': groups,
+        'sums': sums,
+    }
+
+
+def _bootstrap_job(args):
+    sums, reps, seed, block, approved, waitlist = args
+    n_groups = sums.shape[1]
+    rng = np.random.default_rng([seed, block])
+    draws = rng.multinomial(n_groups, np.full(n_groups, 1.0 / n_groups), size=reps)
+    ranks, bands = rank_bands(sums @ draws.T, approved, waitlist)
+    band_counts = np.stack([(bands == b).sum(axis=1) for b in range(len(BANDS))], axis=1)
+    return band_counts, ranks.sum(axis=1)
+
+
+def bootstrap(problem, reps=2000, workers=None, seed=0, approved=None, waitlist=None, progress=None):
+    """Frequência de cada membro em cada faixa ao longo de ``reps`` réplicas.
+
+    O resultado depende só de ``seed`` e ``reps`` (não do nº de processos).
+    ``progress(feitas, total)`` é chamado a cada bloco; uma exceção levantada
+    nele cancela os blocos pendentes. Retorna {'observed': faixa com todos os
+    grupos, 'freq': (membros x 3) em [0, 1], 'mean_rank', 'reps'}.
+    """
+    if reps < 1:
+        raise ValueError(f"reps deve ser ao menos 1 (recebido {reps})")
+    if approved is None or waitlist is None:
+        default_approved, default_waitlist = band_sizes()
+        approved = default_approved if approved is None else approved
+        waitlist = default_waitlist if waitlist is None else waitlist
+    sums = problem['sums']
+    n = len(sums)
+    _ranks, observed = rank_bands(sums.sum(axis=1, keepdims=True), approved, waitlist)
+    if not n or not sums.shape[1]:
+        return {'observed': observed[:, 0], 'freq': np.zeros((n, len(BANDS))),
+                'mean_rank': np.zeros(n), 'reps': 0}
+
+    jobs = [(sums, min(CHUNK_REPS, reps - start), seed, block, approved, waitlist)
+            for block, start in enumerate(range(0, reps, CHUNK_REPS))]
+    band_counts = np.zeros((n, len(BANDS)), dtype=np.int64)
+    rank_sum = np.zeros(n, dtype=np.int64)
+    done = 0
+
+    def collect(result, job_reps):
+        nonlocal done
+        band_counts[:] += result[0]
+        rank_sum[:] += result[1]
+        done += job_reps
+        if progress is not None:
+            progress(done, reps)
+
+    workers = min(workers or (os.cpu_count() or 1), len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            collect(_bootstrap_job(job), job[1])
+    else:
+        # spawn, como em team_optimizer.optimize: roda numa thread do TaskRunner
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            pending = {pool.submit(_bootstrap_job, job): job[1] for job in jobs}
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    collect(fut.result(), pending.pop(fut))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    return {'observed': observed[:, 0], 'freq': band_counts / reps, 'mean_rank': rank_sum / reps, 'reps': reps}
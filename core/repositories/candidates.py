@@ -0,0 +1,22 @@
+"""Tabela ``candidates``. As funções recebem a conexão e não fazem commit."""
+
+
+def search(conn, term=None):
+    """[(id, nome, área)] do mais novo para o mais antigo, filtrando nome/área."""
+    q = "SELECT id, name, area FROM candidates"
+    params = ()
+    if term:
+        q += " WHERE name LIKE ? OR area LIKE ?"
+        params = (f"%{term}%", f"%{term}%")
+    return conn.execute(q + " ORDER BY id DESC", params).fetchall()
+
+
+def names(conn):
+    """{id: nome} de todos os candidatos."""
+    return dict(conn.execute("SELECT id, name FROM candidates").fetchall())
+
+
+def insert_many(conn, rows):
+    """Insere [(nome, área)] com ids do autoincremento."""
+    conn.executemany("INSERT INTO candidates (name, area) VALUES (?,?)", rows)
+    return len(rows)
@@ -0,0 +1,46 @@
+"""Tabela ``evaluations``."""
+
+
+def active_count(conn):
+    return conn.execute("SELECT COUNT(*) FROM evaluations WHERE is_active = 1").fetchone()[0]
+
+
+def recalc_hidden_scores(conn, weights):
+    """Recalcula hidden_score de todas as avaliações ativas num único UPDATE."""
+    cur = conn.execute("""
+        UPDATE evaluations
+        SET hidden_score = COALESCE(immersion, 0) * ? + COALESCE(development, 0) * ?
+                           + COALESCE(presentation, 0) * ?
+        WHERE is_active = 1
+    """, (weights['immersion'], weights['development'], weights['presentation']))
+    return cur.rowcount
+
+
+def team_averages(conn):
+    """[(team_id, nome, média hidden, média imersão, média apresentação)] das avaliações ativas.
+
+    Equipes sem avaliação aparecem com médias 0.
+    """
+    return conn.execute("""
+        SELECT t.id, t.name, COALESCE(AVG(e.hidden_score), 0.0),
+               COALESCE(AVG(e.immersion), 0.0), COALESCE(AVG(e.presentation), 0.0)
+        FROM teams t
+        LEFT JOIN evaluations e ON e.team_id = t.id AND e.is_active = 1
+        GROUP BY t.id, t.name
+    """).fetchall()
+
+
+def apply_judge_transforms(conn, transforms):
+    """hidden_score = a · (imersão, desenvolvimento, apresentação) + b nas avaliações ativas de cada banca.
+
+    ``transforms``: [(banca, (a_imm, a_dev, a_pres), b)]. Retorna quantas avaliações mudaram.
+    """
+    updated = 0
+    for judge, (a_imm, a_dev, a_pres), b in transforms:
+        updated += conn.execute("""
+            UPDATE evaluations
+            SET hidden_score = COALESCE(immersion, 0) * ? + COALESCE(development, 0) * ?
+                               + COALESCE(presentation, 0) * ? + ?
+            WHERE COALESCE(judge, '') = ? AND is_active = 1
+        """, (a_imm, a_dev, a_pres, b, judge)).rowcount
+    return updated
@@ -0,0 +1,17 @@
+"""Tabela ``internal_weights`` (pesos do score oculto)."""
+
+WEIGHT_NAMES = ('immersion', 'development', 'presentation')
+
+
+def get_weights(conn, defaults=None):
+    """{nome: peso} para os três critérios; ausentes usam ``defaults`` (ou 1.0)."""
+    defaults = defaults or {}
+    stored = dict(conn.execute("SELECT name, weight FROM internal_weights").fetchall())
+    return {name: float(stored.get(name, defaults.get(name, 1.0))) for name in WEIGHT_NAMES}
+
+
+def save_weights(conn, weights):
+    conn.executemany("""
+        INSERT INTO internal_weights(name, weight) VALUES(?,?)
+        ON CONFLICT(name) DO UPDATE SET weight = excluded.weight
+    """, [(name, float(weights[name])) for name in WEIGHT_NAMES])
@@ -0,0 +1,16 @@
+"""Tabela ``judge_stats`` (agregado por banca mantido por triggers, schema v19)."""
+
+COLUMNS = ('judge', 'n', 'imm_mean', 'imm_m2', 'dev_mean', 'dev_m2', 'pres_mean', 'pres_m2', 'dirty')
+
+
+def all_stats(conn):
+    """[{coluna: valor}] de todas as bancas, inclusive as sem avaliação ativa (n = 0)."""
+    rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM judge_stats ORDER BY judge").fetchall()
+    return [dict(zip(COLUMNS, r)) for r in rows]
+
+
+def clear_dirty(conn, judges=None):
+    if judges is None:
+        conn.execute("UPDATE judge_stats SET dirty = 0 WHERE dirty <> 0")
+    else:
+        conn.executemany("UPDATE judge_stats SET dirty = 0 WHERE judge = ?", [(j,) for j in judges])
@@ -0,0 +1,55 @@
+"""Tabela ``member_contribution``."""
+
+
+def criteria_totals(conn, default_weight=1.0):
+    """[(member_id, nome|None, equipe|None, Σ imersão, Σ desenvolvimento, Σ apresentação)].
+
+    Mesmas regras do ranking (``ScoringPolicy.compile``), mas por critério
+    (cada nota x peso da contribuição; peso vazio ou 0 conta como
+    ``default_weight``): sem normalização, o score do membro com pesos w é o
+    produto escalar destas somas por w. Ordenado por member_id.
+    """
+    return conn.execute("""
+        WITH totals AS (
+            SELECT mc.member_id,
+                   SUM(COALESCE(e.immersion, 0.0) * COALESCE(NULLIF(mc.weight, 0), :w)) AS imm,
+                   SUM(COALESCE(e.development, 0.0) * COALESCE(NULLIF(mc.weight, 0), :w)) AS dev,
+                   SUM(COALESCE(e.presentation, 0.0) * COALESCE(NULLIF(mc.weight, 0), :w)) AS pres
+            FROM member_contribution mc
+            LEFT JOIN evaluations e ON e.id = mc.evaluation_id AND e.is_active = 1
+            GROUP BY mc.member_id
+        ),
+        latest AS (
+            SELECT candidate_id, MAX(team_id) AS team_id FROM team_members GROUP BY candidate_id
+        )
+        SELECT tot.member_id, c.name, t.name, tot.imm, tot.dev, tot.pres
+        FROM totals tot
+        LEFT JOIN candidates c ON c.id = tot.member_id
+        LEFT JOIN latest l ON l.candidate_id = tot.member_id
+        LEFT JOIN teams t ON t.id = l.team_id
+        ORDER BY tot.member_id
+    """, {'w': default_weight}).fetchall()
+
+
+def criteria_totals_by_judge(conn, default_weight=1.0):
+    """[(member_id, banca, Σ imersão, Σ desenvolvimento, Σ apresentação, Σ peso)] das avaliações ativas.
+
+    Como ``criteria_totals``, separado por banca (NULL vira ''), para aplicar a
+    normalização por banca antes de somar.
+    """
+    return conn.execute("""
+        SELECT mc.member_id, COALESCE(e.judge, ''),
+               SUM(COALESCE(e.immersion, 0.0) * COALESCE(NULLIF(mc.weight, 0), :w)),
+               SUM(COALESCE(e.development, 0.0) * COALESCE(NULLIF(mc.weight, 0), :w)),
+               SUM(COALESCE(e.presentation, 0.0) * COALESCE(NULLIF(mc.weight, 0), :w)),
+               SUM(COALESCE(NULLIF(mc.weight, 0), :w))
+        FROM member_contribution mc
+        JOIN evaluations e ON e.id = mc.evaluation_id AND e.is_active = 1
+        GROUP BY mc.member_id, COALESCE(e.judge, '')
+    """, {'w': default_weight}).fetchall()
+
+
+def member_count(conn):
+    """Nº de membros com alguma contribuição (linhas do ranking)."""
+    return conn.execute("SELECT COUNT(DISTINCT member_id) FROM member_contribution").fetchone()[0]
+
@@ -0,0 +1,10 @@
+"""Tabela ``ranking_dirty`` (membros com score alterado, mantida por triggers, schema v20)."""
+
+
+def latest_seq(conn):
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ranking_dirty").fetchone()[0]
+
+
+def changed_since(conn, seq):
+    """member_ids marcados depois de ``seq``."""
+    return [mid for (mid,) in conn.execute("SELECT member_id FROM ranking_dirty WHERE seq > ?", (seq,))]
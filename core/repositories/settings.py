@@ -0,0 +1,10 @@
+"""Tabela ``settings`` (chave/valor)."""
+
+
+def get_value(conn, key, default=None):
+    row = conn.execute("SELECT value FROM settings WHERE key=?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_value(conn, key, value):
+    conn.execute("REPLACE INTO settings (key, value) VALUES (?,?)", (key, str(value)))
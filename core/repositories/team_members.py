@@ -0,0 +1,10 @@
+"""Tabela ``team_members``."""
+
+
+def latest_team_names(conn):
+    """{candidate_id: nome da equipe}; com mais de uma equipe vale a de maior id."""
+    return dict(conn.execute("""
+        SELECT l.candidate_id, t.name
+        FROM (SELECT candidate_id, MAX(team_id) AS team_id FROM team_members GROUP BY candidate_id) l
+        JOIN teams t ON t.id = l.team_id
+    """).fetchall())
@@ -0,0 +1,6 @@
+"""Tabela ``teams``."""
+
+
+def list_teams(conn):
+    """[(id, nome)] em ordem alfabética, para combos e filtros."""
+    return conn.execute("SELECT id, name FROM teams ORDER BY name ASC").fetchall()
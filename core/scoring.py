@@ -0,0 +1,70 @@
+"""Cálculo de scores: score oculto das avaliações e resumos por equipe e por membro.
+
+Sem Qt: a MainWindow, a linha de comando e os benchmarks chamam as mesmas
+funções e só a apresentação muda.
+"""
+from core import normalization
+from core.attendance import team_presence_ratios
+from core.policy import ScoringPolicy
+from core.repositories import evaluations
+
+
+def recalc_hidden_scores(conn):
+    """Score oculto ponderado pelos pesos da política, para todas as avaliações ativas.
+
+    Com a normalização por banca ligada (``ScoringPolicy.normalization_mode``)
+    as notas são ajustadas pelo rigor de cada banca e só as bancas alteradas
+    desde o último recálculo são atualizadas. Nos dois modos, um hidden_score
+    editado à mão numa avaliação ativa é sobrescrito. Retorna quantas
+    avaliações mudaram.
+    """
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        policy = ScoringPolicy.load(conn)
+        if policy.normalization_mode == 'judge':
+            n = normalization.recalc_normalized(conn, policy.weights)
+        else:
+            n = evaluations.recalc_hidden_scores(conn, policy.weights)
+            normalization.clear_reference(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return n
+
+
+def team_summary(conn, apply_penalty=False):
+    """[(team_id, nome, média hidden, presença %, score final, média imersão, média apresentação)].
+
+    Ordenado pelo score final e, no empate, pelas médias de imersão e de
+    apresentação.
+    """
+    policy = ScoringPolicy.load(conn)
+    pres_map = team_presence_ratios(conn)
+    out = []
+    for tid, tname, avg_hidden, avg_immersion, avg_presentation in evaluations.team_averages(conn):
+        pres_ratio = pres_map.get(tid, 0.0)
+        final = avg_hidden * policy.presence_factor(pres_ratio) if apply_penalty else avg_hidden
+        out.append((tid, tname, avg_hidden, pres_ratio * 100.0, final, avg_immersion, avg_presentation))
+    out.sort(key=lambda x: (-x[4], -x[5], -x[6]))
+    return out
+
+
+def individual_summary(conn, apply_penalty=False):
+    """Score ponderado por membro, do maior para o menor, pela política de pontuação.
+
+    Soma o hidden_score gravado (recálculo ou edição manual) x peso da
+    contribuição (``ScoringPolicy.compile``), como o resumo por equipe. Cada item: {'id', 'name' (None se o candidato foi
+    removido), 'team', 'score', 'evals', 'presence' (taxa individual ou None),
+    'rank', 'band' (índice em ``policy.BANDS``)}.
+    """
+    return [{
+        'id': mid,
+        'name': name,
+        'team': team or 'Sem equipe',
+        'score': score,
+        'evals': n,
+        'presence': presence,
+        'rank': rank,
+        'band': band,
+    } for rank, mid, name, team, score, n, presence, band in ScoringPolicy.load(conn).rank(conn, apply_penalty)]
@@ -0,0 +1,126 @@
+"""Sessões de treino: normalização de data/hora, geração recorrente e consultas por período.
+
+Datas ficam sempre como ISO (YYYY-MM-DD) e horários como HH:MM, de modo que a
+ordem de texto coincide com a cronológica e o índice (date, start_time) serve
+para consultas por intervalo.
+"""
+import re
+from datetime import date, datetime, timedelta
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%y")
+_TIME_RE = re.compile(r"^\s*(\d{1,2})\s*(?:[:hH.]\s*(\d{2})?)?\s*$")
+
+WEEKDAY_NAMES = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+
+class SessionOverlapError(ValueError):
+    """Alguma sessão nova se sobrepõe a outra (existente ou gerada)."""
+
+    def __init__(self, overlaps):
+        self.overlaps = overlaps
+        super().__init__(f"{len(overlaps)} sessões em conflito de horário")
+
+
+def normalize_date(text) -> str:
+    if isinstance(text, (date, datetime)):
+        return text.strftime("%Y-%m-%d")
+    text = str(text).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {text!r}")
+
+
+def normalize_time(text) -> str:
+    m = _TIME_RE.match(str(text))
+    if not m:
+        raise ValueError(f"horário inválido: {text!r}")
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"horário inválido: {text!r}")
+    return f"{hour:02d}:{minute:02d}"
+
+
+def normalize_session(d, start, end) -> tuple:
+    d, start, end = normalize_date(d), normalize_time(start), normalize_time(end)
+    if end <= start:
+        raise ValueError(f"fim ({end}) deve ser depois do início ({start})")
+    return d, start, end
+
+
+def parse_slots(text) -> list:
+    """'07:00-12:20, 13:30-17:00' -> [('07:00', '12:20'), ('13:30', '17:00')]."""
+    slots = []
+    for part in re.split(r"[,;\n]+", text or ""):
+        if not part.strip():
+            continue
+        try:
+            start, end = re.split(r"\s*[-–]\s*|\s+(?:até|a)\s+", part.strip(), maxsplit=1)
+        except ValueError:
+            raise ValueError(f"faixa inválida: {part.strip()!r}") from None
+        _d, start, end = normalize_session("2000-01-01", start, end)
+        slots.append((start, end))
+    return slots
+
+
+def generate_sessions(date_from, date_to, weekdays, slots) -> list:
+    """Todas as (data, início, fim) no período, nos dias da semana pedidos (0 = segunda)."""
+    d = datetime.strptime(normalize_date(date_from), "%Y-%m-%d").date()
+    last = datetime.strptime(normalize_date(date_to), "%Y-%m-%d").date()
+    weekdays = set(weekdays)
+    out = []
+    while d <= last:
+        if d.weekday() in weekdays:
+            iso = d.isoformat()
+            out.extend((iso, start, end) for start, end in slots)
+        d += timedelta(days=1)
+    return out
+
+
+def sessions_in_range(conn, date_from, date_to):
+    """Sessões entre as duas datas (inclusive), pelo índice (date, start_time)."""
+    return conn.execute("""
+        SELECT id, date, start_time, end_time FROM training_sessions
+        WHERE date BETWEEN ? AND ?
+        ORDER BY date, start_time
+    """, (normalize_date(date_from), normalize_date(date_to))).fetchall()
+
+
+def find_overlaps(conn, sessions, exclude_id=None) -> list:
+    """Pares em conflito: [(nova, existente_ou_nova)], cada uma (data, início, fim)."""
+    if not sessions:
+        return []
+    by_date = {}
+    for s in sessions:
+        by_date.setdefault(s[0], []).append(s)
+    existing = {}
+    for sid, d, start, end in sessions_in_range(conn, min(by_date), max(by_date)):
+        if sid != exclude_id and d in by_date:
+            existing.setdefault(d, []).append((d, start, end))
+    overlaps = []
+    for d, new in by_date.items():
+        # poucas sessões por dia: comparação par a par é suficiente
+        others = existing.get(d, [])
+        for i, a in enumerate(new):
+            for b in new[i + 1:] + others:
+                if a[1] < b[2] and b[1] < a[2]:
+                    overlaps.append((a, b))
+    return overlaps
+
+
+def create_sessions(conn, sessions) -> int:
+    """Insere as sessões numa única transação; rejeita tudo se houver sobreposição."""
+    sessions = [normalize_session(*s) for s in sessions]
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        overlaps = find_overlaps(conn, sessions)
+        if overlaps:
+            raise SessionOverlapError(overlaps)
+        conn.executemany("INSERT INTO training_sessions (date,start_time,end_time) VALUES (?,?,?)", sessions)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(sessions)
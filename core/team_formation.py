@@ -0,0 +1,212 @@
+"""Formação de equipes: distribuição balanceada calculada em memória.
+
+O plano é montado sem tocar no banco (``plan_balanced_assignment``) e gravado
+de uma vez com ``apply_assignment``. Equipes novas aparecem no plano com IDs
+negativos até serem criadas.
+"""
+import heapq
+import math
+from datetime import datetime
+
+REASON_NO_QUOTA = "área sem cota configurada"
+REASON_AREA_FULL = "sem vaga para a área"
+REASON_TEAMS_FULL = "equipes lotadas"
+
+
+def load_assignment_state(conn, num_teams):
+    """Lê candidatos sem equipe e escolhe as ``num_teams`` equipes menos cheias.
+
+    Equipes de veteranos ficam de fora. Retorna (candidatos, equipes), onde
+    candidatos = [(id, área)] e equipes = [{'id', 'name', 'size', 'areas'}].
+    """
+    c = conn.cursor()
+    c.execute("""
+        SELECT id, COALESCE(area, '') FROM candidates
+        WHERE id NOT IN (SELECT candidate_id FROM team_members)
+        ORDER BY id
+    """)
+    candidates = c.fetchall()
+    c.execute("""
+        SELECT t.id, t.name, COUNT(tm.candidate_id) AS size
+        FROM teams t
+        LEFT JOIN team_members tm ON tm.team_id = t.id
+        WHERE COALESCE(t.is_veteran, 0) = 0
+        GROUP BY t.id, t.name
+        ORDER BY size ASC, t.id ASC
+        LIMIT ?
+    """, (num_teams,))
+    teams = [{'id': tid, 'name': name, 'size': size, 'areas': {}} for tid, name, size in c.fetchall()]
+    _load_area_counts(c, teams)
+    for i in range(num_teams - len(teams)):
+        teams.append({'id': -(i + 1), 'name': None, 'size': 0, 'areas': {}})
+    return candidates, teams
+
+
+def load_size_state(conn, size):
+    """Estado para a auto-atribuição por tamanho: ceil(sem equipe / size) equipes.
+
+    Usa as primeiras equipes por ID e completa com equipes novas, como a
+    rotina original. Retorna (candidatos, equipes) no mesmo formato acima.
+    """
+    c = conn.cursor()
+    c.execute("""
+        SELECT id, COALESCE(area, '') FROM candidates
+        WHERE id NOT IN (SELECT candidate_id FROM team_members)
+        ORDER BY id
+    """)
+    candidates = c.fetchall()
+    needed = math.ceil(len(candidates) / size) if candidates else 0
+    c.execute("""
+        SELECT t.id, t.name, COUNT(tm.candidate_id)
+        FROM teams t LEFT JOIN team_members tm ON tm.team_id = t.id
+        GROUP BY t.id, t.name
+        ORDER BY t.id ASC
+        LIMIT ?
+    """, (needed,))
+    teams = [{'id': tid, 'name': name, 'size': n, 'areas': {}} for tid, name, n in c.fetchall()]
+    _load_area_counts(c, teams)
+    for i in range(needed - len(teams)):
+        teams.append({'id': -(i + 1), 'name': None, 'size': 0, 'areas': {}})
+    return candidates, teams
+
+
+def _load_area_counts(c, teams):
+    if not teams:
+        return
+    ids = [t['id'] for t in teams]
+    c.execute(f"""
+        SELECT tm.team_id, COALESCE(ca.area, ''), COUNT(*)
+        FROM team_members tm JOIN candidates ca ON ca.id = tm.candidate_id
+        WHERE tm.team_id IN ({','.join('?' * len(ids))})
+        GROUP BY tm.team_id, ca.area
+    """, ids)
+    by_id = {t['id']: t for t in teams}
+    for tid, area, n in c.fetchall():
+        by_id[tid]['areas'][area] = n
+
+
+def plan_balanced_assignment(candidates, teams, area_quotas, team_capacity=None):
+    """Distribui candidatos respeitando cota por área e capacidade da equipe.
+
+    Cada candidato vai para a equipe com menos gente da sua área, depois com
+    menos membros no total, depois de menor ID — o resultado é determinístico.
+    ``team_capacity`` None = soma das cotas. Retorna dict com 'assignments'
+    [(team_id, candidate_id)], 'unplaced' [(candidate_id, área, motivo)] e
+    'teams' (estado final de cada equipe).
+    """
+    if team_capacity is None:
+        team_capacity = sum(area_quotas.values())
+    state = {t['id']: {'id': t['id'], 'name': t.get('name'), 'size': t['size'],
+                       'areas': dict(t['areas']), 'added': []} for t in teams}
+    by_area = {}
+    for cid, area in sorted(candidates):
+        by_area.setdefault(area or '', []).append(cid)
+
+    assignments, unplaced = [], []
+    for area in sorted(by_area):
+        cids = by_area[area]
+        quota = area_quotas.get(area, 0)
+        if quota <= 0:
+            unplaced.extend((cid, area, REASON_NO_QUOTA) for cid in cids)
+            continue
+        heap = [(s['areas'].get(area, 0), s['size'], abs(tid), tid)
+                for tid, s in state.items()]
+        heapq.heapify(heap)
+        for cid in cids:
+            placed = False
+            while heap:
+                area_count, size, _key, tid = heapq.heappop(heap)
+                s = state[tid]
+                if area_count >= quota or size >= team_capacity:
+                    continue  # equipe não serve mais para esta área
+                s['areas'][area] = area_count + 1
+                s['size'] = size + 1
+                s['added'].append(cid)
+                assignments.append((tid, cid))
+                heapq.heappush(heap, (area_count + 1, size + 1, abs(tid), tid))
+                placed = True
+                break
+            if not placed:
+                full = all(s['size'] >= team_capacity for s in state.values())
+                unplaced.append((cid, area, REASON_TEAMS_FULL if full else REASON_AREA_FULL))
+    return {'assignments': assignments, 'unplaced': unplaced, 'teams': list(state.values())}
+
+
+def plan_round_robin(candidates, teams):
+    """Distribui em rodízio na ordem das equipes, sem olhar áreas ou cotas."""
+    state = {t['id']: {'id': t['id'], 'name': t.get('name'), 'size': t['size'],
+                       'areas': dict(t['areas']), 'added': []} for t in teams}
+    order = [t['id'] for t in teams]
+    assignments = []
+    for idx, (cid, area) in enumerate(candidates):
+        s = state[order[idx % len(order)]]
+        s['size'] += 1
+        s['areas'][area or ''] = s['areas'].get(area or '', 0) + 1
+        s['added'].append(cid)
+        assignments.append((s['id'], cid))
+    return {'assignments': assignments, 'unplaced': [], 'teams': list(state.values())}
+
+
+def plan_diff(conn, plan):
+    """Linhas da prévia: uma por equipe tocada pelo plano, com antes/depois.
+
+    Cada linha = {'team_id', 'name', 'is_new', 'before', 'after', 'areas',
+    'added': [(id, nome, área)]}. Equipes sem mudança ficam de fora.
+    """
+    added_ids = [cid for t in plan['teams'] for cid in t['added']]
+    info = {}
+    for i in range(0, len(added_ids), 900):
+        chunk = added_ids[i:i + 900]
+        info.update((cid, (name, area)) for cid, name, area in conn.execute(
+            f"SELECT id, name, COALESCE(area, '') FROM candidates WHERE id IN ({','.join('?' * len(chunk))})",
+            chunk))
+    rows = []
+    for t in plan['teams']:
+        if not t['added']:
+            continue
+        rows.append({
+            'team_id': t['id'],
+            'name': t.get('name') or f"(nova equipe {-t['id']})",
+            'is_new': t['id'] < 0,
+            'before': t['size'] - len(t['added']),
+            'after': t['size'],
+            'areas': dict(t['areas']),
+            'added': [(cid, *info.get(cid, ('?', ''))) for cid in t['added']],
+        })
+    return rows
+
+
+class StalePlanError(Exception):
+    """O banco mudou depois que o plano foi calculado."""
+
+
+def apply_assignment(conn, plan, competition='OBR'):
+    """Cria as equipes novas e grava as atribuições numa única transação.
+
+    Se algum candidato do plano já tiver ganhado equipe enquanto a prévia
+    estava aberta, nada é gravado e ``StalePlanError`` é levantada.
+    """
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        cids = [cid for _tid, cid in plan['assignments']]
+        for i in range(0, len(cids), 900):
+            chunk = cids[i:i + 900]
+            c.execute(f"SELECT COUNT(*) FROM team_members WHERE candidate_id IN ({','.join('?' * len(chunk))})",
+                      chunk)
+            if c.fetchone()[0]:
+                raise StalePlanError("candidatos do plano já foram atribuídos; recalcule a prévia")
+        new_ids = {}
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for t in plan['teams']:
+            if t['id'] < 0:
+                c.execute("INSERT INTO teams(name,competition,is_veteran) VALUES(?,?,?)",
+                          (t.get('name') or f"AutoTeam_{stamp}_{-t['id'] - 1}", competition, 0))
+                new_ids[t['id']] = c.lastrowid
+        c.executemany("INSERT OR IGNORE INTO team_members(team_id,candidate_id) VALUES(?,?)",
+                      [(new_ids.get(tid, tid), cid) for tid, cid in plan['assignments']])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return new_ids
@@ -0,0 +1,380 @@
+"""Modo otimização da formação de equipes (recozimento simulado).
+
+Equilibra composição de áreas, tamanho (com alvo por competição), série e
+capacidade. O custo total é a soma de um custo por equipe, o que permite
+avaliar cada movimento olhando só para as duas equipes envolvidas. A função
+de custo é plugável: qualquer função de nível de módulo com a assinatura de
+``default_team_cost`` serve (precisa ser serializável para os processos).
+Equipes de veteranos nunca entram no problema.
+"""
+import heapq
+import math
+import multiprocessing
+import os
+import random
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from core.team_formation import REASON_NO_QUOTA, load_assignment_state
+
+DEFAULT_WEIGHTS = {'area': 1.0, 'size': 1.0, 'grade': 0.5, 'capacity': 10.0}
+COMPETITIONS = ('OBR', 'TBR', 'CCBB')
+PROGRESS_INTERVAL = 0.1  # segundos entre chamadas de ``progress`` em ``optimize``
+
+
+def parse_grade(value):
+    """'2º ano' -> 2.0; valores sem número viram None."""
+    if value is None:
+        return None
+    m = re.search(r"\d+(?:[.,]\d+)?", str(value))
+    return float(m.group().replace(',', '.')) if m else None
+
+
+def build_problem(candidates, teams, competition_capacity=None, weights=None, area_quota=None):
+    """Monta o problema em listas simples (serializável entre processos).
+
+    candidates: [(id, área, série|None)] — apenas os que serão distribuídos.
+    teams: [{'id', 'competition', 'size', 'areas': {área: n}, 'grade_sum', 'grade_n'}]
+    competition_capacity: {'OBR': 4, ...} define o tamanho-alvo de cada equipe
+    pela competição; sem ele (ou se faltar alguma competição) o alvo é o mesmo
+    para todas.
+    area_quota: {área: n} fixa o alvo de membros da área em cada equipe; as
+    demais áreas seguem a divisão proporcional ao tamanho-alvo.
+    """
+    areas = sorted({a or '' for _cid, a, _g in candidates} |
+                   {a for t in teams for a in t['areas']})
+    area_idx = {a: i for i, a in enumerate(areas)}
+    n_areas = len(areas)
+    cand_ids = [cid for cid, _a, _g in candidates]
+    cand_area = [area_idx[a or ''] for _cid, a, _g in candidates]
+    cand_grade = [g for _cid, _a, g in candidates]
+
+    base_counts, base_size, base_gsum, base_gn = [], [], [], []
+    for t in teams:
+        row = [0] * n_areas
+        for a, n in t['areas'].items():
+            row[area_idx[a]] = n
+        base_counts.append(row)
+        base_size.append(t['size'])
+        base_gsum.append(t.get('grade_sum', 0.0))
+        base_gn.append(t.get('grade_n', 0))
+
+    total = len(candidates) + sum(base_size)
+    caps = competition_capacity or {}
+    raw_cap = [caps.get(t.get('competition') or 'OBR') for t in teams]
+    if teams and all(raw_cap):
+        cap_sum = sum(raw_cap)
+        target_size = [total * c / cap_sum for c in raw_cap]
+        capacity = list(raw_cap)
+    else:
+        target_size = [total / len(teams) if teams else 0.0] * len(teams)
+        capacity = [math.ceil(s) + 1 for s in target_size]
+    area_totals = [sum(col) for col in zip(*base_counts)] if teams else [0] * n_areas
+    for a in cand_area:
+        area_totals[a] += 1
+    share = [s / total if total else 0.0 for s in target_size]
+    quota = [(area_quota or {}).get(a) for a in areas]
+    target_area = [[area_totals[a] * share[t] if quota[a] is None else float(quota[a]) for a in range(n_areas)]
+                   for t in range(len(teams))]
+
+    grades = [g for g in cand_grade if g is not None]
+    g_sum = sum(grades) + sum(base_gsum)
+    g_n = len(grades) + sum(base_gn)
+    return {
+        'areas': areas,
+        'team_ids': [t['id'] for t in teams],
+        'cand_ids': cand_ids,
+        'cand_area': cand_area,
+        'cand_grade': cand_grade,
+        'base_counts': base_counts,
+        'base_size': base_size,
+        'base_gsum': base_gsum,
+        'base_gn': base_gn,
+        'target_area': target_area,
+        'target_size': target_size,
+        'capacity': capacity,
+        'grade_mean': g_sum / g_n if g_n else None,
+        'weights': dict(DEFAULT_WEIGHTS, **(weights or {})),
+    }
+
+
+def default_team_cost(problem, t, counts, size, grade_sum, grade_n):
+    w = problem['weights']
+    tgt = problem['target_area'][t]
+    cost = w['area'] * sum((c - g) ** 2 for c, g in zip(counts, tgt))
+    cost += w['size'] * (size - problem['target_size'][t]) ** 2
+    over = size - problem['capacity'][t]
+    if over > 0:
+        cost += w['capacity'] * over * over
+    mean = problem['grade_mean']
+    if grade_n and mean is not None:
+        cost += w['grade'] * grade_n * (grade_sum / grade_n - mean) ** 2
+    return cost
+
+
+class _State:
+    """Contadores por equipe para avaliar movimentos em O(áreas)."""
+
+    def __init__(self, problem, assign, cost_fn):
+        self.p = problem
+        self.cost_fn = cost_fn
+        self.assign = list(assign)
+        self.counts = [list(r) for r in problem['base_counts']]
+        self.size = list(problem['base_size'])
+        self.gsum = list(problem['base_gsum'])
+        self.gn = list(problem['base_gn'])
+        for i, t in enumerate(self.assign):
+            self._add(i, t)
+        self.team_cost = [self._cost(t) for t in range(len(self.size))]
+        self.total = sum(self.team_cost)
+
+    def _add(self, i, t, sign=1):
+        self.counts[t][self.p['cand_area'][i]] += sign
+        self.size[t] += sign
+        g = self.p['cand_grade'][i]
+        if g is not None:
+            self.gsum[t] += sign * g
+            self.gn[t] += sign
+
+    def _cost(self, t):
+        return self.cost_fn(self.p, t, self.counts[t], self.size[t], self.gsum[t], self.gn[t])
+
+    def move_delta(self, i, t2):
+        t1 = self.assign[i]
+        self._add(i, t1, -1); self._add(i, t2)
+        c1, c2 = self._cost(t1), self._cost(t2)
+        self._add(i, t2, -1); self._add(i, t1)
+        return c1 + c2 - self.team_cost[t1] - self.team_cost[t2], c1, c2
+
+    def apply_move(self, i, t2, c1, c2, delta):
+        t1 = self.assign[i]
+        self._add(i, t1, -1); self._add(i, t2)
+        self.assign[i] = t2
+        self.team_cost[t1], self.team_cost[t2] = c1, c2
+        self.total += delta
+
+    def swap_delta(self, i, j):
+        ti, tj = self.assign[i], self.assign[j]
+        self._add(i, ti, -1); self._add(j, tj, -1); self._add(i, tj); self._add(j, ti)
+        ci, cj = self._cost(ti), self._cost(tj)
+        self._add(i, tj, -1); self._add(j, ti, -1); self._add(i, ti); self._add(j, tj)
+        return ci + cj - self.team_cost[ti] - self.team_cost[tj], ci, cj
+
+    def apply_swap(self, i, j, ci, cj, delta):
+        ti, tj = self.assign[i], self.assign[j]
+        self._add(i, ti, -1); self._add(j, tj, -1); self._add(i, tj); self._add(j, ti)
+        self.assign[i], self.assign[j] = tj, ti
+        self.team_cost[ti], self.team_cost[tj] = ci, cj
+        self.total += delta
+
+
+def greedy_initial(problem, seed=0):
+    """Solução inicial: cada candidato vai para a equipe mais abaixo do alvo da sua área."""
+    rng = random.Random(seed)
+    n_teams = len(problem['team_ids'])
+    order = list(range(len(problem['cand_ids'])))
+    rng.shuffle(order)
+    order.sort(key=lambda i: problem['cand_area'][i])
+    counts = [list(r) for r in problem['base_counts']]
+    size = list(problem['base_size'])
+    assign = [0] * len(order)
+    heap, cur_area = [], None
+    for i in order:
+        a = problem['cand_area'][i]
+        if a != cur_area:
+            cur_area = a
+            heap = [(counts[t][a] - problem['target_area'][t][a], size[t] - problem['target_size'][t], t)
+                    for t in range(n_teams)]
+            heapq.heapify(heap)
+        _gap, _sgap, t = heapq.heappop(heap)
+        assign[i] = t
+        counts[t][a] += 1
+        size[t] += 1
+        heapq.heappush(heap, (counts[t][a] - problem['target_area'][t][a], size[t] - problem['target_size'][t], t))
+    return assign
+
+
+def evaluate(problem, assign, cost_fn=default_team_cost):
+    return _State(problem, assign, cost_fn).total
+
+
+def anneal(problem, time_budget=2.0, seed=0, cost_fn=default_team_cost, initial=None, stop=None):
+    """Recozimento simulado com movimentos de troca de equipe e de troca de pares.
+
+    ``stop()`` é chamado a cada 256 iterações; se devolver True, para antes do
+    prazo com a melhor solução até ali.
+    """
+    rng = random.Random(seed)
+    n, n_teams = len(problem['cand_ids']), len(problem['team_ids'])
+    assign = initial if initial is not None else greedy_initial(problem, seed)
+    state = _State(problem, assign, cost_fn)
+    best_total, best_assign = state.total, list(state.assign)
+    if n == 0 or n_teams < 2:
+        return {'assign': best_assign, 'cost': best_total, 'iterations': 0, 'seed': seed}
+
+    # temperatura inicial pela média dos |delta| de movimentos aleatórios
+    sample = []
+    for _ in range(min(200, n * 2)):
+        i = rng.randrange(n)
+        t2 = rng.randrange(n_teams - 1)
+        t2 += t2 >= state.assign[i]
+        sample.append(abs(state.move_delta(i, t2)[0]))
+    t_start = (sum(sample) / len(sample)) or 1.0
+    t_end = t_start * 1e-3
+
+    start = time.perf_counter()
+    deadline = start + time_budget
+    temp, iterations = t_start, 0
+    while True:
+        if iterations & 255 == 0:
+            now = time.perf_counter()
+            if now >= deadline or (stop is not None and stop()):
+                break
+            frac = (now - start) / time_budget
+            temp = t_start * (t_end / t_start) ** frac
+        iterations += 1
+        i = rng.randrange(n)
+        if rng.random() < 0.5:
+            t2 = rng.randrange(n_teams - 1)
+            t2 += t2 >= state.assign[i]
+            delta, c1, c2 = state.move_delta(i, t2)
+            if delta <= 0 or rng.random() < math.exp(-delta / temp):
+                state.apply_move(i, t2, c1, c2, delta)
+            else:
+                continue
+        else:
+            j = rng.randrange(n)
+            if state.assign[i] == state.assign[j]:
+                continue
+            delta, ci, cj = state.swap_delta(i, j)
+            if delta <= 0 or rng.random() < math.exp(-delta / temp):
+                state.apply_swap(i, j, ci, cj, delta)
+            else:
+                continue
+        if state.total < best_total - 1e-12:
+            best_total, best_assign = state.total, list(state.assign)
+    return {'assign': best_assign, 'cost': best_total, 'iterations': iterations, 'seed': seed}
+
+
+# Event compartilhado com os processos do pool: pede aos recozimentos que parem
+_stop_event = None
+
+
+def _init_worker(event):
+    global _stop_event
+    _stop_event = event
+
+
+def _anneal_job(args):
+    problem, time_budget, seed, cost_fn = args
+    stop = _stop_event.is_set if _stop_event is not None else None
+    return anneal(problem, time_budget, seed, cost_fn, stop=stop)
+
+
+def optimize(problem, time_budget=2.0, restarts=None, workers=None, cost_fn=default_team_cost, seed=0,
+             progress=None):
+    """Roda ``restarts`` recozimentos (em processos paralelos) e devolve o melhor.
+
+    O resultado é determinístico para a mesma semente, número de reinícios e
+    orçamento de iterações; com orçamento de tempo depende da máquina.
+    ``progress(ms decorridos, ms previstos)`` é chamado a cada
+    ``PROGRESS_INTERVAL``; uma exceção levantada nele para os recozimentos em
+    andamento, descarta os pendentes e é repassada.
+    """
+    restarts = restarts or (os.cpu_count() or 1)
+    workers = min(workers or (os.cpu_count() or 1), restarts)
+    jobs = [(problem, time_budget, seed + k, cost_fn) for k in range(restarts)]
+    expected_ms = int(math.ceil(restarts / workers) * time_budget * 1000)
+    start = last = time.perf_counter()
+
+    def report():
+        if progress is not None:
+            progress(min(int((time.perf_counter() - start) * 1000), expected_ms), expected_ms)
+
+    if workers <= 1:
+        def tick():
+            nonlocal last
+            if time.perf_counter() - last >= PROGRESS_INTERVAL:
+                last = time.perf_counter()
+                report()
+            return False
+
+        results = [anneal(p, budget, s, fn, stop=tick if progress is not None else None)
+                   for p, budget, s, fn in jobs]
+    else:
+        # spawn: optimize roda numa thread do TaskRunner e fork de processo com
+        # várias threads pode herdar locks travados
+        mp_context = multiprocessing.get_context('spawn')
+        stop = mp_context.Event()
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker,
+                                   initargs=(stop,))
+        try:
+            futures = [pool.submit(_anneal_job, job) for job in jobs]
+            pending = set(futures)
+            while pending:
+                _done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                try:
+                    report()
+                except BaseException:
+                    stop.set()
+                    raise
+            results = [f.result() for f in futures]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    best = min(results, key=lambda r: (r['cost'], r['seed']))
+    return dict(best, restarts=[(r['seed'], r['cost'], r['iterations']) for r in results])
+
+
+def to_plan(problem, assign, teams, unplaced=()):
+    """Converte a solução para o formato de plano de ``apply_assignment``."""
+    by_id = {t['id']: {'id': t['id'], 'name': t.get('name'), 'size': t['size'],
+                       'areas': dict(t['areas']), 'added': []} for t in teams}
+    assignments = []
+    for i, t in enumerate(assign):
+        tid = problem['team_ids'][t]
+        cid = problem['cand_ids'][i]
+        area = problem['areas'][problem['cand_area'][i]]
+        s = by_id[tid]
+        s['size'] += 1
+        s['areas'][area] = s['areas'].get(area, 0) + 1
+        s['added'].append(cid)
+        assignments.append((tid, cid))
+    return {'assignments': assignments, 'unplaced': list(unplaced), 'teams': list(by_id.values())}
+
+
+def load_problem(conn, num_teams, competition_capacity=None, weights=None, areas=None):
+    """Lê o estado do banco e monta o problema.
+
+    ``areas`` limita os candidatos distribuídos às áreas informadas; os demais
+    voltam em ``skipped``. Se for um dict {área: n}, n vira o alvo da área em
+    cada equipe (``build_problem(area_quota=...)``). Retorna (problem, teams, skipped).
+    """
+    c = conn.cursor()
+    candidates, teams = load_assignment_state(conn, num_teams)
+    skipped = []
+    if areas is not None:
+        skipped = [(cid, area, REASON_NO_QUOTA) for cid, area in candidates if area not in areas]
+        candidates = [(cid, area) for cid, area in candidates if area in areas]
+    cols = {r[1] for r in c.execute("PRAGMA table_info(candidates)")}
+    grades = {}
+    if 'grade' in cols:
+        grades = {cid: parse_grade(g) for cid, g in c.execute("SELECT id, grade FROM candidates")}
+    real_ids = [t['id'] for t in teams if t['id'] > 0]
+    comp = {}
+    if real_ids:
+        marks = ','.join('?' * len(real_ids))
+        comp = dict(c.execute(f"SELECT id, competition FROM teams WHERE id IN ({marks})", real_ids).fetchall())
+        if grades:
+            for tid, cid in c.execute(f"SELECT team_id, candidate_id FROM team_members WHERE team_id IN ({marks})", real_ids):
+                g = grades.get(cid)
+                if g is not None:
+                    t = next(t for t in teams if t['id'] == tid)
+                    t['grade_sum'] = t.get('grade_sum', 0.0) + g
+                    t['grade_n'] = t.get('grade_n', 0) + 1
+    for t in teams:
+        t['competition'] = comp.get(t['id'], 'OBR')
+    problem = build_problem([(cid, area, grades.get(cid)) for cid, area in candidates],
+                            teams, competition_capacity, weights,
+                            areas if isinstance(areas, dict) else None)
+    return problem, teams, skipped
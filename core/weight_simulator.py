@@ -0,0 +1,163 @@
+"""Simulador de pesos internos ("e se?") sem gravar no banco.
+
+O score individual é linear nos pesos: Σ contribuição x (w_imersão x imersão +
+w_desenv x desenvolvimento + w_apres x apresentação) = somas por critério · w.
+As somas por critério são lidas uma vez (matriz membros x 3) e K vetores de
+pesos viram um único produto de matrizes (membros x K). O ranking real soma o
+hidden_score gravado, que pode ter sido editado à mão; a diferença para as
+somas x pesos atuais vira um termo constante por membro, então o vetor atual
+reproduz ``ScoringPolicy.rank``. A ordem do ranking não muda se os pesos forem
+multiplicados por uma constante, então a grade cobre só vetores que somam 1.
+"""
+import numpy as np
+
+from core import normalization
+from core.attendance import presence_ratios
+from core.policy import APPROVED, NOT_APPROVED, SCORE_DECIMALS, WAITLIST, ScoringPolicy, band_sizes
+from core.repositories import judge_stats, member_contribution
+from core.repositories.internal_weights import WEIGHT_NAMES
+
+MIN_STEP = 0.02       # 1326 vetores; cada vetor é uma coluna (membros) de posições e faixas
+CHUNK_COLUMNS = 128   # vetores pontuados/ordenados por vez em ``simulate``
+
+
+class ScoreMatrix:
+    """Somas por critério de cada membro, na ordem de ``individual_summary`` no empate."""
+
+    def __init__(self, ids, names, teams, totals, presence, offset=None):
+        self.ids = ids
+        self.names = names
+        self.teams = teams
+        self.totals = totals          # float64 (membros x 3), colunas em WEIGHT_NAMES
+        self.presence = presence      # multiplicador da penalidade por presença, por membro
+        # Σ contribuição x hidden_score - totals · pesos atuais (edições manuais)
+        self.offset = offset if offset is not None else np.zeros(len(ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, conn, mode=None, current=None):
+        """``mode``: 'none' ou 'judge' (normalização por banca); padrão é o modo salvo.
+
+        ``current``: vetor de pesos (na ordem de WEIGHT_NAMES) que deve reproduzir
+        o ranking gravado; padrão são os pesos da política. Multiplicador de
+        contribuição e penalidade vêm da ``ScoringPolicy``.
+        """
+        policy = ScoringPolicy.load(conn)
+        rows = member_contribution.criteria_totals(conn, policy.default_contribution_weight)
+        ratios = presence_ratios(conn)
+        ids = [mid for mid, *_rest in rows]
+        totals = np.array([r[3:] for r in rows], dtype=np.float64).reshape(len(rows), 3)
+        if (mode or policy.normalization_mode) == 'judge':
+            totals = _normalized_totals(conn, ids, policy.default_contribution_weight)
+        if current is None:
+            current = as_vector(policy.weights)
+        sql, params = policy.compile_scores(apply_penalty=False)
+        stored = np.array([score for _mid, _name, _team, score, *_rest in conn.execute(sql, params)],
+                          dtype=np.float64)
+        return cls(
+            ids=ids,
+            names=[name if name is not None else f"Candidato ID {mid}" for mid, name, *_rest in rows],
+            teams=[team or 'Sem equipe' for _mid, _name, team, *_rest in rows],
+            totals=totals,
+            presence=np.array([policy.presence_factor(ratios.get(mid)) for mid in ids], dtype=np.float64),
+            offset=stored - totals @ np.asarray(current, dtype=np.float64),
+        )
+
+
+def _normalized_totals(conn, ids, default_weight):
+    """Somas por critério com as notas de cada banca já normalizadas (continua linear nos pesos)."""
+    stats = judge_stats.all_stats(conn)
+    ref_mean, ref_sd = normalization.pooled(stats)
+    min_evals = normalization.min_judge_evals()
+    affine = {s['judge']: normalization.judge_affine(s, ref_mean, ref_sd, min_evals) for s in stats}
+    row = {mid: i for i, mid in enumerate(ids)}
+    totals = np.zeros((len(ids), 3), dtype=np.float64)
+    for mid, judge, s_imm, s_dev, s_pres, s_weight in member_contribution.criteria_totals_by_judge(conn, default_weight):
+        a, b = affine.get(judge, ([1.0] * 3, [0.0] * 3))
+        totals[row[mid]] += np.multiply(a, (s_imm, s_dev, s_pres)) + np.multiply(b, s_weight)
+    return totals
+
+
+def weight_grid(step=0.05):
+    """Todos os vetores (imersão, desenvolvimento, apresentação) >= 0 que somam 1, no passo dado.
+
+    Passos abaixo de ``MIN_STEP`` são arredondados para ele.
+    """
+    n = int(round(1 / max(step, MIN_STEP)))
+    i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1), indexing='ij')
+    keep = i + j <= n
+    i, j = i[keep], j[keep]
+    return np.column_stack([i, j, n - i - j]).astype(np.float64) / n
+
+
+def as_vector(weights):
+    """{nome: peso} -> array na ordem de WEIGHT_NAMES."""
+    return np.array([float(weights[name]) for name in WEIGHT_NAMES], dtype=np.float64)
+
+
+class Simulation:
+    """Resultado de ``simulate``: uma coluna por vetor de pesos."""
+
+    def __init__(self, weights, ranks, bands):
+        self.weights = weights    # (K x 3)
+        self.ranks = ranks        # int32 (membros x K), posição, 1 = primeiro
+        self.bands = bands        # int8 (membros x K), APPROVED / WAITLIST / NOT_APPROVED
+
+    def transitions(self, base=0):
+        """(K x 3 x 3): quantos membros saem da faixa [a] (no vetor ``base``) para a faixa [b]."""
+        k = self.bands.shape[1]
+        counts = np.zeros((k, 9), dtype=np.int64)
+        base_codes = self.bands[:, [base]].astype(np.int16) * 3
+        for start in range(0, k, CHUNK_COLUMNS):
+            codes = base_codes + self.bands[:, start:start + CHUNK_COLUMNS]
+            counts[start:start + CHUNK_COLUMNS] = (codes[:, :, None] == np.arange(9)).sum(axis=0)
+        return counts.reshape(-1, 3, 3)
+
+    def approval_share(self):
+        """Fração dos vetores em que cada membro fica entre os aprovados."""
+        if not self.bands.shape[1]:
+            return np.zeros(len(self.bands))
+        return (self.bands == APPROVED).mean(axis=1)
+
+
+def simulate(matrix, weights, apply_penalty=False, approved=None, waitlist=None, progress=None):
+    """Pontua todos os membros com cada linha de ``weights`` (K x 3).
+
+    As colunas são pontuadas e ordenadas em blocos de ``CHUNK_COLUMNS``, então
+    só posições e faixas de todos os vetores ficam em memória.
+    ``progress(feitos, total)`` é chamado a cada bloco; uma exceção levantada
+    nele interrompe a simulação. Vagas padrão: ``policy.band_sizes()``.
+    """
+    if approved is None or waitlist is None:
+        default_approved, default_waitlist = band_sizes()
+        approved = default_approved if approved is None else approved
+        waitlist = default_waitlist if waitlist is None else waitlist
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    k = len(weights)
+    ranks = np.empty((len(matrix), k), dtype=np.int32)
+    bands = np.empty((len(matrix), k), dtype=np.int8)
+    for start in range(0, k, CHUNK_COLUMNS):
+        scores = matrix.totals @ weights[start:start + CHUNK_COLUMNS].T + matrix.offset[:, None]
+        if apply_penalty:
+            scores *= matrix.presence[:, None]
+        ranks[:, start:start + CHUNK_COLUMNS], bands[:, start:start + CHUNK_COLUMNS] = \
+            rank_bands(scores, approved, waitlist)
+        if progress is not None:
+            progress(min(start + CHUNK_COLUMNS, k), k)
+    return Simulation(weights, ranks, bands)
+
+
+def rank_bands(scores, approved, waitlist):
+    """(posições, faixas) de cada coluna de ``scores`` (membros x K), maior score = posição 1.
+
+    Empates ficam na ordem das linhas, como no sort estável de ``individual_summary``.
+    """
+    order = np.argsort(-np.round(scores, SCORE_DECIMALS), axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, len(scores) + 1)[:, None], axis=0)
+    bands = np.full(ranks.shape, NOT_APPROVED, dtype=np.int8)
+    bands[ranks <= approved + waitlist] = WAITLIST
+    bands[ranks <= approved] = APPROVED
+    return ranks, bands
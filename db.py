@@ -2,11 +2,637 @@ import os
 import sqlite3
 from pathlib import Path
 
+from core.query_profiler import PROFILING_ENABLED, ProfiledConnection
+from core.sessions import normalize_date, normalize_time
+
 DB_PATH = Path(os.getenv("SELECTION_DB_PATH", "selection.db"))
 
 
 def connect_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    if PROFILING_ENABLED:
+        conn = sqlite3.connect(DB_PATH, factory=ProfiledConnection)
+    else:
+        conn = sqlite3.connect(DB_PATH)
     conn.execute("PRAGMA foreign_keys = ON")
     conn.execute("PRAGMA journal_mode = WAL")
     return conn
+
+
+def backup_to(dst, progress=None, pages=1024):
+    """Cópia consistente do banco pela API de backup do SQLite (inclui o que ainda está no WAL).
+
+    ``progress(status, restantes, total)`` é chamado a cada ``pages`` páginas;
+    uma exceção levantada nele interrompe a cópia.
+    """
+    src = connect_db()
+    dst_conn = sqlite3.connect(dst)
+    try:
+        src.backup(dst_conn, pages=pages, progress=progress)
+    finally:
+        dst_conn.close()
+        src.close()
+
+
+# Welford por critério em judge_stats: soma/remove uma avaliação sem reler as
+# demais. No UPDATE do SQLite as expressões usam os valores antigos da linha.
+_JUDGE_CRITERIA = (('imm', 'immersion'), ('dev', 'development'), ('pres', 'presentation'))
+
+
+def _welford_add(row):
+    sets = ["n = n + 1", "dirty = 1"]
+    for short, col in _JUDGE_CRITERIA:
+        x = f"COALESCE({row}.{col}, 0)"
+        sets.append(f"{short}_mean = {short}_mean + ({x} - {short}_mean) / (n + 1.0)")
+        sets.append(f"{short}_m2 = {short}_m2 + ({x} - {short}_mean) * ({x} - {short}_mean) * n / (n + 1.0)")
+    return ", ".join(sets)
+
+
+def _welford_remove(row):
+    sets = ["n = n - 1", "dirty = 1"]
+    for short, col in _JUDGE_CRITERIA:
+        x = f"COALESCE({row}.{col}, 0)"
+        sets.append(f"{short}_mean = CASE WHEN n > 1 THEN {short}_mean - ({x} - {short}_mean) / (n - 1.0) ELSE 0 END")
+        sets.append(f"{short}_m2 = CASE WHEN n > 1 THEN MAX(0, {short}_m2 - ({x} - {short}_mean) * ({x} - {short}_mean)"
+                    f" * n / (n - 1.0)) ELSE 0 END")
+    return ", ".join(sets)
+
+
+# ranking_dirty: membros cujo score ou dados de exibição no ranking mudaram,
+# com um seq crescente; cada leitor guarda o último seq que já aplicou.
+def _mark_ranking_dirty(members):
+    return f"""
+        INSERT INTO ranking_dirty (member_id, seq)
+        SELECT member_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM ranking_dirty)
+        FROM ({members}) WHERE member_id IS NOT NULL
+        ON CONFLICT(member_id) DO UPDATE SET seq = excluded.seq;"""
+
+
+def _ranking_trigger(name, event, members):
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{name}_ranking
+        {event}
+        BEGIN {_mark_ranking_dirty(members)}
+        END
+    """
+
+
+_RANKING_TRIGGERS = (
+    ('member_contribution_insert', 'AFTER INSERT ON member_contribution', 'SELECT NEW.member_id AS member_id'),
+    ('member_contribution_delete', 'AFTER DELETE ON member_contribution', 'SELECT OLD.member_id AS member_id'),
+    ('member_contribution_update', 'AFTER UPDATE OF member_id, evaluation_id, weight ON member_contribution',
+     'SELECT OLD.member_id AS member_id UNION SELECT NEW.member_id'),
+    ('evaluations_update', 'AFTER UPDATE OF hidden_score, is_active ON evaluations',
+     'SELECT member_id FROM member_contribution WHERE evaluation_id = NEW.id'),
+    ('evaluations_delete', 'AFTER DELETE ON evaluations',
+     'SELECT member_id FROM member_contribution WHERE evaluation_id = OLD.id'),
+    ('candidate_presence_insert', 'AFTER INSERT ON candidate_presence', 'SELECT NEW.candidate_id AS member_id'),
+    ('candidate_presence_update', 'AFTER UPDATE OF present_count, recorded_count ON candidate_presence',
+     'SELECT NEW.candidate_id AS member_id'),
+    ('team_members_insert', 'AFTER INSERT ON team_members', 'SELECT NEW.candidate_id AS member_id'),
+    ('team_members_delete', 'AFTER DELETE ON team_members', 'SELECT OLD.candidate_id AS member_id'),
+    ('teams_update', 'AFTER UPDATE OF name ON teams',
+     'SELECT candidate_id AS member_id FROM team_members WHERE team_id = NEW.id'),
+    ('candidates_update', 'AFTER UPDATE OF name ON candidates', 'SELECT NEW.id AS member_id'),
+    ('candidates_delete', 'AFTER DELETE ON candidates', 'SELECT OLD.id AS member_id'),
+)
+
+
+# -------------------------------
+# MIGRAÇÃO DE BANCO (schema v1+)
+# -------------------------------
+def init_db():
+    conn = connect_db()
+    cur = conn.cursor()
+    # user_version indica versão do schema
+    cur.execute("PRAGMA user_version")
+    ver = cur.fetchone()[0] or 0
+
+    # v0 -> v1 (tabelas básicas)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            notes TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS team_members (
+            team_id INTEGER,
+            candidate_id INTEGER,
+            PRIMARY KEY(team_id, candidate_id)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INTEGER,
+            judge TEXT,
+            immersion INTEGER,
+            development INTEGER,
+            presentation INTEGER,
+            notes TEXT,
+            hidden_score REAL DEFAULT 0
+        )
+    """)
+    if ver < 1:
+        cur.execute("PRAGMA user_version = 1")
+
+    # v1 -> v2: competição na equipe + veteranos + sessões + presença
+    if ver < 2:
+        try:
+            cur.execute("ALTER TABLE teams ADD COLUMN competition TEXT DEFAULT 'OBR'")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cur.execute("ALTER TABLE teams ADD COLUMN is_veteran INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS training_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS attendance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                training_session_id INTEGER,
+                team_id INTEGER,
+                present INTEGER DEFAULT 1,
+                notes TEXT
+            )
+        """)
+        cur.execute("PRAGMA user_version = 2")
+
+    # v2 -> v3: diário e anexos
+    if ver < 3:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS diary_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                team_id INTEGER,
+                title TEXT,
+                content TEXT,
+                created_at TEXT
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS attachments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                diary_entry_id INTEGER,
+                file_path TEXT,
+                original_name TEXT,
+                mime_type TEXT
+            )
+        """)
+        cur.execute("PRAGMA user_version = 3")
+
+    # v3 -> v4: sessão e comentário na avaliação
+    if ver < 4:
+        try:
+            cur.execute("ALTER TABLE evaluations ADD COLUMN training_session_id INTEGER")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cur.execute("ALTER TABLE evaluations ADD COLUMN comment TEXT")
+        except sqlite3.OperationalError:
+            pass
+        cur.execute("PRAGMA user_version = 4")
+
+    # v4 -> v5: pesos internos configuráveis
+    if ver < 5:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS internal_weights (
+                name TEXT PRIMARY KEY,
+                weight REAL NOT NULL
+            )
+        """)
+        for name, w in [('immersion', 0.3), ('development', 0.5), ('presentation', 0.2)]:
+            cur.execute("INSERT OR IGNORE INTO internal_weights(name,weight) VALUES(?,?)", (name, w))
+        cur.execute("PRAGMA user_version = 5")
+
+    # v5 -> v6: settings (PIN hash)
+    if ver < 6:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        try:
+            import hashlib
+            h = hashlib.sha256(b"1234").hexdigest()
+            cur.execute("INSERT OR IGNORE INTO settings(key,value) VALUES('admin_hash',?)", (h,))
+            cur.execute("INSERT OR IGNORE INTO settings(key,value) VALUES('process_status',?)", ('ABERTO',))
+        except Exception:
+            pass
+        cur.execute("PRAGMA user_version = 6")
+
+    # v6 -> v7: cpf, phone, grade
+    if ver < 7:
+        try:
+            cur.execute("ALTER TABLE candidates ADD COLUMN cpf TEXT")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cur.execute("ALTER TABLE candidates ADD COLUMN phone TEXT")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cur.execute("ALTER TABLE candidates ADD COLUMN grade TEXT")
+        except sqlite3.OperationalError:
+            pass
+        cur.execute("PRAGMA user_version = 7")
+
+    # v7 -> v8: member_contribution table
+    if ver < 8:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS member_contribution (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                evaluation_id INTEGER,
+                member_id INTEGER,
+                weight REAL,
+                note TEXT,
+                FOREIGN KEY(evaluation_id) REFERENCES evaluations(id),
+                FOREIGN KEY(member_id) REFERENCES candidates(id)
+            )
+        """)
+        cur.execute("PRAGMA user_version = 8")
+
+    # v8 -> v9: soft delete para avaliações
+    if ver < 9:
+        try:
+            cur.execute("ALTER TABLE evaluations ADD COLUMN is_active INTEGER DEFAULT 1")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cur.execute("ALTER TABLE evaluations ADD COLUMN deleted_at TEXT")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cur.execute("ALTER TABLE evaluations ADD COLUMN delete_reason TEXT")
+        except sqlite3.OperationalError:
+            pass
+        cur.execute("PRAGMA user_version = 9")
+
+    # v9 -> v10: Add area column and remove AUTOINCREMENT from candidates
+    if ver < 10:
+        try:
+            # Create new table without AUTOINCREMENT, with only name and area
+            cur.execute("""
+                CREATE TABLE candidates_new (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    area TEXT
+                )
+            """)
+            # Copy existing data (only name and area columns)
+            cols = {r[1] for r in cur.execute("PRAGMA table_info(candidates)")}
+            if 'area' in cols:
+                cur.execute("""
+                    INSERT INTO candidates_new (id, name, area)
+                    SELECT id, name, area FROM candidates
+                """)
+            else:
+                cur.execute("""
+                    INSERT INTO candidates_new (id, name)
+                    SELECT id, name FROM candidates
+                """)
+            # Drop old table and rename new one
+            cur.execute("DROP TABLE candidates")
+            cur.execute("ALTER TABLE candidates_new RENAME TO candidates")
+        except sqlite3.OperationalError as e:
+            print(f"Migration v9->v10 error: {e}")
+        cur.execute("PRAGMA user_version = 10")
+
+    # v10 -> v11: ensure candidates table uses AUTOINCREMENT to avoid ID reuse
+    if ver < 11:
+        try:
+            cur.execute("""
+                CREATE TABLE candidates_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    area TEXT
+                )
+            """)
+            cur.execute("""
+                INSERT INTO candidates_new (id, name, area)
+                SELECT id, name, area FROM candidates
+            """)
+            cur.execute("DROP TABLE candidates")
+            cur.execute("ALTER TABLE candidates_new RENAME TO candidates")
+        except sqlite3.OperationalError as e:
+            print(f"Migration v10->v11 error: {e}")
+        cur.execute("PRAGMA user_version = 11")
+
+    # v11 -> v12: trilha de auditoria indexada (espelho do audit.jsonl)
+    if ver < 12:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS audit_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                action TEXT NOT NULL,
+                entity_type TEXT,
+                entity_id TEXT,
+                user TEXT,
+                duration_ms REAL,
+                details TEXT,
+                extra TEXT
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_ts ON audit_events(ts)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_action ON audit_events(action, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_entity ON audit_events(entity_type, entity_id, id)")
+        cur.execute("PRAGMA user_version = 12")
+
+    # v12 -> v13: anexos endereçados por conteúdo (sha256 + contagem de referências)
+    if ver < 13:
+        for col in ("content_hash TEXT", "size_bytes INTEGER"):
+            try:
+                cur.execute(f"ALTER TABLE attachments ADD COLUMN {col}")
+            except sqlite3.OperationalError:
+                pass
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS attachment_blobs (
+                hash TEXT PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                size_bytes INTEGER,
+                mime_type TEXT,
+                ref_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_attachments_hash ON attachments(content_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_attachments_entry ON attachments(diary_entry_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_attachment_blobs_size ON attachment_blobs(size_bytes)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_attachment_blobs_orphans ON attachment_blobs(ref_count) WHERE ref_count <= 0")
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_attachments_ref_insert
+            AFTER INSERT ON attachments WHEN NEW.content_hash IS NOT NULL
+            BEGIN
+                UPDATE attachment_blobs SET ref_count = ref_count + 1 WHERE hash = NEW.content_hash;
+            END
+        """)
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_attachments_ref_delete
+            AFTER DELETE ON attachments WHEN OLD.content_hash IS NOT NULL
+            BEGIN
+                UPDATE attachment_blobs SET ref_count = ref_count - 1 WHERE hash = OLD.content_hash;
+            END
+        """)
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_attachments_ref_update
+            AFTER UPDATE OF content_hash ON attachments
+            WHEN OLD.content_hash IS NOT NEW.content_hash
+            BEGIN
+                UPDATE attachment_blobs SET ref_count = ref_count - 1 WHERE hash = OLD.content_hash;
+                UPDATE attachment_blobs SET ref_count = ref_count + 1 WHERE hash = NEW.content_hash;
+            END
+        """)
+        cur.execute("PRAGMA user_version = 13")
+
+    # v13 -> v14: uma presença por (sessão, equipe), para chamada em lote com upsert
+    if ver < 14:
+        # mantém o registro mais recente de cada par duplicado
+        cur.execute("""
+            DELETE FROM attendance
+            WHERE team_id IS NOT NULL AND id NOT IN (
+                SELECT MAX(id) FROM attendance
+                WHERE team_id IS NOT NULL
+                GROUP BY training_session_id, team_id
+            )
+        """)
+        cur.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_session_team
+            ON attendance(training_session_id, team_id)
+        """)
+        cur.execute("PRAGMA user_version = 14")
+
+    # v14 -> v15: presença individual (linhas indexadas + bitsets por candidato)
+    if ver < 15:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS candidate_attendance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                training_session_id INTEGER NOT NULL,
+                candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                present INTEGER NOT NULL DEFAULT 1,
+                notes TEXT,
+                UNIQUE (training_session_id, candidate_id)
+            )
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_candidate_attendance_candidate
+            ON candidate_attendance(candidate_id, training_session_id)
+        """)
+        # bit N = sessão de id N; contadores guardados para consultas em SQL
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS candidate_presence (
+                candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id) ON DELETE CASCADE,
+                attended BLOB NOT NULL DEFAULT x'',
+                recorded BLOB NOT NULL DEFAULT x'',
+                present_count INTEGER NOT NULL DEFAULT 0,
+                recorded_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cur.execute("PRAGMA user_version = 15")
+
+    # v15 -> v16: agregado de presença por equipe mantido por triggers
+    if ver < 16:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS team_presence (
+                team_id INTEGER PRIMARY KEY,
+                present_count INTEGER NOT NULL DEFAULT 0,
+                total_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # mesma semântica de AVG(present): registros com present NULL não contam
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_attendance_presence_insert
+            AFTER INSERT ON attendance WHEN NEW.team_id IS NOT NULL
+            BEGIN
+                INSERT INTO team_presence (team_id, present_count, total_count)
+                VALUES (NEW.team_id, COALESCE(NEW.present, 0), NEW.present IS NOT NULL)
+                ON CONFLICT(team_id) DO UPDATE SET
+                    present_count = present_count + excluded.present_count,
+                    total_count = total_count + excluded.total_count;
+            END
+        """)
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_attendance_presence_delete
+            AFTER DELETE ON attendance WHEN OLD.team_id IS NOT NULL
+            BEGIN
+                UPDATE team_presence
+                SET present_count = present_count - COALESCE(OLD.present, 0),
+                    total_count = total_count - (OLD.present IS NOT NULL)
+                WHERE team_id = OLD.team_id;
+            END
+        """)
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_attendance_presence_update
+            AFTER UPDATE OF team_id, present ON attendance
+            BEGIN
+                UPDATE team_presence
+                SET present_count = present_count - COALESCE(OLD.present, 0),
+                    total_count = total_count - (OLD.present IS NOT NULL)
+                WHERE team_id = OLD.team_id;
+                INSERT INTO team_presence (team_id, present_count, total_count)
+                SELECT NEW.team_id, COALESCE(NEW.present, 0), NEW.present IS NOT NULL
+                WHERE NEW.team_id IS NOT NULL
+                ON CONFLICT(team_id) DO UPDATE SET
+                    present_count = present_count + excluded.present_count,
+                    total_count = total_count + excluded.total_count;
+            END
+        """)
+        cur.execute("DELETE FROM team_presence")
+        cur.execute("""
+            INSERT INTO team_presence (team_id, present_count, total_count)
+            SELECT team_id, COALESCE(SUM(present), 0), COUNT(present)
+            FROM attendance WHERE team_id IS NOT NULL
+            GROUP BY team_id
+        """)
+        cur.execute("PRAGMA user_version = 16")
+
+    # v16 -> v17: datas ISO / horários HH:MM nas sessões e índice (date, start_time)
+    if ver < 17:
+        rows = cur.execute("SELECT id, date, start_time, end_time FROM training_sessions").fetchall()
+        fixed = []
+        for sid, d, start, end in rows:
+            try:
+                norm = (normalize_date(d), normalize_time(start), normalize_time(end))
+            except ValueError:
+                continue  # texto irreconhecível fica como está para correção manual
+            if norm != (d, start, end):
+                fixed.append(norm + (sid,))
+        cur.executemany("UPDATE training_sessions SET date=?, start_time=?, end_time=? WHERE id=?", fixed)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_training_sessions_date_start
+            ON training_sessions(date, start_time)
+        """)
+        cur.execute("PRAGMA user_version = 17")
+
+    # v17 -> v18: uma contribuição por (avaliação, membro) — alvo do upsert de
+    # save_contributions — e índice para as médias por equipe
+    if ver < 18:
+        cur.execute("""
+            DELETE FROM member_contribution WHERE id NOT IN (
+                SELECT MAX(id) FROM member_contribution GROUP BY evaluation_id, member_id
+            )
+        """)
+        cur.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_member_contribution_eval_member
+            ON member_contribution(evaluation_id, member_id)
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_team_active ON evaluations(team_id, is_active)")
+        cur.execute("PRAGMA user_version = 18")
+
+    # v18 -> v19: estatística por banca (n, média e M2 de Welford por critério)
+    # das avaliações ativas, mantida por triggers, para a normalização por banca;
+    # dirty marca as bancas cujas avaliações precisam de novo hidden_score
+    if ver < 19:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS judge_stats (
+                judge TEXT PRIMARY KEY,
+                n INTEGER NOT NULL DEFAULT 0,
+                imm_mean REAL NOT NULL DEFAULT 0, imm_m2 REAL NOT NULL DEFAULT 0,
+                dev_mean REAL NOT NULL DEFAULT 0, dev_m2 REAL NOT NULL DEFAULT 0,
+                pres_mean REAL NOT NULL DEFAULT 0, pres_m2 REAL NOT NULL DEFAULT 0,
+                dirty INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_evaluations_judge_stats_insert
+            AFTER INSERT ON evaluations WHEN NEW.is_active = 1
+            BEGIN
+                INSERT OR IGNORE INTO judge_stats (judge) VALUES (COALESCE(NEW.judge, ''));
+                UPDATE judge_stats SET {_welford_add('NEW')} WHERE judge = COALESCE(NEW.judge, '');
+            END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_evaluations_judge_stats_delete
+            AFTER DELETE ON evaluations WHEN OLD.is_active = 1
+            BEGIN
+                UPDATE judge_stats SET {_welford_remove('OLD')} WHERE judge = COALESCE(OLD.judge, '');
+            END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_evaluations_judge_stats_update
+            AFTER UPDATE OF judge, immersion, development, presentation, is_active ON evaluations
+            BEGIN
+                UPDATE judge_stats SET {_welford_remove('OLD')}
+                WHERE judge = COALESCE(OLD.judge, '') AND OLD.is_active = 1;
+                INSERT OR IGNORE INTO judge_stats (judge) SELECT COALESCE(NEW.judge, '') WHERE NEW.is_active = 1;
+                UPDATE judge_stats SET {_welford_add('NEW')}
+                WHERE judge = COALESCE(NEW.judge, '') AND NEW.is_active = 1;
+            END
+        """)
+        cur.execute("DELETE FROM judge_stats")
+        cur.execute("""
+            INSERT INTO judge_stats (judge, n, imm_mean, imm_m2, dev_mean, dev_m2, pres_mean, pres_m2)
+            SELECT judge, n,
+                   imm_s / n, MAX(0, imm_q - imm_s * imm_s / n),
+                   dev_s / n, MAX(0, dev_q - dev_s * dev_s / n),
+                   pres_s / n, MAX(0, pres_q - pres_s * pres_s / n)
+            FROM (
+                SELECT COALESCE(judge, '') AS judge, COUNT(*) AS n,
+                       TOTAL(COALESCE(immersion, 0)) AS imm_s,
+                       TOTAL(COALESCE(immersion, 0) * COALESCE(immersion, 0)) AS imm_q,
+                       TOTAL(COALESCE(development, 0)) AS dev_s,
+                       TOTAL(COALESCE(development, 0) * COALESCE(development, 0)) AS dev_q,
+                       TOTAL(COALESCE(presentation, 0)) AS pres_s,
+                       TOTAL(COALESCE(presentation, 0) * COALESCE(presentation, 0)) AS pres_q
+                FROM evaluations WHERE is_active = 1
+                GROUP BY COALESCE(judge, '')
+            )
+        """)
+        # recálculo só das avaliações das bancas alteradas
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_evaluations_judge_active
+            ON evaluations(COALESCE(judge, ''), is_active)
+        """)
+        cur.execute("PRAGMA user_version = 19")
+
+    # v19 -> v20: registro dos membros com score alterado para o ranking
+    # incremental (core/band_ranking.py) e índices das consultas por membro
+    if ver < 20:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ranking_dirty (
+                member_id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_ranking_dirty_seq ON ranking_dirty(seq)")
+        for trigger in _RANKING_TRIGGERS:
+            cur.execute(_ranking_trigger(*trigger))
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_member_contribution_member ON member_contribution(member_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_team_members_candidate ON team_members(candidate_id, team_id)")
+        cur.execute("PRAGMA user_version = 20")
+
+    # v20 -> v21: o ranking soma hidden_score (recálculo ou edição manual), então
+    # é ele, e não as notas, que marca os membros da avaliação em ranking_dirty
+    if ver < 21:
+        cur.execute("DROP TRIGGER IF EXISTS trg_evaluations_update_ranking")
+        cur.execute(_ranking_trigger(*next(t for t in _RANKING_TRIGGERS if t[0] == 'evaluations_update')))
+        cur.execute("PRAGMA user_version = 21")
+
+    # v21 -> v22: hidden_score editado à mão também marca a banca em judge_stats,
+    # para o recálculo normalizado sobrescrever a edição como o recálculo bruto
+    if ver < 22:
+        cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_evaluations_judge_hidden_update
+            AFTER UPDATE OF hidden_score ON evaluations
+            WHEN NEW.is_active = 1 AND OLD.hidden_score IS NOT NEW.hidden_score
+            BEGIN
+                UPDATE judge_stats SET dirty = 1 WHERE judge = COALESCE(NEW.judge, '') AND dirty = 0;
+            END
+        """)
+        cur.execute("PRAGMA user_version = 22")
+
+    conn.commit()
+    conn.close()
@@ -0,0 +1,72 @@
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView
+)
+
+NEW_TEAM_COLOR = QColor(220, 245, 220)
+
+
+def summarize_unplaced(unplaced):
+    """Texto com os candidatos que ficaram de fora, agrupados por área e motivo."""
+    if not unplaced:
+        return ""
+    reasons = {}
+    for _cid, area, reason in unplaced:
+        key = (area or 'sem área', reason)
+        reasons[key] = reasons.get(key, 0) + 1
+    return f'{len(unplaced)} candidatos sem equipe:\n' + '\n'.join(
+        f'- {area}: {n} ({reason})' for (area, reason), n in sorted(reasons.items()))
+
+
+class AssignmentPreviewDialog(QDialog):
+    """Prévia de um plano de atribuição: nada é gravado até clicar em Aplicar."""
+
+    def __init__(self, rows, unplaced=(), summary="", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Prévia da Atribuição")
+        self.resize(1000, 550)
+        layout = QVBoxLayout(self)
+
+        added = sum(len(r['added']) for r in rows)
+        new_teams = sum(1 for r in rows if r['is_new'])
+        head = f"{added} candidatos em {len(rows)} equipes ({new_teams} novas)."
+        if summary:
+            head += f"\n{summary}"
+        layout.addWidget(QLabel(head))
+
+        self.table = QTableWidget(len(rows), 6)
+        self.table.setHorizontalHeaderLabels(["Equipe", "Situação", "Antes", "Depois",
+                                              "Áreas (depois)", "Candidatos adicionados"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setWordWrap(True)
+        for r, row in enumerate(rows):
+            areas = ", ".join(f"{a or 'sem área'}: {n}" for a, n in sorted(row['areas'].items()))
+            names = "\n".join(f"+ {name} ({area or 'sem área'})" for _cid, name, area in row['added'])
+            values = [row['name'], "Nova" if row['is_new'] else "Existente",
+                      str(row['before']), str(row['after']), areas, names]
+            for c, val in enumerate(values):
+                item = QTableWidgetItem(val)
+                if row['is_new']:
+                    item.setBackground(NEW_TEAM_COLOR)
+                self.table.setItem(r, c, item)
+        self.table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
+        self.table.resizeColumnsToContents()
+        self.table.resizeRowsToContents()
+        layout.addWidget(self.table)
+
+        text = summarize_unplaced(unplaced)
+        if text:
+            layout.addWidget(QLabel(text))
+
+        btns = QHBoxLayout()
+        apply_btn = QPushButton("Aplicar")
+        apply_btn.setObjectName("primary")
+        apply_btn.setEnabled(added > 0)
+        discard_btn = QPushButton("Descartar")
+        discard_btn.setObjectName("danger")
+        apply_btn.clicked.connect(self.accept)
+        discard_btn.clicked.connect(self.reject)
+        btns.addWidget(apply_btn)
+        btns.addWidget(discard_btn)
+        layout.addLayout(btns)
@@ -0,0 +1,162 @@
+import hashlib
+from pathlib import Path
+
+from PySide6.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, Signal, QAbstractListModel, QModelIndex, QSize, QUrl
+)
+from PySide6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache, QDesktopServices
+from PySide6.QtWidgets import QListView
+
+from core.attachments import THUMB_DIR
+from db import connect_db
+
+THUMB_SIZE = 160
+IMAGE_SUFFIXES = {f".{bytes(fmt).decode().lower()}" for fmt in QImageReader.supportedImageFormats()}
+
+
+def thumbnail_key(content_hash, file_path):
+    """Chave do cache: o hash do conteúdo; anexos antigos (sem hash) usam o caminho."""
+    if content_hash:
+        return content_hash
+    return "path-" + hashlib.sha1(str(file_path).encode("utf-8")).hexdigest()
+
+
+def thumbnail_path(key):
+    return THUMB_DIR / f"{key}_{THUMB_SIZE}.png"
+
+
+class _ThumbSignals(QObject):
+    done = Signal(str, QImage)
+
+
+class _ThumbJob(QRunnable):
+    """Lê (ou gera) a miniatura fora da thread da interface."""
+
+    def __init__(self, key, src, signals):
+        super().__init__()
+        self.key = key
+        self.src = src
+        self.signals = signals
+
+    def run(self):
+        cached = thumbnail_path(self.key)
+        img = QImage()
+        if cached.exists():
+            img.load(str(cached))
+        if img.isNull():
+            reader = QImageReader(str(self.src))
+            reader.setAutoTransform(True)
+            size = reader.size()
+            if size.isValid():
+                # decodifica direto na escala reduzida quando o formato permite
+                reader.setScaledSize(size.scaled(THUMB_SIZE, THUMB_SIZE, Qt.KeepAspectRatio))
+            img = reader.read()
+            if not img.isNull():
+                if img.width() > THUMB_SIZE or img.height() > THUMB_SIZE:
+                    img = img.scaled(THUMB_SIZE, THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                THUMB_DIR.mkdir(parents=True, exist_ok=True)
+                img.save(str(cached), "PNG")
+        self.signals.done.emit(self.key, img)
+
+
+class ThumbnailModel(QAbstractListModel):
+    """Modelo preguiçoso: a miniatura só é pedida quando a view desenha o item."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._rows_by_key = {}
+        self._pending = set()
+        self._failed = set()
+        self._pool = QThreadPool.globalInstance()
+        self._signals = _ThumbSignals()
+        self._signals.done.connect(self._on_thumbnail)
+        placeholder = QPixmap(THUMB_SIZE, THUMB_SIZE)
+        placeholder.fill(Qt.darkGray)
+        self._placeholder = placeholder
+
+    def set_items(self, items):
+        """items: lista de (attachment_id, file_path, original_name, content_hash)."""
+        self.beginResetModel()
+        self._items = list(items)
+        self._rows_by_key = {}
+        for r, (_aid, path, _name, chash) in enumerate(self._items):
+            self._rows_by_key.setdefault(thumbnail_key(chash, path), []).append(r)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        attach_id, path, name, chash = self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            return f"{attach_id} - {name}"
+        if role == Qt.UserRole:
+            return path
+        if role == Qt.DecorationRole:
+            key = thumbnail_key(chash, path)
+            pix = QPixmapCache.find(key)
+            if pix is not None and not pix.isNull():
+                return pix
+            if key not in self._pending and key not in self._failed:
+                self._pending.add(key)
+                self._pool.start(_ThumbJob(key, path, self._signals))
+            return self._placeholder
+        return None
+
+    def _on_thumbnail(self, key, img):
+        self._pending.discard(key)
+        if img.isNull():
+            self._failed.add(key)
+            return
+        QPixmapCache.insert(key, QPixmap.fromImage(img))
+        for r in self._rows_by_key.get(key, []):
+            idx = self.index(r)
+            self.dataChanged.emit(idx, idx, [Qt.DecorationRole])
+
+
+class AttachmentPreviewList(QListView):
+    """Grade virtualizada de miniaturas dos anexos de imagem de uma equipe."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self.setGridSize(QSize(THUMB_SIZE + 24, THUMB_SIZE + 36))
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(100)
+        self.setWordWrap(True)
+        self._model = ThumbnailModel(self)
+        self.setModel(self._model)
+        self.doubleClicked.connect(self._open_file)
+
+    def load_team(self, team_id):
+        conn = connect_db()
+        try:
+            rows = conn.execute("""
+                SELECT a.id, a.file_path, a.original_name, a.content_hash, a.mime_type
+                FROM attachments a
+                JOIN diary_entries d ON d.id = a.diary_entry_id
+                WHERE d.team_id=?
+                ORDER BY a.id DESC
+            """, (team_id,)).fetchall()
+        finally:
+            conn.close()
+        items = [
+            (aid, path, name, chash)
+            for aid, path, name, chash, mime in rows
+            if (mime or "").startswith("image/") or Path(name or path).suffix.lower() in IMAGE_SUFFIXES
+        ]
+        self._model.set_items(items)
+
+    def _open_file(self, index):
+        path = index.data(Qt.UserRole)
+        if path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(str(Path(path).resolve())))
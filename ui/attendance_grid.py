@@ -0,0 +1,127 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QMessageBox
+)
+from core.attendance import (
+    load_session_attendance, save_session_attendance,
+    load_session_candidate_attendance, save_session_candidate_attendance
+)
+from db import connect_db
+
+MODES = {
+    # modo: (rótulo da coluna, leitura, gravação)
+    'teams': ("Equipe", load_session_attendance, save_session_attendance),
+    'candidates': ("Candidato", load_session_candidate_attendance, save_session_candidate_attendance),
+}
+
+
+class AttendanceGridDialog(QDialog):
+    """Chamada de uma sessão: uma linha por equipe ou candidato, salva tudo de uma vez."""
+
+    COL_ID, COL_NAME, COL_PRESENT, COL_NOTES = range(4)
+
+    def __init__(self, session_id, session_label="", mode='teams', parent=None):
+        super().__init__(parent)
+        self.session_id = session_id
+        self.mode = mode
+        self.saved_count = 0
+        label, self._loader, self._saver = MODES[mode]
+        self.setWindowTitle(f"Chamada da sessão {session_label or session_id}")
+        self.resize(700, 600)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Marque quem esteve presente. Linhas sem registro aparecem em cinza."))
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["ID", label, "Presente", "Notas"])
+        self.table.horizontalHeader().setSectionResizeMode(self.COL_NOTES, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        tools = QHBoxLayout()
+        all_btn = QPushButton("Todos presentes")
+        all_btn.clicked.connect(lambda: self._set_all(Qt.Checked))
+        none_btn = QPushButton("Todos ausentes")
+        none_btn.clicked.connect(lambda: self._set_all(Qt.Unchecked))
+        tools.addWidget(all_btn)
+        tools.addWidget(none_btn)
+        tools.addStretch()
+        layout.addLayout(tools)
+
+        btns = QHBoxLayout()
+        save_btn = QPushButton("Salvar chamada")
+        save_btn.setObjectName("primary")
+        save_btn.clicked.connect(self.save)
+        cancel_btn = QPushButton("Cancelar")
+        cancel_btn.setObjectName("danger")
+        cancel_btn.clicked.connect(self.reject)
+        btns.addWidget(save_btn)
+        btns.addWidget(cancel_btn)
+        layout.addLayout(btns)
+        self._load()
+
+    def _load(self):
+        conn = connect_db()
+        try:
+            rows = self._loader(conn, self.session_id)
+        finally:
+            conn.close()
+        # estado carregado, para gravar só o que mudou
+        self._original = {}
+        self.table.setRowCount(len(rows))
+        for r, (rid, name, present, notes) in enumerate(rows):
+            self._original[rid] = (present, notes)
+            id_item = QTableWidgetItem(str(rid))
+            id_item.setFlags(id_item.flags() & ~Qt.ItemIsEditable)
+            name_item = QTableWidgetItem(name or "")
+            name_item.setFlags(name_item.flags() & ~Qt.ItemIsEditable)
+            check = QTableWidgetItem("")
+            check.setFlags((check.flags() | Qt.ItemIsUserCheckable) & ~Qt.ItemIsEditable)
+            check.setCheckState(Qt.Checked if present else Qt.Unchecked)
+            if present is None:
+                for item in (id_item, name_item):
+                    item.setForeground(Qt.gray)
+            self.table.setItem(r, self.COL_ID, id_item)
+            self.table.setItem(r, self.COL_NAME, name_item)
+            self.table.setItem(r, self.COL_PRESENT, check)
+            self.table.setItem(r, self.COL_NOTES, QTableWidgetItem(notes))
+        self.table.resizeColumnsToContents()
+        self._touched = set()
+        self.table.itemChanged.connect(self._on_item_changed)
+
+    def _on_item_changed(self, item):
+        if item.column() == self.COL_PRESENT:
+            self._touched.add(item.row())
+
+    def _set_all(self, state):
+        for r in range(self.table.rowCount()):
+            self.table.item(r, self.COL_PRESENT).setCheckState(state)
+            self._touched.add(r)
+
+    def changed_rows(self):
+        """[(id, presente, notas)] que diferem do que está no banco."""
+        out = []
+        for r in range(self.table.rowCount()):
+            rid = int(self.table.item(r, self.COL_ID).text())
+            present = 1 if self.table.item(r, self.COL_PRESENT).checkState() == Qt.Checked else 0
+            notes = self.table.item(r, self.COL_NOTES).text().strip()
+            old_present, old_notes = self._original[rid]
+            if old_present is None and r not in self._touched and not notes:
+                continue  # linha sem registro que ninguém mexeu
+            if old_present is None or old_present != present or old_notes != notes:
+                out.append((rid, present, notes))
+        return out
+
+    def save(self):
+        rows = self.changed_rows()
+        if not rows:
+            self.accept()
+            return
+        conn = connect_db()
+        try:
+            self.saved_count = self._saver(conn, self.session_id, rows)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao salvar chamada: {e}")
+            return
+        finally:
+            conn.close()
+        self.accept()
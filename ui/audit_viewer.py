@@ -0,0 +1,121 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton, QLineEdit,
+    QComboBox, QTableWidget, QTableWidgetItem, QHeaderView
+)
+from core.audit import get_audit_logger, list_audit_actions, query_audit_events
+
+PAGE_SIZE = 100
+ENTITY_TYPES = ["", "evaluation", "candidate", "team", "training_session", "attendance",
+                "diary_entry", "attachment"]
+
+
+class AuditTrailDialog(QDialog):
+    """Visualizador paginado da trilha de auditoria (tabela audit_events)."""
+
+    def __init__(self, parent=None, action=None, entity_type=None, entity_id=None):
+        super().__init__(parent)
+        self.setWindowTitle("Trilha de Auditoria")
+        self.resize(1000, 600)
+        # ids de corte de cada página já visitada (None = mais recente)
+        self._page_starts = [None]
+        self._next_before = None
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.action_cb = QComboBox()
+        self.action_cb.setEditable(True)
+        self.entity_type_cb = QComboBox()
+        self.entity_type_cb.setEditable(True)
+        self.entity_type_cb.addItems(ENTITY_TYPES)
+        self.entity_id_in = QLineEdit()
+        self.text_in = QLineEdit()
+        self.text_in.setPlaceholderText("Trecho dos detalhes (ex.: motivo)")
+        self.date_from_in = QLineEdit()
+        self.date_from_in.setPlaceholderText("YYYY-MM-DD")
+        self.date_to_in = QLineEdit()
+        self.date_to_in.setPlaceholderText("YYYY-MM-DD (exclusivo)")
+        form.addRow("Ação:", self.action_cb)
+        form.addRow("Tipo de entidade:", self.entity_type_cb)
+        form.addRow("ID da entidade:", self.entity_id_in)
+        form.addRow("Detalhes contém:", self.text_in)
+        form.addRow("De:", self.date_from_in)
+        form.addRow("Até:", self.date_to_in)
+        layout.addLayout(form)
+
+        search_btn = QPushButton("Filtrar")
+        search_btn.setObjectName("primary")
+        search_btn.clicked.connect(self.search)
+        layout.addWidget(search_btn)
+
+        self.table = QTableWidget(0, 8)
+        self.table.setHorizontalHeaderLabels(["ID", "Data/Hora", "Ação", "Entidade", "Entidade ID",
+                                              "Usuário", "Duração (ms)", "Detalhes"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(7, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        nav = QHBoxLayout()
+        self.prev_btn = QPushButton("<< Anterior")
+        self.prev_btn.clicked.connect(self.prev_page)
+        self.next_btn = QPushButton("Próxima >>")
+        self.next_btn.clicked.connect(self.next_page)
+        self.page_label = QLabel("")
+        nav.addWidget(self.prev_btn)
+        nav.addWidget(self.page_label)
+        nav.addStretch()
+        nav.addWidget(self.next_btn)
+        layout.addLayout(nav)
+
+        # garante que eventos ainda no buffer apareçam na consulta
+        get_audit_logger().flush()
+        self.action_cb.addItem("")
+        self.action_cb.addItems(list_audit_actions())
+        if action:
+            self.action_cb.setCurrentText(action)
+        if entity_type:
+            self.entity_type_cb.setCurrentText(entity_type)
+        if entity_id is not None:
+            self.entity_id_in.setText(str(entity_id))
+        self.search()
+
+    def _filters(self):
+        return dict(
+            action=self.action_cb.currentText().strip() or None,
+            entity_type=self.entity_type_cb.currentText().strip() or None,
+            entity_id=self.entity_id_in.text().strip() or None,
+            text=self.text_in.text().strip() or None,
+            date_from=self.date_from_in.text().strip() or None,
+            date_to=self.date_to_in.text().strip() or None,
+        )
+
+    def search(self):
+        self._page_starts = [None]
+        self._load_page()
+
+    def next_page(self):
+        if self._next_before is None:
+            return
+        self._page_starts.append(self._next_before)
+        self._load_page()
+
+    def prev_page(self):
+        if len(self._page_starts) <= 1:
+            return
+        self._page_starts.pop()
+        self._load_page()
+
+    def _load_page(self):
+        # busca um registro a mais só para saber se existe próxima página
+        rows = query_audit_events(before_id=self._page_starts[-1], limit=PAGE_SIZE + 1, **self._filters())
+        has_more = len(rows) > PAGE_SIZE
+        rows = rows[:PAGE_SIZE]
+        self._next_before = rows[-1][0] if has_more and rows else None
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, val in enumerate(row):
+                self.table.setItem(r, c, QTableWidgetItem("" if val is None else str(val)))
+        self.table.resizeColumnsToContents()
+        self.page_label.setText(f"Página {len(self._page_starts)}")
+        self.prev_btn.setEnabled(len(self._page_starts) > 1)
+        self.next_btn.setEnabled(self._next_before is not None)
@@ -0,0 +1,84 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QTabWidget
+)
+from core.query_profiler import PROFILING_ENABLED, get_query_profiler
+
+TOP_N = 100
+
+
+def _table(headers, stretch_col):
+    t = QTableWidget(0, len(headers))
+    t.setHorizontalHeaderLabels(headers)
+    t.setEditTriggers(QTableWidget.NoEditTriggers)
+    t.setSelectionBehavior(QTableWidget.SelectRows)
+    t.setSortingEnabled(True)
+    t.horizontalHeader().setSectionResizeMode(stretch_col, QHeaderView.Stretch)
+    return t
+
+
+class QueryStatsDialog(QDialog):
+    """Consultas SQL desta sessão do app, por tempo total, e o log de consultas lentas."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Consultas SQL")
+        self.resize(1100, 600)
+        self.profiler = get_query_profiler()
+        layout = QVBoxLayout(self)
+        status = "ativa" if PROFILING_ENABLED else "desativada em config.toml [profiling]"
+        layout.addWidget(QLabel(f"Instrumentação {status}. Limite de consulta lenta: "
+                                f"{self.profiler.slow_ms:g} ms ({self.profiler.slow_log_path})."))
+
+        tabs = QTabWidget()
+        self.top_table = _table(["Total (ms)", "Chamadas", "Média (ms)", "Máx (ms)", "Linhas",
+                                 "Chamador principal", "SQL"], 6)
+        self.slow_table = _table(["Data/Hora", "ms", "Linhas", "Chamador", "SQL"], 4)
+        tabs.addTab(self.top_table, "Top por tempo total")
+        tabs.addTab(self.slow_table, "Consultas lentas")
+        layout.addWidget(tabs)
+
+        btns = QHBoxLayout()
+        refresh = QPushButton("Atualizar")
+        refresh.setObjectName("primary")
+        refresh.clicked.connect(self.refresh)
+        reset = QPushButton("Zerar estatísticas")
+        reset.setObjectName("danger")
+        reset.clicked.connect(self.reset)
+        btns.addWidget(refresh)
+        btns.addWidget(reset)
+        btns.addStretch()
+        layout.addLayout(btns)
+        self.refresh()
+
+    def refresh(self):
+        top = self.profiler.top(TOP_N)
+        self.top_table.setSortingEnabled(False)
+        self.top_table.setRowCount(len(top))
+        for r, (shape, st) in enumerate(top):
+            caller = max(st['callers'].items(), key=lambda kv: kv[1])[0] if st['callers'] else ""
+            values = [st['total_ms'], st['calls'], st['total_ms'] / st['calls'], st['max_ms'], st['rows']]
+            for c, val in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, round(val, 3) if isinstance(val, float) else val)
+                self.top_table.setItem(r, c, item)
+            self.top_table.setItem(r, 5, QTableWidgetItem(caller))
+            self.top_table.setItem(r, 6, QTableWidgetItem(shape))
+        self.top_table.setSortingEnabled(True)
+        self.top_table.resizeColumnsToContents()
+
+        slow = self.profiler.recent_slow(TOP_N)
+        self.slow_table.setSortingEnabled(False)
+        self.slow_table.setRowCount(len(slow))
+        for r, rec in enumerate(slow):
+            for c, key in enumerate(('ts', 'ms', 'rows', 'caller', 'sql')):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, rec.get(key, ""))
+                self.slow_table.setItem(r, c, item)
+        self.slow_table.setSortingEnabled(True)
+        self.slow_table.resizeColumnsToContents()
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
@@ -0,0 +1,97 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QCheckBox, QComboBox, QDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QSpinBox, QTableWidget,
+    QTableWidgetItem, QVBoxLayout
+)
+
+from core.ranking_stability import GROUPINGS, bootstrap, load_problem
+from core.policy import BANDS, NOT_APPROVED
+
+
+def _stability_task(ctx, by, reps, apply_penalty):
+    ctx.progress(text="Lendo avaliações...")
+    conn = ctx.connect()
+    try:
+        problem = load_problem(conn, by, apply_penalty)
+    finally:
+        conn.close()
+    result = bootstrap(problem, reps, progress=lambda done, total: ctx.progress(
+        done, total, f"Réplicas: {done}/{total}"))
+    return problem, result
+
+
+def _item(value):
+    item = QTableWidgetItem()
+    item.setData(Qt.DisplayRole, value)
+    return item
+
+
+class RankingStabilityDialog(QDialog):
+    """Quantas vezes cada candidato cai em cada faixa ao reamostrar bancas ou sessões.
+
+    Só lista quem fica fora de 'Não aprovado' no ranking atual ou em alguma réplica.
+    """
+
+    def __init__(self, tasks, apply_penalty=True, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Estabilidade do ranking (bootstrap)")
+        self.resize(1000, 600)
+        self.tasks = tasks
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Reamostrar por:"))
+        self.by_cb = QComboBox()
+        for key, label in GROUPINGS.items():
+            self.by_cb.addItem(label, key)
+        top.addWidget(self.by_cb)
+        top.addWidget(QLabel("Réplicas:"))
+        self.reps_spin = QSpinBox()
+        self.reps_spin.setRange(100, 100000)
+        self.reps_spin.setSingleStep(500)
+        self.reps_spin.setValue(2000)
+        top.addWidget(self.reps_spin)
+        self.chk_penalty = QCheckBox("Aplicar penalidade por presença")
+        self.chk_penalty.setChecked(apply_penalty)
+        top.addWidget(self.chk_penalty)
+        run_btn = QPushButton("Executar")
+        run_btn.setObjectName("primary")
+        run_btn.clicked.connect(self.run)
+        top.addWidget(run_btn)
+        top.addStretch()
+        layout.addLayout(top)
+        self.info = QLabel("Uso interno da banca. Nada é gravado no banco.")
+        layout.addWidget(self.info)
+
+        self.table = QTableWidget(0, 8)
+        self.table.setHorizontalHeaderLabels(["Candidato ID", "Nome", "Equipe", "Faixa atual"]
+                                             + [f"% {b}" for b in BANDS] + ["Posição média"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+    def run(self):
+        by, reps, penalty = self.by_cb.currentData(), self.reps_spin.value(), self.chk_penalty.isChecked()
+        self.tasks.run(('ranking_stability', by, reps, penalty), _stability_task, by, reps, penalty,
+                       title="Estabilidade do ranking", on_done=self.show_result)
+
+    def show_result(self, payload):
+        problem, result = payload
+        freq, observed, mean_rank = result['freq'], result['observed'], result['mean_rank']
+        shown = [i for i in range(len(problem['ids']))
+                 if observed[i] != NOT_APPROVED or freq[i, NOT_APPROVED] < 1.0]
+        shown.sort(key=lambda i: mean_rank[i])
+        self.info.setText(f"{result['reps']} réplicas sorteando {len(problem['groups'])} "
+                          f"grupos ({GROUPINGS[problem['by']]}) com reposição; {len(shown)} candidatos "
+                          f"com chance de aprovação ou lista de espera.")
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(shown))
+        for r, i in enumerate(shown):
+            values = [problem['ids'][i], problem['names'][i], problem['teams'][i], BANDS[observed[i]]]
+            values += [round(float(f) * 100, 1) for f in freq[i]] + [round(float(mean_rank[i]), 1)]
+            for c, val in enumerate(values):
+                self.table.setItem(r, c, _item(val))
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(7, Qt.AscendingOrder)
+        self.table.resizeColumnsToContents()
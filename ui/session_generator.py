@@ -0,0 +1,102 @@
+from PySide6.QtCore import QDate
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton, QLineEdit,
+    QCheckBox, QDateEdit, QMessageBox
+)
+from core.sessions import (
+    WEEKDAY_NAMES, SessionOverlapError, create_sessions, generate_sessions, parse_slots
+)
+from db import connect_db
+
+MAX_LISTED_OVERLAPS = 15
+
+
+class SessionGeneratorDialog(QDialog):
+    """Gera o calendário de treinos: período, dias da semana e faixas de horário."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Gerar sessões recorrentes")
+        self.resize(520, 320)
+        self.created = 0
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        today = QDate.currentDate()
+        self.from_in = QDateEdit(today)
+        self.from_in.setCalendarPopup(True)
+        self.from_in.setDisplayFormat("yyyy-MM-dd")
+        self.to_in = QDateEdit(today.addMonths(2))
+        self.to_in.setCalendarPopup(True)
+        self.to_in.setDisplayFormat("yyyy-MM-dd")
+        form.addRow("De:", self.from_in)
+        form.addRow("Até:", self.to_in)
+
+        days = QHBoxLayout()
+        self.weekday_checks = []
+        for i, name in enumerate(WEEKDAY_NAMES):
+            chk = QCheckBox(name)
+            chk.setChecked(i == 5)  # sábado
+            chk.toggled.connect(self._update_preview)
+            self.weekday_checks.append(chk)
+            days.addWidget(chk)
+        form.addRow("Dias:", days)
+
+        self.slots_in = QLineEdit("07:00-12:20")
+        self.slots_in.setPlaceholderText("07:00-12:20, 13:30-17:00")
+        form.addRow("Horários:", self.slots_in)
+        layout.addLayout(form)
+
+        self.preview_label = QLabel("")
+        layout.addWidget(self.preview_label)
+        for w in (self.from_in, self.to_in):
+            w.dateChanged.connect(self._update_preview)
+        self.slots_in.textChanged.connect(self._update_preview)
+
+        btns = QHBoxLayout()
+        ok_btn = QPushButton("Gerar")
+        ok_btn.setObjectName("primary")
+        ok_btn.clicked.connect(self.generate)
+        cancel_btn = QPushButton("Cancelar")
+        cancel_btn.setObjectName("danger")
+        cancel_btn.clicked.connect(self.reject)
+        btns.addWidget(ok_btn)
+        btns.addWidget(cancel_btn)
+        layout.addLayout(btns)
+        self._update_preview()
+
+    def _sessions(self):
+        weekdays = [i for i, chk in enumerate(self.weekday_checks) if chk.isChecked()]
+        return generate_sessions(self.from_in.date().toString("yyyy-MM-dd"),
+                                 self.to_in.date().toString("yyyy-MM-dd"),
+                                 weekdays, parse_slots(self.slots_in.text()))
+
+    def _update_preview(self, *_):
+        try:
+            n = len(self._sessions())
+        except ValueError as e:
+            self.preview_label.setText(str(e))
+            return
+        self.preview_label.setText(f"{n} sessões serão criadas.")
+
+    def generate(self):
+        try:
+            sessions = self._sessions()
+        except ValueError as e:
+            QMessageBox.warning(self, "Erro", str(e))
+            return
+        if not sessions:
+            QMessageBox.warning(self, "Erro", "Nenhuma sessão no período e dias escolhidos.")
+            return
+        conn = connect_db()
+        try:
+            self.created = create_sessions(conn, sessions)
+        except SessionOverlapError as e:
+            lines = [f"{a[0]} {a[1]}-{a[2]} x {b[1]}-{b[2]}" for a, b in e.overlaps[:MAX_LISTED_OVERLAPS]]
+            if len(e.overlaps) > MAX_LISTED_OVERLAPS:
+                lines.append(f"... e mais {len(e.overlaps) - MAX_LISTED_OVERLAPS}")
+            QMessageBox.warning(self, "Conflito de horários",
+                                "Nenhuma sessão foi criada. Conflitos:\n" + "\n".join(lines))
+            return
+        finally:
+            conn.close()
+        self.accept()
@@ -0,0 +1,93 @@
+import sqlite3
+from datetime import datetime
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import QHeaderView, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+
+from core.band_ranking import BandRanking
+from core.policy import BANDS
+from db import connect_db
+
+
+class StatusPreview(QWidget):
+    """Prévia interna das faixas 'Aprovado' e 'Lista de espera'.
+
+    Visível, relê a cada ``POLL_MS`` só os candidatos alterados desde a leitura
+    anterior (``BandRanking``), inclusive gravações de outras janelas ou do cli.
+    Quem mudou de faixa na última atualização aparece em negrito.
+    """
+
+    POLL_MS = 1000
+
+    def __init__(self, apply_penalty=True, parent=None):
+        super().__init__(parent)
+        self.ranking = BandRanking(apply_penalty)
+        self._shown = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Prévia do resultado final (uso interno)"))
+        self.info = QLabel("")
+        layout.addWidget(self.info)
+        self.table = QTableWidget(0, 7)
+        self.table.setHorizontalHeaderLabels(
+            ["Posição", "Candidato ID", "Nome", "Equipe", "Score", "Presença (%)", "Faixa"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.POLL_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def set_apply_penalty(self, apply_penalty):
+        if apply_penalty != self.ranking.apply_penalty:
+            self.ranking = BandRanking(apply_penalty)
+            self._shown = None
+            if self.isVisible():
+                self.refresh()
+
+    def refresh(self):
+        try:
+            conn = connect_db()
+            try:
+                changes = self.ranking.refresh(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # banco ocupado por outra gravação: tenta de novo no próximo ciclo
+            self.info.setText(f"Prévia não atualizada: {e}")
+            return
+        policy = self.ranking.policy
+        rows = self.ranking.top(policy.approved_count + policy.waitlist_count)
+        if rows == self._shown and not changes:
+            return
+        if self._shown is None:
+            changes = {}  # primeira carga: nada a destacar
+        self._shown = rows
+        self.info.setText(f"{len(self.ranking)} candidatos no ranking; atualizado às "
+                          f"{datetime.now():%H:%M:%S}"
+                          + (f", {len(changes)} mudaram de faixa." if changes else "."))
+        bold = QFont()
+        bold.setBold(True)
+        self.table.setRowCount(len(rows))
+        for r, (rank, mid, name, team, score, _n, presence, band) in enumerate(rows):
+            values = [rank, mid, name or f"Candidato ID {mid}", team or 'Sem equipe', f"{score:.3f}",
+                      "-" if presence is None else f"{presence * 100:.1f}", BANDS[band]]
+            for c, val in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, val)
+                if mid in changes:
+                    item.setFont(bold)
+                self.table.setItem(r, c, item)
+        self.table.resizeColumnsToContents()
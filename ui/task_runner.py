@@ -0,0 +1,192 @@
+"""Tarefas longas fora da thread da interface.
+
+``TaskRunner.run(key, fn, ...)`` executa ``fn(ctx, *args)`` num QThreadPool e
+entrega o resultado por sinal na thread da interface. Tarefas que gravam no
+banco (``writes=True``) vão para um pool de uma thread só, então nunca
+gravam em paralelo. Pedir de novo uma tarefa com a mesma ``key`` enquanto ela
+roda não inicia outra: o pedido é anexado à execução em andamento.
+
+O cancelamento é cooperativo: ``ctx.progress`` e ``ctx.check_cancelled``
+levantam ``TaskCancelled`` e as conexões de ``ctx.connect()`` interrompem a
+instrução SQL em andamento.
+"""
+import sqlite3
+import threading
+import time
+
+from PySide6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtWidgets import QMessageBox, QProgressDialog
+
+from db import connect_db
+
+# instruções da VM do SQLite entre verificações de cancelamento
+SQL_CHECK_OPS = 20000
+SHOW_PROGRESS_AFTER_MS = 400
+
+
+class TaskCancelled(Exception):
+    """A tarefa foi cancelada pelo usuário."""
+
+
+class TaskContext:
+    """Passado à função da tarefa: progresso, cancelamento e conexões."""
+
+    def __init__(self, handle):
+        self._handle = handle
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def progress(self, done=0, total=0, text=""):
+        """Atualiza o diálogo (total 0 = indeterminado) e verifica cancelamento."""
+        self.check_cancelled()
+        self._handle.progress.emit(int(done), int(total), text)
+
+    def connect(self):
+        """``connect_db()`` cuja consulta em andamento é interrompida ao cancelar."""
+        conn = connect_db()
+        conn.set_progress_handler(lambda: 1 if self._cancel.is_set() else 0, SQL_CHECK_OPS)
+        return conn
+
+
+class TaskHandle(QObject):
+    """Uma execução; vive na thread da interface, que recebe os sinais."""
+
+    progress = Signal(int, int, str)
+    finished = Signal(object)
+    failed = Signal(object)
+    cancelled = Signal()
+
+    def __init__(self, key, title, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.title = title
+        self.ctx = TaskContext(self)
+        self.started = time.perf_counter()
+        self.elapsed_ms = None
+        self.dialog = None
+
+
+class _Job(QRunnable):
+    def __init__(self, handle, fn, args):
+        super().__init__()
+        self.handle = handle
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        h = self.handle
+        try:
+            result = self.fn(h.ctx, *self.args)
+        except TaskCancelled:
+            h.cancelled.emit()
+        except sqlite3.OperationalError as e:
+            # instrução interrompida pelo progress handler
+            if h.ctx.cancelled:
+                h.cancelled.emit()
+            else:
+                h.failed.emit(e)
+        except Exception as e:
+            h.failed.emit(e)
+        else:
+            h.elapsed_ms = (time.perf_counter() - h.started) * 1000
+            h.finished.emit(result)
+
+
+class TaskRunner(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._parent_widget = parent
+        self._read_pool = QThreadPool.globalInstance()
+        self._write_pool = QThreadPool(self)
+        self._write_pool.setMaxThreadCount(1)
+        self._running = {}
+
+    def is_running(self, key):
+        return key in self._running
+
+    def run(self, key, fn, *args, title="Processando...", writes=False, on_done=None, on_error=None,
+            on_cancel=None, show_progress=True):
+        """Executa ``fn(ctx, *args)`` em segundo plano e devolve o ``TaskHandle``.
+
+        ``on_done(resultado)`` roda na thread da interface. Sem ``on_error`` a
+        falha é mostrada num QMessageBox.
+        """
+        handle = self._running.get(key)
+        merged = handle is not None
+        if not merged:
+            handle = TaskHandle(key, title, self)
+            self._running[key] = handle
+            for sig in (handle.finished, handle.failed, handle.cancelled):
+                sig.connect(lambda *_a, h=handle: self._release(h))
+            if show_progress:
+                handle.dialog = self._make_dialog(handle)
+        if on_done:
+            handle.finished.connect(on_done)
+        if on_error:
+            handle.failed.connect(on_error)
+        elif not merged:
+            handle.failed.connect(lambda e, t=title: QMessageBox.critical(self._parent_widget, "Erro", f"{t}\n{e}"))
+        if on_cancel:
+            handle.cancelled.connect(on_cancel)
+        if merged:
+            if handle.dialog is not None:
+                handle.dialog.show()
+                handle.dialog.raise_()
+            return handle
+        (self._write_pool if writes else self._read_pool).start(_Job(handle, fn, args))
+        return handle
+
+    def _make_dialog(self, handle):
+        dlg = QProgressDialog(handle.title, "Cancelar", 0, 0, self._parent_widget)
+        dlg.setWindowTitle(handle.title)
+        dlg.setWindowModality(Qt.NonModal)
+        dlg.setMinimumDuration(SHOW_PROGRESS_AFTER_MS)
+        dlg.setAutoClose(False)
+        dlg.setAutoReset(False)
+        dlg.canceled.connect(handle.ctx.cancel)
+
+        def on_progress(done, total, text):
+            if text:
+                dlg.setLabelText(text)
+            dlg.setMaximum(total)
+            dlg.setValue(done if total else 0)
+        handle.progress.connect(on_progress)
+        return dlg
+
+    def _release(self, handle):
+        if self._running.get(handle.key) is handle:
+            del self._running[handle.key]
+        if handle.dialog is not None:
+            handle.dialog.canceled.disconnect(handle.ctx.cancel)
+            handle.dialog.close()
+            handle.dialog.deleteLater()
+            handle.dialog = None
+        handle.deleteLater()
+
+    def cancel_all(self):
+        for handle in list(self._running.values()):
+            handle.ctx.cancel()
+
+    def wait_for_idle(self, timeout_ms=-1):
+        """Bloqueia até não haver tarefas, entregando os sinais pendentes.
+
+        Para scripts e benchmarks; a interface nunca deve chamar isto.
+        """
+        deadline = None if timeout_ms < 0 else time.perf_counter() + timeout_ms / 1000
+        while self._running:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            self._read_pool.waitForDone(10)
+            self._write_pool.waitForDone(10)
+            QCoreApplication.processEvents()
+        return True
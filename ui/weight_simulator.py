@@ -0,0 +1,170 @@
+import time
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QCheckBox, QDialog, QDoubleSpinBox, QHBoxLayout, QHeaderView, QLabel, QPushButton, QSplitter,
+    QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+from core.repositories.internal_weights import WEIGHT_NAMES
+from core.policy import APPROVED, BANDS
+from core.weight_simulator import MIN_STEP, ScoreMatrix, as_vector, simulate, weight_grid
+
+
+def _simulate_task(ctx, matrix, normalization_mode, weights, apply_penalty):
+    if matrix is None:
+        ctx.progress(text="Lendo avaliações...")
+        conn = ctx.connect()
+        try:
+            matrix = ScoreMatrix.load(conn, normalization_mode, current=weights[0])
+        finally:
+            conn.close()
+    t0 = time.perf_counter()
+    sim = simulate(matrix, weights, apply_penalty, progress=lambda done, total: ctx.progress(
+        done, total, f"Vetores: {done}/{total}"))
+    trans = sim.transitions()
+    approval = sim.approval_share()
+    return matrix, sim, trans, approval, (time.perf_counter() - t0) * 1000
+
+
+def _item(value):
+    item = QTableWidgetItem()
+    item.setData(Qt.DisplayRole, value)
+    return item
+
+
+def _table(headers, stretch_col):
+    t = QTableWidget(0, len(headers))
+    t.setHorizontalHeaderLabels(headers)
+    t.setEditTriggers(QTableWidget.NoEditTriggers)
+    t.setSelectionBehavior(QTableWidget.SelectRows)
+    t.setSelectionMode(QTableWidget.SingleSelection)
+    t.horizontalHeader().setSectionResizeMode(stretch_col, QHeaderView.Stretch)
+    return t
+
+
+class WeightSimulatorDialog(QDialog):
+    """Compara as faixas do resultado final sob vários vetores de pesos, sem gravar nada.
+
+    A primeira linha é o vetor atual; as demais vêm da grade. Depois de
+    ``exec()``, ``chosen_weights`` tem o vetor escolhido (ou None).
+    """
+
+    def __init__(self, tasks, current_weights, apply_penalty=True, parent=None, normalization_mode=None):
+        super().__init__(parent)
+        self.setWindowTitle("Simulador de pesos internos")
+        self.resize(1000, 650)
+        self.tasks = tasks
+        self.current = as_vector(current_weights)
+        self.normalization_mode = normalization_mode
+        self.chosen_weights = None
+        self.matrix = None
+        self.sim = None
+
+        layout = QVBoxLayout(self)
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Passo da grade:"))
+        self.step_spin = QDoubleSpinBox()
+        self.step_spin.setRange(MIN_STEP, 0.5)
+        self.step_spin.setSingleStep(0.01)
+        self.step_spin.setValue(0.05)
+        top.addWidget(self.step_spin)
+        self.chk_penalty = QCheckBox("Aplicar penalidade por presença")
+        self.chk_penalty.setChecked(apply_penalty)
+        top.addWidget(self.chk_penalty)
+        run_btn = QPushButton("Simular")
+        run_btn.setObjectName("primary")
+        run_btn.clicked.connect(self.run)
+        top.addWidget(run_btn)
+        top.addStretch()
+        layout.addLayout(top)
+        self.info = QLabel()
+        layout.addWidget(self.info)
+
+        split = QSplitter(Qt.Vertical)
+        self.vectors_table = _table(["Imersão", "Desenv", "Apres", "Mudam de faixa", "Entram em aprovados",
+                                     "Saem de aprovados"], 3)
+        self.vectors_table.itemSelectionChanged.connect(self.show_changes)
+        self.changes_table = _table(["Candidato ID", "Nome", "Equipe", "Posição atual", "Nova posição",
+                                     "Faixa atual", "Nova faixa", "Aprovado em (% dos vetores)"], 1)
+        split.addWidget(self.vectors_table)
+        split.addWidget(self.changes_table)
+        layout.addWidget(split)
+
+        btns = QHBoxLayout()
+        use_btn = QPushButton("Usar estes pesos no formulário")
+        use_btn.setObjectName("primary")
+        use_btn.setToolTip("Só preenche o formulário; nada é gravado até 'Salvar pesos internos'.")
+        use_btn.clicked.connect(self.use_selected)
+        close_btn = QPushButton("Fechar")
+        close_btn.clicked.connect(self.reject)
+        btns.addStretch()
+        btns.addWidget(use_btn)
+        btns.addWidget(close_btn)
+        layout.addLayout(btns)
+        self.run()
+
+    def run(self):
+        grid = weight_grid(self.step_spin.value())
+        weights = [self.current] + [w for w in grid if not (abs(w - self.current) < 1e-9).all()]
+        penalty = self.chk_penalty.isChecked()
+        self.tasks.run(('weight_simulator', id(self), self.step_spin.value(), penalty), _simulate_task,
+                       self.matrix, self.normalization_mode, weights, penalty,
+                       title="Simulador de pesos internos", on_done=self.show_result)
+
+    def show_result(self, payload):
+        self.matrix, self.sim, trans, self.approval, elapsed_ms = payload
+        weights = self.sim.weights
+        self.info.setText(f"{len(weights)} vetores x {len(self.matrix)} membros em {elapsed_ms:.1f} ms "
+                          f"(linha 1 = pesos atuais; a ordem não muda com a escala dos pesos).")
+
+        t = self.vectors_table
+        t.setSortingEnabled(False)
+        t.setRowCount(len(weights))
+        for r, (w, tr) in enumerate(zip(self.sim.weights, trans)):
+            changed = int(tr.sum() - tr.trace())
+            values = [round(float(x), 3) for x in w] + [
+                changed, int(tr[1:, APPROVED].sum()), int(tr[APPROVED, 1:].sum())]
+            for c, val in enumerate(values):
+                item = _item(val)
+                item.setData(Qt.UserRole, r)
+                t.setItem(r, c, item)
+        t.setSortingEnabled(True)
+        # menos mudanças primeiro; o vetor atual (0 mudanças) fica no topo
+        t.sortItems(3, Qt.AscendingOrder)
+        t.resizeColumnsToContents()
+        t.selectRow(0)
+
+    def _selected_column(self):
+        rows = self.vectors_table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.vectors_table.item(rows[0].row(), 0).data(Qt.UserRole)
+
+    def show_changes(self):
+        k = self._selected_column()
+        t = self.changes_table
+        t.setSortingEnabled(False)
+        if k is None or self.sim is None:
+            t.setRowCount(0)
+            return
+        ranks, bands = self.sim.ranks, self.sim.bands
+        moved = [i for i in range(len(self.matrix)) if bands[i, 0] != bands[i, k]]
+        moved.sort(key=lambda i: ranks[i, k])
+        t.setRowCount(len(moved))
+        for r, i in enumerate(moved):
+            values = [self.matrix.ids[i], self.matrix.names[i], self.matrix.teams[i], int(ranks[i, 0]),
+                      int(ranks[i, k]), BANDS[bands[i, 0]], BANDS[bands[i, k]],
+                      round(float(self.approval[i]) * 100, 1)]
+            for c, val in enumerate(values):
+                t.setItem(r, c, _item(val))
+        t.setSortingEnabled(True)
+        t.sortItems(4, Qt.AscendingOrder)
+        t.resizeColumnsToContents()
+
+    def use_selected(self):
+        k = self._selected_column()
+        if k is None:
+            return
+        self.chosen_weights = {name: round(float(x), 4) for name, x in zip(WEIGHT_NAMES, self.sim.weights[k])}
+        self.accept()